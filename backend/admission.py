@@ -0,0 +1,145 @@
+"""
+Admission control for new debates.
+
+A node runs at most ``max_debates`` debates at once, and every debate also
+draws on per-provider concurrency budgets (one LLM and TTS stream per persona,
+and one STT stream per persona, or per room when the agents transcribe the
+human once for all personas). Rooms that don't fit wait in a bounded FIFO queue and
+learn their position and an estimated start time; once the queue is full,
+new rooms are turned away with a Retry-After hint instead of overloading the
+debates already running.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, Optional
+
+PROVIDERS = ("llm", "stt", "tts")
+
+
+def parse_budgets(spec: str) -> Dict[str, int]:
+    """``"llm=40,stt=30,tts=30"`` -> {"llm": 40, ...}; providers left out are unlimited"""
+    budgets = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, value = part.partition("=")
+        budgets[name.strip()] = int(value)
+    return budgets
+
+
+@dataclass
+class Admission:
+    status: str  # "running", "queued" or "rejected"
+    queue_position: Optional[int] = None
+    estimated_start_sec: Optional[float] = None
+    retry_after_sec: Optional[float] = None
+
+    def as_dict(self) -> dict:
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+
+class AdmissionController:
+    def __init__(self, max_debates: int, max_pending: int = 20, provider_budgets: Optional[Dict[str, int]] = None,
+                 avg_debate_sec: float = 600.0, coalesce_stt: bool = False):
+        self.max_debates = max(1, max_debates)
+        self.max_pending = max_pending
+        self.budgets = dict(provider_budgets or {})
+        # One STT stream per room instead of one per persona
+        self.coalesce_stt = coalesce_stt
+        # Running estimate of how long a debate lasts, used for ETAs
+        self.avg_debate_sec = avg_debate_sec
+
+        # room -> (start time, provider demand)
+        self.running: Dict[str, tuple] = {}
+        # room -> (provider demand, start callback), oldest first
+        self.queue: "OrderedDict[str, tuple]" = OrderedDict()
+        self.counts = {"started": 0, "queued": 0, "rejected": 0}
+
+    def demand(self, personas: int) -> Dict[str, int]:
+        """Provider streams a debate of ``personas`` holds; 0 (a replay) takes only a debate slot"""
+        demand = {provider: personas for provider in PROVIDERS}
+        if self.coalesce_stt and personas:
+            demand["stt"] = 1
+        return demand
+
+    def _in_use(self, provider: str) -> int:
+        return sum(d.get(provider, 0) for _, d in self.running.values())
+
+    def _fits(self, demand: Dict[str, int]) -> bool:
+        if len(self.running) >= self.max_debates:
+            return False
+        return all(self._in_use(p) + n <= self.budgets[p] for p, n in demand.items() if p in self.budgets)
+
+    def request(self, room: str, personas: int, start: Callable[[], None]) -> Admission:
+        """Admit a new room (calling ``start`` now or once it reaches the front of the queue)"""
+        # A debate larger than a whole budget still has to fit once the node is idle
+        demand = {p: min(n, self.budgets.get(p, n)) for p, n in self.demand(personas).items()}
+        if not self.queue and self._fits(demand):
+            self._start(room, demand, start)
+            return Admission("running")
+        if len(self.queue) >= self.max_pending:
+            self.counts["rejected"] += 1
+            return Admission("rejected", retry_after_sec=self.retry_after())
+        self.queue[room] = (demand, start)
+        self.counts["queued"] += 1
+        return self.status(room)
+
+    def status(self, room: str) -> Optional[Admission]:
+        if room in self.running:
+            return Admission("running")
+        if room not in self.queue:
+            return None
+        position = list(self.queue).index(room) + 1
+        return Admission("queued", queue_position=position, estimated_start_sec=round(self._eta(position), 1))
+
+    def release(self, room: str):
+        """A debate ended (or failed to start): free its capacity and start queued rooms that now fit"""
+        entry = self.running.pop(room, None)
+        if entry:
+            duration = time.monotonic() - entry[0]
+            self.avg_debate_sec = 0.8 * self.avg_debate_sec + 0.2 * duration
+        self.queue.pop(room, None)
+        while self.queue:
+            next_room, (demand, start) = next(iter(self.queue.items()))
+            if not self._fits(demand):
+                break
+            del self.queue[next_room]
+            self._start(next_room, demand, start)
+
+    def withdraw(self, room: str) -> bool:
+        """Drop a room that is still queued; False if it isn't"""
+        return self.queue.pop(room, None) is not None
+
+    def _start(self, room: str, demand: Dict[str, int], start: Callable[[], None]):
+        self.running[room] = (time.monotonic(), demand)
+        self.counts["started"] += 1
+        try:
+            start()
+        except Exception as e:
+            print(f"Starting admitted room {room} failed: {e}")
+            self.running.pop(room, None)
+
+    def _eta(self, position: int) -> float:
+        """Seconds until the ``position``-th queued room can expect a free slot"""
+        now = time.monotonic()
+        remaining = sorted(max(0.0, started + self.avg_debate_sec - now) for started, _ in self.running.values())
+        if not remaining:
+            return 0.0
+        index = position - 1
+        return remaining[index % len(remaining)] + self.avg_debate_sec * (index // len(remaining))
+
+    def retry_after(self) -> float:
+        """When a rejected client should try again: roughly when the queue has moved up by one"""
+        return max(1.0, round(self._eta(1), 1))
+
+    def stats(self) -> dict:
+        return {
+            "running": len(self.running),
+            "queued": len(self.queue),
+            "max_debates": self.max_debates,
+            "max_pending": self.max_pending,
+            "provider_in_use": {p: self._in_use(p) for p in PROVIDERS},
+            "provider_budgets": self.budgets,
+            "avg_debate_sec": round(self.avg_debate_sec, 1),
+            "totals": dict(self.counts),
+        }
@@ -0,0 +1,410 @@
+"""
+Pool of pre-started debate agent workers.
+
+Each worker is an ``agent_worker.py`` process that has already imported the
+livekit plugins and warmed up its models, so handing it a room skips the cold
+start that a fresh ``python debate_agent.py`` pays for every debate. A worker
+hosts up to ``capacity`` debates at once; rooms queue for a free slot.
+
+The pool also supervises the debates it hands out: worker logs are read
+continuously (so a chatty agent never blocks on a full pipe) and forwarded
+with the worker's pid, debates are cancelled on request or once they exceed
+the wall-clock limit, and outcomes are counted for capacity planning.
+
+Every assignment gets its own id, which the worker echoes in the messages
+about it. A room name can be reused as soon as its debate is deleted:
+``cancel`` forgets the room's assignment straight away, so messages about an
+earlier debate in the same room are told apart by their id and don't end (or
+cancel) the current one.
+"""
+
+import sys, json, time, uuid, asyncio
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from debate_job import DebateJob
+
+WORKER_SCRIPT = Path(__file__).parent / "agent_worker.py"
+
+
+class PoolWorker:
+    def __init__(self, proc: asyncio.subprocess.Process):
+        self.proc = proc
+        self.pid = proc.pid
+        self.assigned = 0
+        # Debates running here: assignment id -> room
+        self.assignments: Dict[str, str] = {}
+        self.ready = asyncio.Event()
+        # Latest host stats from the worker's health check reply
+        self.stats: dict = {}
+        self.last_pong = time.monotonic()
+        self.spawned_at = time.monotonic()
+        self.retiring = False
+        # Set once the worker has taken max_debates_per_worker rooms
+        self.draining = False
+        self.reader_task: Optional[asyncio.Task] = None
+        self.log_task: Optional[asyncio.Task] = None
+        # Last lines the worker logged, shown if it crashes
+        self.log_tail: deque = deque(maxlen=50)
+
+    @property
+    def rooms(self) -> List[str]:
+        return sorted(self.assignments.values())
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.returncode is None
+
+    async def send(self, message: dict):
+        self.proc.stdin.write((json.dumps(message) + "\n").encode())
+        await self.proc.stdin.drain()
+
+
+class AgentWorkerPool:
+    def __init__(
+        self,
+        size: int = 2,
+        capacity: int = 1,
+        max_debates_per_worker: int = 20,
+        health_interval: float = 10.0,
+        health_timeout: float = 5.0,
+        script: Path = WORKER_SCRIPT,
+        max_debate_sec: float = 0.0,
+        on_room_ended: Optional[Callable[[str, str, Optional[str]], None]] = None,
+        on_event: Optional[Callable[[Optional[str], dict], None]] = None,
+    ):
+        self.size = size
+        self.capacity = max(1, capacity)
+        self.max_debates_per_worker = max_debates_per_worker
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.script = Path(script)
+        # Wall-clock limit per debate; 0 disables it
+        self.max_debate_sec = max_debate_sec
+        # Called with (room, status, error) when a debate ends or its worker dies,
+        # except for rooms ended through cancel()
+        self.on_room_ended = on_room_ended
+        # Called with (room, event) for debate events (turn timings, STT delays)
+        # and pool events such as worker start-up; room is None for the latter
+        self.on_event = on_event
+
+        self.workers: Dict[int, PoolWorker] = {}
+        # One entry per free debate slot on a ready worker
+        self._slots: asyncio.Queue = asyncio.Queue()
+        self._health_task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._stopped = asyncio.Event()
+        # Workers being replaced (after a crash, failed health check or recycling)
+        self._replacements: set = set()
+
+        # Seconds each room spent waiting for a free worker slot (last 1000 rooms)
+        self.wait_times: deque = deque(maxlen=1000)
+        self.recycled = 0
+        self.replaced_unhealthy = 0
+        # Workers that died before becoming ready, in a row; drives respawn backoff
+        self._startup_failures = 0
+        # Current assignment id of each room handed out by this pool
+        self._current: Dict[str, str] = {}
+        # Wall-clock limit timers of running debates, keyed by assignment id
+        self._deadlines: Dict[str, asyncio.TimerHandle] = {}
+        # Debates that ended, by status
+        self.outcomes = {"finished": 0, "failed": 0, "cancelled": 0, "timed_out": 0}
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        for _ in range(self.size):
+            await self._spawn()
+        self._health_task = asyncio.create_task(self._health_loop())
+        print(f"Agent worker pool started with {self.size} workers x {self.capacity} debates")
+
+    async def stop(self, timeout: float = 10.0):
+        self._closing = True
+        self._stopped.set()
+        if self._health_task:
+            self._health_task.cancel()
+        # Let replacements finish first, so a worker they spawn is retired below
+        # instead of being left running when the event loop closes
+        if self._replacements:
+            await asyncio.gather(*self._replacements, return_exceptions=True)
+        for worker in list(self.workers.values()):
+            await self._retire(worker, timeout=timeout)
+
+    async def _spawn(self) -> PoolWorker:
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, str(self.script), "--capacity", str(self.capacity),
+            cwd=self.script.parent,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        worker = PoolWorker(proc)
+        self.workers[worker.pid] = worker
+        worker.reader_task = asyncio.create_task(self._read_worker(worker))
+        worker.log_task = asyncio.create_task(self._read_logs(worker))
+        return worker
+
+    async def _retire(self, worker: PoolWorker, timeout: float = 10.0):
+        """Ask a worker to exit, killing it if it doesn't within ``timeout``"""
+        worker.retiring = True
+        self.workers.pop(worker.pid, None)
+        if worker.alive:
+            try:
+                await worker.send({"type": "shutdown"})
+                await asyncio.wait_for(worker.proc.wait(), timeout)
+            except (asyncio.TimeoutError, ConnectionError):
+                worker.proc.kill()
+                await worker.proc.wait()
+        if worker.reader_task:
+            worker.reader_task.cancel()
+        if worker.log_task:
+            worker.log_task.cancel()
+
+    async def _replace(self, worker: PoolWorker, timeout: float = 10.0, delay: float = 0.0):
+        await self._retire(worker, timeout=timeout)
+        if delay:
+            try:
+                await asyncio.wait_for(self._stopped.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+        if not self._closing:
+            await self._spawn()
+
+    def _replace_later(self, worker: PoolWorker, timeout: float = 10.0, delay: float = 0.0):
+        task = asyncio.create_task(self._replace(worker, timeout=timeout, delay=delay))
+        self._replacements.add(task)
+        task.add_done_callback(self._replacements.discard)
+
+    # ------------------------------------------------------------------
+    # Worker messages
+    # ------------------------------------------------------------------
+
+    async def _read_logs(self, worker: PoolWorker):
+        """Forward the worker's log lines as they arrive"""
+        while True:
+            line = await worker.proc.stderr.readline()
+            if not line:
+                break
+            text = line.decode(errors="replace").rstrip()
+            worker.log_tail.append(text)
+            print(f"[agent-worker {worker.pid}] {text}")
+
+    async def _read_worker(self, worker: PoolWorker):
+        while True:
+            line = await worker.proc.stdout.readline()
+            if not line:
+                break
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            kind = message.get("type")
+            if kind == "ready":
+                print(f"Agent worker {worker.pid} warm in {message.get('warmup_sec')}s")
+                worker.ready.set()
+                self._startup_failures = 0
+                self._emit(None, {"type": "worker_ready", "pid": worker.pid,
+                                  "spawn_sec": time.monotonic() - worker.spawned_at,
+                                  "warmup_sec": message.get("warmup_sec")})
+                for _ in range(self.capacity):
+                    self._slots.put_nowait(worker)
+            elif kind == "pong":
+                worker.last_pong = time.monotonic()
+                worker.stats = message.get("stats") or {}
+            elif kind == "event":
+                room = message.get("room")
+                # Late events of an earlier debate in a reused room are dropped
+                if self._current.get(room) == message.get("assignment"):
+                    self._emit(room, message.get("event") or {})
+            elif kind == "finished":
+                self._on_finished(worker, message)
+            elif kind == "rejected":
+                print(f"Agent worker {worker.pid} rejected room {message.get('room')}: {message.get('error')}")
+                self._release(worker, message.get("assignment"))
+                self._room_ended(message.get("assignment"), message.get("room"), "failed",
+                                 f"rejected by agent worker: {message.get('error')}")
+
+        # stdout closed: the process exited or crashed
+        if not worker.retiring and not self._closing:
+            returncode = await worker.proc.wait()
+            print(f"Agent worker {worker.pid} exited unexpectedly with code {returncode} "
+                  f"(rooms: {worker.rooms}); last log lines:")
+            for text in list(worker.log_tail)[-10:]:
+                print(f"    {text}")
+            self._fail_rooms(worker, f"agent worker exited with code {returncode}")
+            self.replaced_unhealthy += 1
+            delay = 0.0
+            if not worker.ready.is_set():
+                # Crashing during warm-up: back off instead of respawning in a tight loop
+                self._startup_failures += 1
+                delay = min(30.0, 0.5 * 2 ** (self._startup_failures - 1))
+            self._replace_later(worker, delay=delay)
+
+    def _on_finished(self, worker: PoolWorker, message: dict):
+        status = message.get("status") or ("finished" if message.get("ok") else "failed")
+        detail = f": {message.get('error')}" if status == "failed" else ""
+        print(f"Agent worker {worker.pid} {status}{detail} room {message.get('room')}")
+        self._release(worker, message.get("assignment"))
+        self._room_ended(message.get("assignment"), message.get("room"), status, message.get("error"))
+
+    def _room_ended(self, assignment: str, room: str, status: str, error: Optional[str]):
+        deadline = self._deadlines.pop(assignment, None)
+        if deadline:
+            deadline.cancel()
+        self.outcomes[status] = self.outcomes.get(status, 0) + 1
+        if self._current.get(room) != assignment:
+            print(f"Ignoring end of an earlier debate in room {room} ({status})")
+            return
+        del self._current[room]
+        if self.on_room_ended:
+            try:
+                self.on_room_ended(room, status, error)
+            except Exception as e:
+                print(f"Room-ended callback failed for {room}: {e}")
+
+    def _fail_rooms(self, worker: PoolWorker, error: str):
+        """End every debate a dead or replaced worker was running"""
+        assignments, worker.assignments = worker.assignments, {}
+        for assignment, room in assignments.items():
+            self._room_ended(assignment, room, "failed", error)
+
+    def _emit(self, room: Optional[str], event: dict):
+        if self.on_event:
+            try:
+                self.on_event(room, event)
+            except Exception as e:
+                print(f"Agent event callback failed for {room}: {e}")
+
+    def _release(self, worker: PoolWorker, assignment: Optional[str]):
+        """Free the slot an assignment held, recycling the worker once it has drained"""
+        if worker.assignments.pop(assignment, None) is None:
+            return  # Already released (worker failed or replaced)
+        if not worker.draining:
+            self._slots.put_nowait(worker)
+        elif not worker.rooms and not worker.retiring:
+            self.recycled += 1
+            self._replace_later(worker)
+
+    # ------------------------------------------------------------------
+    # Health checks
+    # ------------------------------------------------------------------
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            sent_at = time.monotonic()
+            for worker in list(self.workers.values()):
+                if worker.ready.is_set() and worker.alive:
+                    try:
+                        await worker.send({"type": "ping"})
+                    except ConnectionError:
+                        pass
+            await asyncio.sleep(self.health_timeout)
+            for worker in list(self.workers.values()):
+                if worker.ready.is_set() and worker.last_pong < sent_at:
+                    print(f"Agent worker {worker.pid} failed health check, replacing "
+                          f"(rooms: {worker.rooms})")
+                    self.replaced_unhealthy += 1
+                    self._fail_rooms(worker, "agent worker unhealthy")
+                    self._replace_later(worker, timeout=1.0)
+
+    # ------------------------------------------------------------------
+    # Room assignment
+    # ------------------------------------------------------------------
+
+    async def assign(self, job: DebateJob, url: str, token: str) -> float:
+        """Hand a debate to the next free worker slot, returning how long the room waited"""
+        room = job.room
+        queued_at = time.monotonic()
+        while True:
+            worker = await self._slots.get()
+            # Workers can die, drain or be replaced while their slots sit in the queue
+            if worker.alive and not worker.retiring and not worker.draining and worker.pid in self.workers:
+                break
+
+        wait = time.monotonic() - queued_at
+        self.wait_times.append(wait)
+        assignment = uuid.uuid4().hex[:12]
+        worker.assignments[assignment] = room
+        self._current[room] = assignment
+        worker.assigned += 1
+        if worker.assigned >= self.max_debates_per_worker:
+            worker.draining = True
+        try:
+            await worker.send({
+                "type": "assign",
+                "assignment": assignment,
+                "room": room,
+                "url": url,
+                "token": token,
+                "job": job.to_dict(),
+            })
+        except asyncio.CancelledError:
+            # Room deleted while the assignment was being written; give the slot back
+            self._release(worker, assignment)
+            if self._current.get(room) == assignment:
+                del self._current[room]
+            raise
+        if self.max_debate_sec > 0:
+            previous = self._deadlines.pop(assignment, None)
+            if previous:
+                previous.cancel()
+            self._deadlines[assignment] = asyncio.get_running_loop().call_later(
+                self.max_debate_sec,
+                lambda: asyncio.create_task(self._send_cancel(room, assignment, "timed_out")),
+            )
+        print(f"Assigned room {room} to agent worker {worker.pid} after {wait * 1000:.1f}ms")
+        return wait
+
+    async def cancel(self, room: str, reason: str = "cancelled") -> bool:
+        """Stop the debate running in ``room`` and forget it
+
+        The caller has ended the room: its debate's end is counted but not
+        reported to ``on_room_ended``, and the room can be assigned again
+        right away. False if no worker of this pool hosts it.
+        """
+        assignment = self._current.pop(room, None)
+        if assignment is None:
+            return False
+        deadline = self._deadlines.pop(assignment, None)
+        if deadline:
+            deadline.cancel()
+        return await self._send_cancel(room, assignment, reason)
+
+    async def _send_cancel(self, room: str, assignment: str, reason: str) -> bool:
+        for worker in list(self.workers.values()):
+            if assignment in worker.assignments and worker.alive:
+                print(f"Cancelling room {room} on agent worker {worker.pid} ({reason})")
+                try:
+                    await worker.send({"type": "cancel", "room": room, "assignment": assignment, "reason": reason})
+                except ConnectionError:
+                    return False
+                return True
+        return False
+
+    def stats(self) -> dict:
+        waits = sorted(self.wait_times)
+        return {
+            "size": self.size,
+            "capacity_per_worker": self.capacity,
+            "workers": len(self.workers),
+            "active_debates": sum(len(w.rooms) for w in self.workers.values()),
+            "debates": {"running": sum(len(w.rooms) for w in self.workers.values()), **self.outcomes},
+            "max_debates_per_worker": self.max_debates_per_worker,
+            "recycled": self.recycled,
+            "replaced_unhealthy": self.replaced_unhealthy,
+            "room_wait_sec": {
+                "count": len(waits),
+                "avg": sum(waits) / len(waits) if waits else 0.0,
+                "p95": waits[int(len(waits) * 0.95)] if waits else 0.0,
+                "max": waits[-1] if waits else 0.0,
+            },
+            "hosts": {
+                str(w.pid): {"rooms": w.rooms, "draining": w.draining, **w.stats}
+                for w in self.workers.values()
+            },
+        }
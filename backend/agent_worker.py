@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Warm debate agent worker.
+
+Started (and kept alive) by ``agent_pool.AgentWorkerPool``. The heavy
+livekit-agents plugin imports and model warm-up happen once at process start,
+after which the worker waits for room assignments on stdin. With
+``--profile-startup`` it warms up, prints the time and RSS growth of each
+plugin import and model load, and exits.
+
+A worker hosts up to ``--capacity`` debates at once as independent asyncio
+tasks on one event loop, sharing the models and provider clients loaded in
+this process. Assignments beyond capacity are rejected. A debate can be
+cancelled by the pool (room deleted or wall-clock limit reached), which closes
+its sessions and reports it finished with that status.
+
+Protocol: one JSON object per line. ``assignment`` is the pool's id for one
+debate; it is echoed back so messages about an earlier debate in a reused
+room can be told apart.
+    pool -> worker : {"type": "assign", "assignment", "room", "url", "token", "job"}
+                     {"type": "cancel", "assignment", "room", "reason"}
+                     {"type": "ping"}
+                     {"type": "shutdown"}
+    worker -> pool : {"type": "ready", "pid", "warmup_sec", "imports", "models"}
+                     {"type": "pong", "rooms", "stats"}
+                     {"type": "started", "assignment", "room"}
+                     {"type": "event", "assignment", "room", "event"}
+                     {"type": "finished", "assignment", "room", "ok", "status", "error"}
+                     {"type": "rejected", "assignment", "room", "error"}
+"""
+
+import os, sys, json, time, asyncio, argparse, contextvars
+from typing import Dict, Optional
+
+# Room of the debate running in the current task (inherited by its subtasks)
+current_room: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_room", default=None)
+
+
+class RoomTaggedStream:
+    """Prefix each printed line with the room of the debate that printed it"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        # Unterminated output per room; print() writes text and newline separately
+        self._partial: Dict[Optional[str], str] = {}
+
+    def write(self, text: str) -> int:
+        room = current_room.get()
+        *lines, rest = (self._partial.pop(room, "") + text).split("\n")
+        for line in lines:
+            self.stream.write(f"[{room}] {line}\n" if room else f"{line}\n")
+        if rest:
+            self._partial[room] = rest
+        self.stream.flush()
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+# stdout is reserved for the pool protocol; everything the debate code prints
+# goes to stderr, which the pool reads and forwards line by line.
+_protocol_out = sys.stdout
+sys.stdout = RoomTaggedStream(sys.stderr)
+
+_started = time.perf_counter()
+
+import startup_profile
+from startup_profile import timed_import
+
+rtc = timed_import("livekit.rtc")
+timed_import("livekit.agents")
+debate_agent = timed_import("debate_agent")
+
+import providers
+import model_registry
+import tracing
+from debate_job import DebateJob
+
+
+def send(message: dict):
+    """Write one protocol message back to the pool"""
+    _protocol_out.write(json.dumps(message) + "\n")
+    _protocol_out.flush()
+
+
+def warmup() -> float:
+    """Import plugins and load the shared models before the first debate"""
+    if debate_agent.USE_TURN_DETECTOR:
+        # Pool debates run without a LiveKit job context, which the turn detector needs
+        sys.exit("USE_TURN_DETECTOR=true is not supported by the agent worker pool: the turn detector "
+                 "needs a LiveKit job context. Unset it, or run the agent with python debate_agent.py start.")
+    debate_agent.prewarm()
+    return time.perf_counter() - _started
+
+
+# Debates running in this process, keyed by assignment id
+debates: Dict[str, asyncio.Task] = {}
+# Room of each running debate, keyed by assignment id
+debate_rooms: Dict[str, str] = {}
+
+# Why the pool cancelled a debate ("cancelled", "timed_out"), keyed by assignment id
+cancel_reasons: Dict[str, str] = {}
+
+# Most recent and worst event-loop lag since the last health check
+loop_lag = {"last_ms": 0.0, "max_ms": 0.0}
+
+# Process RSS once warmed up, before any debate is running
+baseline_rss_mb = 0.0
+
+
+async def monitor_loop_lag(interval: float = 0.5):
+    """Measure how late the event loop wakes us up; a busy loop delays every debate"""
+    while True:
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag_ms = max(0.0, (time.perf_counter() - t0 - interval) * 1000)
+        loop_lag["last_ms"] = lag_ms
+        loop_lag["max_ms"] = max(loop_lag["max_ms"], lag_ms)
+
+
+def host_stats(capacity: int) -> dict:
+    active = sum(1 for task in debates.values() if not task.done())
+    rss = model_registry.rss_mb()
+    stats = {
+        "active_debates": active,
+        "capacity": capacity,
+        "loop_lag_ms": round(loop_lag["last_ms"], 1),
+        "loop_lag_max_ms": round(loop_lag["max_ms"], 1),
+        "rss_mb": round(rss, 1),
+        # Memory above the warmed-up baseline, split across running debates
+        "rss_per_debate_mb": round((rss - baseline_rss_mb) / active, 1) if active else 0.0,
+        "utterance_cache": debate_agent.get_utterance_cache().stats(),
+        "providers": providers.stats(),
+        "llm_router": debate_agent.get_model_router().stats_dict(),
+    }
+    loop_lag["max_ms"] = 0.0
+    return stats
+
+
+async def run_assignment(message: dict):
+    job = DebateJob.from_dict(message.get("job", {}), room=message["room"])
+    assignment = message.get("assignment")
+    room_name = job.room
+    current_room.set(room_name)
+    timeline = tracing.start_timeline(room_name, run_id=assignment)
+    room = rtc.Room()
+    ids = {"assignment": assignment, "room": room_name}
+    send({"type": "started", **ids})
+    result = {"ok": False, "status": "failed", "error": "debate did not finish"}
+    try:
+        with tracing.span("connect"):
+            await room.connect(message["url"], message["token"])
+        await debate_agent.run_debate(room, job, on_event=lambda event: send({"type": "event", **ids, "event": event}))
+        result = {"ok": True, "status": "finished", "error": None}
+    except asyncio.CancelledError:
+        status = cancel_reasons.get(assignment, "cancelled")
+        print(f"Debate in room {room_name} stopped: {status}")
+        result = {"ok": False, "status": status, "error": status}
+    except Exception as e:
+        print(f"Debate in room {room_name} failed: {e}")
+        result = {"ok": False, "status": "failed", "error": str(e)}
+    finally:
+        # Free this debate's capacity before reporting it finished: the pool may
+        # hand the slot to a queued room as soon as it reads "finished"
+        try:
+            await room.disconnect()
+        except Exception as e:
+            print(f"Disconnecting from room {room_name} failed: {e}")
+        timeline.close()
+        debates.pop(assignment, None)
+        debate_rooms.pop(assignment, None)
+        cancel_reasons.pop(assignment, None)
+        send({"type": "finished", **ids, **result})
+
+
+async def stdin_reader() -> asyncio.StreamReader:
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    return reader
+
+
+async def main(capacity: int):
+    global baseline_rss_mb
+    warmup_sec = warmup()
+    baseline_rss_mb = model_registry.rss_mb()
+    reader = await stdin_reader()
+    lag_task = asyncio.create_task(monitor_loop_lag())
+    send({
+        "type": "ready",
+        "pid": os.getpid(),
+        "warmup_sec": round(warmup_sec, 3),
+        "capacity": capacity,
+        "imports": startup_profile.import_report,
+        "models": model_registry.load_report,
+    })
+    print(f"Agent worker {os.getpid()} ready after {warmup_sec:.2f}s (capacity {capacity})")
+
+    while True:
+        line = await reader.readline()
+        if not line:
+            break  # pool went away
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            print(f"Ignoring malformed pool message: {line!r}")
+            continue
+
+        kind = message.get("type")
+        if kind == "ping":
+            send({"type": "pong", "rooms": sorted(debate_rooms.values()), "stats": host_stats(capacity)})
+        elif kind == "assign":
+            assignment = message.get("assignment")
+            ids = {"assignment": assignment, "room": message.get("room")}
+            if assignment in debates:
+                send({"type": "rejected", **ids, "error": "assignment already running here"})
+            elif len(debates) >= capacity:
+                send({"type": "rejected", **ids, "error": "worker at capacity"})
+            else:
+                debate_rooms[assignment] = message.get("room")
+                debates[assignment] = asyncio.create_task(run_assignment(message))
+        elif kind == "cancel":
+            assignment = message.get("assignment")
+            task = debates.get(assignment)
+            if task and not task.done():
+                cancel_reasons[assignment] = message.get("reason") or "cancelled"
+                task.cancel()
+        elif kind == "shutdown":
+            break
+
+    lag_task.cancel()
+    if debates:
+        await asyncio.gather(*debates.values(), return_exceptions=True)
+    await debate_agent.close_shared_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm debate agent worker")
+    parser.add_argument("--capacity", type=int, default=1, help="debates hosted concurrently")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="warm up, print per-import and per-model-load time and RSS, and exit")
+    parser.add_argument("--json", action="store_true", help="print the startup profile as JSON")
+    args = parser.parse_args()
+    if args.profile_startup:
+        warmup()
+        profile = startup_profile.report(_started)
+        _protocol_out.write((json.dumps(profile, indent=2) if args.json else startup_profile.format_report(profile)) + "\n")
+        sys.exit(0)
+    asyncio.run(main(max(1, args.capacity)))
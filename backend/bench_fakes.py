@@ -0,0 +1,418 @@
+"""
+Local stand-ins for the debate's external services, used by benchmark.py.
+
+FakeLLM streams tokens with configurable latency, FakeTTS produces synthetic
+PCM frames, FakeSTT transcribes after a fixed delay, FakeSession plays audio
+out in real time and emits the same events as an AgentSession, and
+FakeRoom / FakeJobContext stand in for the LiveKit transport. FakePool answers
+room assignments for the API benchmark. Nothing here imports livekit, so the
+fakes also run in plain unit tests.
+"""
+
+import math, time, json, asyncio, random
+from types import SimpleNamespace
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, List, Optional, Union
+
+WORDS = (
+    "reason progress evidence history justice power freedom science truth people "
+    "future energy courage wisdom question answer nature machine idea world"
+).split()
+
+
+# ----------------------------------------------------------------------------
+# LLM
+# ----------------------------------------------------------------------------
+
+class FakeChatContext:
+    def __init__(self, items: Optional[list] = None):
+        self.items = list(items or [])
+
+    @classmethod
+    def empty(cls) -> "FakeChatContext":
+        return cls()
+
+    def add_message(self, role: str, content: str):
+        self.items.append({"role": role, "content": content})
+
+    def copy(self) -> "FakeChatContext":
+        return FakeChatContext(self.items)
+
+
+class _FakeLLMStream:
+    def __init__(self, llm: "FakeLLM"):
+        self.llm = llm
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def __aiter__(self):
+        await asyncio.sleep(self.llm.ttft_sec)
+        for i, token in enumerate(self.llm.reply_tokens()):
+            if i:
+                await asyncio.sleep(self.llm.inter_token_sec)
+            yield SimpleNamespace(delta=SimpleNamespace(content=token))
+
+
+class FakeLLM:
+    """Streams a few sentences of filler, token by token"""
+
+    def __init__(self, ttft_sec: float = 0.3, inter_token_sec: float = 0.01, sentences: int = 3,
+                 words_per_sentence: int = 12, seed: Optional[int] = None):
+        self.ttft_sec = ttft_sec
+        self.inter_token_sec = inter_token_sec
+        self.sentences = sentences
+        self.words_per_sentence = words_per_sentence
+        self.model = "fake-llm"
+        self.calls = 0
+        # Chat context of every call
+        self.contexts: list = []
+        self._random = random.Random(seed)
+
+    def reply_tokens(self) -> List[str]:
+        tokens = []
+        for _ in range(self.sentences):
+            words = [self._random.choice(WORDS) for _ in range(self.words_per_sentence)]
+            words[0] = words[0].capitalize()
+            tokens.extend(f"{word} " for word in words[:-1])
+            tokens.append(f"{words[-1]}. ")
+        return tokens
+
+    def chat(self, chat_ctx=None, **kwargs) -> _FakeLLMStream:
+        self.calls += 1
+        self.contexts.append(chat_ctx)
+        return _FakeLLMStream(self)
+
+
+# ----------------------------------------------------------------------------
+# TTS / STT
+# ----------------------------------------------------------------------------
+
+class FakeAudioFrame:
+    def __init__(self, data: bytes, sample_rate: int, num_channels: int):
+        self.data = data
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.samples_per_channel = len(data) // (2 * num_channels)
+
+    @property
+    def duration(self) -> float:
+        return self.samples_per_channel / self.sample_rate
+
+
+def tone(seconds: float, sample_rate: int = 24000, frequency: float = 220.0) -> bytes:
+    """Synthetic mono int16 PCM"""
+    samples = int(seconds * sample_rate)
+    return b"".join(
+        int(8000 * math.sin(2 * math.pi * frequency * i / sample_rate)).to_bytes(2, "little", signed=True)
+        for i in range(samples)
+    )
+
+
+class _FakeTTSStream:
+    def __init__(self, tts: "FakeTTS", text: str):
+        self.tts = tts
+        self.text = text
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def __aiter__(self):
+        await asyncio.sleep(self.tts.ttfb_sec)
+        seconds = len(self.text) / self.tts.chars_per_sec
+        frame_sec = self.tts.frame_ms / 1000
+        frame = self.tts.frame_pcm()
+        for _ in range(max(1, math.ceil(seconds / frame_sec))):
+            yield SimpleNamespace(frame=FakeAudioFrame(frame, self.tts.sample_rate, 1))
+
+
+class FakeTTS:
+    """Synthesizes ``chars_per_sec`` characters of speech per second of audio after ``ttfb_sec``"""
+
+    def __init__(self, ttfb_sec: float = 0.15, chars_per_sec: float = 15.0, sample_rate: int = 24000,
+                 frame_ms: int = 100):
+        self.ttfb_sec = ttfb_sec
+        self.chars_per_sec = chars_per_sec
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.characters = 0
+        self._frame: Optional[bytes] = None
+
+    def frame_pcm(self) -> bytes:
+        if self._frame is None:
+            self._frame = tone(self.frame_ms / 1000, self.sample_rate)
+        return self._frame
+
+    def synthesize(self, text: str) -> _FakeTTSStream:
+        self.characters += len(text)
+        return _FakeTTSStream(self, text)
+
+
+class FakeSTT:
+    """Returns a transcript ``latency_sec`` after the speech ends"""
+
+    def __init__(self, latency_sec: float = 0.2):
+        self.latency_sec = latency_sec
+        self.transcriptions = 0
+
+    async def recognize(self, frames: List[FakeAudioFrame], text: str) -> str:
+        self.transcriptions += 1
+        await asyncio.sleep(self.latency_sec)
+        return text
+
+
+# ----------------------------------------------------------------------------
+# Session
+# ----------------------------------------------------------------------------
+
+class FakeAgent:
+    """Like an Agent, the instructions only reach the chat context through a session"""
+
+    def __init__(self, name: str, prompt: str, listens: bool = True, detached: bool = False):
+        self.name = name
+        self.prompt = prompt
+        self.instructions = prompt
+        self.listens = listens
+        self.detached = detached
+        self.session = None
+        self.chat_ctx = FakeChatContext([{"role": "system", "content": prompt}] if detached else [])
+
+    def attach(self, session):
+        """Run in ``session``, which inserts the instructions (as AgentActivity does)"""
+        self.session = session
+        self._insert_instructions()
+
+    def _insert_instructions(self):
+        if {"role": "system", "content": self.instructions} not in self.chat_ctx.items:
+            self.chat_ctx.items.insert(0, {"role": "system", "content": self.instructions})
+
+    async def update_chat_ctx(self, chat_ctx):
+        self.chat_ctx = chat_ctx.copy()
+        if self.session:
+            self._insert_instructions()
+
+
+class FakeSpeechHandle:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+
+    def __await__(self):
+        return self._wait().__await__()
+
+    async def _wait(self):
+        # Like a SpeechHandle, an interrupted speech still completes normally
+        try:
+            await asyncio.shield(self.task)
+        except asyncio.CancelledError:
+            if not self.task.cancelled():
+                raise
+
+
+class FakeSessionInput:
+    def __init__(self, audio_enabled: bool):
+        # Like RoomIO, a session started without audio input never gets one
+        self.has_audio = audio_enabled
+        self.audio_enabled = audio_enabled
+
+    def set_audio_enabled(self, enabled: bool):
+        if self.has_audio:
+            self.audio_enabled = enabled
+
+
+class FakeSession:
+    """The subset of AgentSession the debate loop uses, with real-time playout"""
+
+    def __init__(self, agent: FakeAgent, llm: FakeLLM, tts: FakeTTS, stt: Optional[FakeSTT] = None):
+        self.current_agent = agent
+        agent.attach(self)
+        self.llm = llm
+        self.tts = tts
+        self.stt = stt or FakeSTT()
+        self.input = FakeSessionInput(audio_enabled=agent.listens)
+        self.agent_state = "listening"
+        self.closed = False
+        # (start, end) of every played-out utterance, for gap measurement
+        self.playouts: List[tuple] = []
+        self._handlers: Dict[str, list] = {}
+        self._speech: Optional[FakeSpeechHandle] = None
+
+    # Events -------------------------------------------------------------
+
+    def on(self, event: str, callback: Callable):
+        self._handlers.setdefault(event, []).append(callback)
+        return callback
+
+    def off(self, event: str, callback: Callable):
+        if callback in self._handlers.get(event, []):
+            self._handlers[event].remove(callback)
+
+    def emit(self, event: str, ev):
+        for callback in list(self._handlers.get(event, [])):
+            callback(ev)
+
+    # Lifecycle ----------------------------------------------------------
+
+    async def start(self, **kwargs):
+        pass
+
+    async def close(self):
+        self.interrupt()
+        self.closed = True
+
+    # Speech -------------------------------------------------------------
+
+    def say(self, text: Union[str, AsyncIterable[str]], audio: Optional[AsyncIterable] = None) -> FakeSpeechHandle:
+        self._speech = FakeSpeechHandle(asyncio.create_task(self._speak(text, audio)))
+        return self._speech
+
+    def generate_reply(self) -> FakeSpeechHandle:
+        return self.say(self._llm_text())
+
+    def interrupt(self):
+        if self._speech and not self._speech.task.done():
+            self._speech.task.cancel()
+
+    async def _llm_text(self) -> AsyncIterator[str]:
+        async with self.llm.chat(chat_ctx=self.current_agent.chat_ctx) as stream:
+            async for chunk in stream:
+                yield chunk.delta.content
+
+    async def _frames(self, text: Union[str, AsyncIterable[str]], spoken: list) -> AsyncIterator:
+        if isinstance(text, str):
+            spoken.append(text)
+            async with self.tts.synthesize(text) as stream:
+                async for audio in stream:
+                    yield audio.frame
+            return
+        # Like the TTS node, read the text stream ahead of playout
+        chunks: asyncio.Queue = asyncio.Queue()
+
+        async def read_ahead():
+            try:
+                async for chunk in text:
+                    chunks.put_nowait(chunk)
+            finally:
+                chunks.put_nowait(None)
+
+        reader = asyncio.create_task(read_ahead())
+        try:
+            while (chunk := await chunks.get()) is not None:
+                spoken.append(chunk)
+                async with self.tts.synthesize(chunk) as stream:
+                    async for audio in stream:
+                        yield audio.frame
+            await reader
+        finally:
+            reader.cancel()
+
+    async def _speak(self, text, audio):
+        spoken: list = [text] if audio is not None and isinstance(text, str) else []
+        frames = audio if audio is not None else self._frames(text, spoken)
+        started = None
+        try:
+            async for frame in frames:
+                if started is None:
+                    started = time.perf_counter()
+                    self.agent_state = "speaking"
+                    self.emit("agent_state_changed", SimpleNamespace(old_state="thinking", new_state="speaking"))
+                # Real-time playout
+                await asyncio.sleep(frame.samples_per_channel / frame.sample_rate)
+        finally:
+            if started is not None:
+                self.playouts.append((started, time.perf_counter()))
+            self.agent_state = "listening"
+            self.emit("agent_state_changed", SimpleNamespace(old_state="speaking", new_state="listening"))
+            if audio is not None and not isinstance(text, str):
+                # Transcript text streamed alongside pre-rendered audio; closing the
+                # audio first ends the text stream if the speech was interrupted
+                if hasattr(audio, "aclose"):
+                    await audio.aclose()
+                spoken.extend([chunk async for chunk in text])
+            said = " ".join(part.strip() for part in spoken if isinstance(part, str)).strip()
+            if said:
+                self._add_item("assistant", said)
+
+    def _add_item(self, role: str, text: str):
+        self.emit("conversation_item_added", SimpleNamespace(item=SimpleNamespace(role=role, text_content=text)))
+
+    async def hear_user(self, text: str, speech_sec: float):
+        """A human speaks for ``speech_sec``; STT delay and the transcript follow"""
+        if not self.input.audio_enabled:
+            return
+        self.emit("user_state_changed", SimpleNamespace(old_state="listening", new_state="speaking"))
+        await asyncio.sleep(speech_sec)
+        self.emit("user_state_changed", SimpleNamespace(old_state="speaking", new_state="listening"))
+        started = time.perf_counter()
+        transcript = await self.stt.recognize([], text)
+        delay = time.perf_counter() - started
+        self.emit("metrics_collected", SimpleNamespace(
+            metrics=SimpleNamespace(transcription_delay=delay, end_of_utterance_delay=delay)
+        ))
+        self._add_item("user", transcript)
+
+
+# ----------------------------------------------------------------------------
+# Transport
+# ----------------------------------------------------------------------------
+
+class FakeRoom:
+    def __init__(self, name: str, metadata: str = "", connect_sec: float = 0.05):
+        self.name = name
+        self.metadata = metadata
+        self.connect_sec = connect_sec
+        self.connected = False
+
+    async def connect(self, url: str = "", token: str = ""):
+        await asyncio.sleep(self.connect_sec)
+        self.connected = True
+
+    async def disconnect(self):
+        self.connected = False
+
+
+class FakeJobContext:
+    """What ``debate_agent.entrypoint`` reads from a LiveKit JobContext"""
+
+    def __init__(self, room: FakeRoom, job_metadata: Union[str, dict] = ""):
+        if isinstance(job_metadata, dict):
+            job_metadata = json.dumps(job_metadata)
+        self.room = room
+        self.job = SimpleNamespace(room=SimpleNamespace(name=room.name), metadata=job_metadata)
+
+    async def connect(self):
+        await self.room.connect()
+
+
+class FakePool:
+    """Accepts room assignments after ``assign_sec``, like a warm worker pool would"""
+
+    def __init__(self, assign_sec: float = 0.005):
+        self.assign_sec = assign_sec
+        self.assigned: List[str] = []
+
+    async def assign(self, job, url: str, token: str) -> float:
+        await asyncio.sleep(self.assign_sec)
+        self.assigned.append(job.room)
+        return self.assign_sec
+
+    async def cancel(self, room: str, reason: str = "cancelled") -> bool:
+        return False
+
+    def stats(self) -> dict:
+        return {"assigned": len(self.assigned)}
+
+
+def gaps_between(playouts: List[tuple]) -> List[float]:
+    """Silence between consecutive utterances across a room's sessions; overlapping speech is no gap"""
+    gaps = []
+    last_end = None
+    for start, end in sorted(playouts):
+        if last_end is not None and start >= last_end:
+            gaps.append(start - last_end)
+        last_end = end if last_end is None else max(last_end, end)
+    return gaps
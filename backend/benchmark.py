@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the debate backend.
+
+Runs without LiveKit, OpenAI, Deepgram or Cartesia: the providers are
+replaced by the stand-ins in ``bench_fakes`` and everything else (the debate
+loop, turn scheduling, transcript, caches, the FastAPI app) is the real code.
+
+    python benchmark.py debates --concurrency 10 --debates 20
+    python benchmark.py join --concurrency 50 --requests 500 --users 100
+    python benchmark.py tokens
+    python benchmark.py all --max-join-p95-ms 50 --max-gap-p95-ms 1500
+
+Reports p50/p95/p99 for /join latency, spawn-to-first-audio and turn gaps,
+plus debates per CPU core. Any ``--max-*`` threshold that is exceeded makes
+the run exit with status 1, so it can gate performance regressions.
+"""
+
+import os, sys, json, time, asyncio, argparse, tempfile, contextlib
+from typing import Dict, List, Optional
+
+from bench_fakes import (
+    FakeAgent, FakeJobContext, FakeLLM, FakePool, FakeRoom, FakeSession, FakeSTT, FakeTTS, gaps_between,
+)
+from debate_job import DEFAULT_PERSONAS, DebateJob
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0, "p50": None, "p95": None, "p99": None, "max": None}
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))], 4)
+
+    return {"count": len(ordered), "p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99),
+            "max": round(ordered[-1], 4)}
+
+
+# ----------------------------------------------------------------------------
+# Debate loop
+# ----------------------------------------------------------------------------
+
+async def bench_debates(args) -> dict:
+    """Run ``args.debates`` debates through ``debate_agent.entrypoint``, ``args.concurrency`` at a time"""
+    import debate_agent
+
+    llm = FakeLLM(ttft_sec=args.llm_ttft, inter_token_sec=args.llm_token_interval, seed=1)
+    debate_agent.get_llm_plugin = lambda: llm
+    debate_agent.TURN_MIN_GAP_SEC = args.min_gap
+    debate_agent.SESSION_MODE = args.session_mode
+    debate_agent.get_persona_tts = lambda name: FakeTTS(ttfb_sec=args.tts_ttfb, chars_per_sec=args.speech_rate)
+    # Which room each session belongs to, so playouts can be grouped per debate
+    sessions_by_room: Dict[str, List[FakeSession]] = {}
+
+    async def start_fake_session(room, name, topic, llm_plugin, listen=True):
+        await asyncio.sleep(args.session_start)
+        session = FakeSession(
+            FakeAgent(name, f"You are {name}, debating '{topic}'.", listens=listen),
+            llm_plugin,
+            debate_agent.get_persona_tts(name),
+            FakeSTT(latency_sec=args.stt_latency),
+        )
+        sessions_by_room.setdefault(room.name, []).append(session)
+        return session
+
+    debate_agent.start_persona_session = start_fake_session
+
+    first_audio: List[float] = []
+    durations: List[float] = []
+    failures = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def interject(room_name: str, stop: asyncio.Event):
+        """A human in the room who speaks up every ``args.interject_every`` seconds"""
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), args.interject_every)
+            except asyncio.TimeoutError:
+                sessions = sessions_by_room.get(room_name, [])
+                await asyncio.gather(*(s.hear_user("What about the evidence?", 1.0) for s in sessions))
+
+    async def one(i: int):
+        nonlocal failures
+        job = DebateJob(room=f"bench-{i}", topic=args.topic, personas=DEFAULT_PERSONAS[:args.personas],
+                        turn_duration_min=args.turn_minutes, total_rounds=args.rounds)
+        ctx = FakeJobContext(FakeRoom(job.room), job.to_metadata())
+        async with semaphore:
+            stop = asyncio.Event()
+            human = asyncio.create_task(interject(job.room, stop)) if args.interject_every else None
+            started = time.perf_counter()
+            try:
+                await debate_agent.entrypoint(ctx)
+            except Exception as e:
+                failures += 1
+                print(f"Debate {job.room} failed: {e}", file=sys.stderr)
+                return
+            finally:
+                stop.set()
+                if human:
+                    await human
+            durations.append(time.perf_counter() - started)
+            playouts = [p for s in sessions_by_room.get(job.room, []) for p in s.playouts]
+            if playouts:
+                first_audio.append(min(start for start, _ in playouts) - started)
+
+    cpu_started, wall_started = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.debates)))
+    cpu = time.process_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+
+    gaps = []
+    for sessions in sessions_by_room.values():
+        gaps.extend(gaps_between([p for s in sessions for p in s.playouts]))
+    return {
+        "debates": args.debates,
+        "concurrency": args.concurrency,
+        "session_mode": args.session_mode,
+        # AgentSessions (each with its own STT, VAD and noise cancellation) per debate
+        "sessions_per_debate": round(sum(map(len, sessions_by_room.values())) / max(1, len(sessions_by_room)), 2),
+        "failed": failures,
+        "wall_sec": round(wall, 3),
+        "cpu_sec": round(cpu, 3),
+        # Debate-seconds one fully used core could sustain per second
+        "debates_per_core": round(sum(durations) / cpu, 1) if cpu > 0 else None,
+        "spawn_to_first_audio_sec": percentiles(first_audio),
+        "turn_gap_sec": percentiles(gaps),
+        "debate_sec": percentiles(durations),
+        # Human speech transcribed, summed over sessions (once per utterance with STT_COALESCE)
+        "stt_transcriptions": sum(s.stt.transcriptions for ss in sessions_by_room.values() for s in ss),
+    }
+
+
+# ----------------------------------------------------------------------------
+# API
+# ----------------------------------------------------------------------------
+
+async def bench_join(args) -> dict:
+    """Fire ``args.requests`` POST /join at the FastAPI app, ``args.concurrency`` at a time"""
+    import httpx
+    import main as api
+
+    api.agent_pool = FakePool(assign_sec=args.assign)
+    # Fake debates never end, so make room for all of them; this measures the request path
+    api.admission.max_debates = max(api.admission.max_debates, args.rooms)
+    transport = httpx.ASGITransport(app=api.app)
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i: int):
+            nonlocal errors
+            body = {"room": f"join-{i % args.rooms}", "topic": args.topic,
+                    "personas": ["socrates", "einstein", "tesla"][:args.personas]}
+            if args.batch:
+                body["users"] = [f"viewer-{i}-{j}" for j in range(args.batch)]
+            elif args.users:
+                # Returning viewers: identities repeat, so their tokens can be reused
+                body["user"] = f"viewer-{i % args.users}"
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/join/batch" if args.batch else "/join", json=body)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+
+        wall_started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        wall = time.perf_counter() - wall_started
+
+    # Let the agent assignments that /join scheduled finish
+    await asyncio.sleep(args.assign * 2)
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "errors": errors,
+        "rooms_assigned": len(api.agent_pool.assigned),
+        "requests_per_sec": round(args.requests / wall, 1) if wall > 0 else None,
+        "tokens_per_sec": round(args.requests * (args.batch or 1) / wall, 1) if wall > 0 else None,
+        "token_cache": api.token_cache.stats(),
+        "join_sec": percentiles(latencies),
+    }
+
+
+def bench_tokens(args) -> dict:
+    """Tokens per second: PyJWT (the old dev_token), the precomputed signer, and cache hits"""
+    from tokens import HS256Signer, TokenCache
+
+    def rate(issue) -> float:
+        started = time.perf_counter()
+        for i in range(args.tokens):
+            issue(i)
+        return round(args.tokens / (time.perf_counter() - started), 1)
+
+    def payload(i: int) -> dict:
+        now = int(time.time())
+        return {"iss": "devkey", "sub": f"viewer-{i}", "nbf": now, "exp": now + 7200,
+                "video": {"room": "bench", "roomJoin": True, "canPublish": True, "canSubscribe": True}}
+
+    report = {"tokens": args.tokens}
+    try:
+        import jwt
+        report["pyjwt_per_sec"] = rate(lambda i: jwt.encode(payload(i), "secret", algorithm="HS256"))
+    except ImportError:
+        report["pyjwt_per_sec"] = None
+    signer = HS256Signer("secret")
+    report["signer_per_sec"] = rate(lambda i: signer.sign(payload(i)))
+    cache = TokenCache("devkey", "secret", max_entries=args.tokens)
+    report["cache_miss_per_sec"] = rate(lambda i: cache.issue("bench", f"viewer-{i}"))
+    report["cache_hit_per_sec"] = rate(lambda i: cache.issue("bench", f"viewer-{i}"))
+    return report
+
+
+# ----------------------------------------------------------------------------
+# Gates
+# ----------------------------------------------------------------------------
+
+def check_gates(report: dict, args) -> List[str]:
+    failures = []
+    gates = [
+        ("join", "join_sec", args.max_join_p95_ms),
+        ("debates", "spawn_to_first_audio_sec", args.max_first_audio_p95_ms),
+        ("debates", "turn_gap_sec", args.max_gap_p95_ms),
+    ]
+    for section, series, limit_ms in gates:
+        p95 = report.get(section, {}).get(series, {}).get("p95")
+        if limit_ms is not None and p95 is not None and p95 * 1000 > limit_ms:
+            failures.append(f"{series} p95 {p95 * 1000:.1f}ms exceeds {limit_ms}ms")
+    for section, key in (("debates", "failed"), ("join", "errors")):
+        if report.get(section, {}).get(key):
+            failures.append(f"{section}: {report[section][key]} {key}")
+    return failures
+
+
+async def run(args) -> dict:
+    report = {}
+    if args.mode in ("tokens", "all"):
+        report["tokens"] = bench_tokens(args)
+    if args.mode in ("join", "all"):
+        report["join"] = await bench_join(args)
+    if args.mode in ("debates", "all"):
+        report["debates"] = await bench_debates(args)
+    return report
+
+
+def use_scratch_dirs():
+    """Keep benchmark artifacts (timelines, utterance cache, recordings) out of the real cache"""
+    scratch = tempfile.mkdtemp(prefix="debate-bench-")
+    os.environ.setdefault("DEBATE_TIMELINE_DIR", os.path.join(scratch, "timelines"))
+    os.environ.setdefault("UTTERANCE_CACHE_DIR", os.path.join(scratch, "utterances"))
+    os.environ.setdefault("RECORDING_DIR", os.path.join(scratch, "recordings"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline debate backend benchmark")
+    parser.add_argument("mode", choices=["debates", "join", "tokens", "all"], nargs="?", default="all")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--debates", type=int, default=20, help="debates to run")
+    parser.add_argument("--requests", type=int, default=200, help="/join requests to send")
+    parser.add_argument("--rooms", type=int, default=50, help="distinct rooms the /join requests spread over")
+    parser.add_argument("--users", type=int, default=0, help="distinct viewer identities (0: anonymous joins)")
+    parser.add_argument("--batch", type=int, default=0, help="identities per request via /join/batch (0: /join)")
+    parser.add_argument("--tokens", type=int, default=20000, help="tokens to issue in the tokens benchmark")
+    parser.add_argument("--personas", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--topic", default="Should AI be regulated?")
+    parser.add_argument("--turn-minutes", type=float, default=1.0, help="upper bound per turn")
+    parser.add_argument("--min-gap", type=float, default=0.2, help="pause between turns (TURN_MIN_GAP_SEC)")
+    parser.add_argument("--session-mode", choices=["multi", "single"], default="multi",
+                        help="one AgentSession per persona, or one per room voicing all personas (SESSION_MODE)")
+    parser.add_argument("--interject-every", type=float, default=0.0, help="seconds between human interjections (0: none)")
+    # Fake provider latencies
+    parser.add_argument("--llm-ttft", type=float, default=0.3)
+    parser.add_argument("--llm-token-interval", type=float, default=0.01)
+    parser.add_argument("--tts-ttfb", type=float, default=0.15)
+    parser.add_argument("--speech-rate", type=float, default=150.0, help="characters of speech per second of audio")
+    parser.add_argument("--stt-latency", type=float, default=0.2)
+    parser.add_argument("--session-start", type=float, default=0.2)
+    parser.add_argument("--assign", type=float, default=0.005, help="simulated agent assignment time")
+    # Regression gates
+    parser.add_argument("--max-join-p95-ms", type=float)
+    parser.add_argument("--max-first-audio-p95-ms", type=float)
+    parser.add_argument("--max-gap-p95-ms", type=float)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+    # Must happen before debate_agent / tracing read their settings on import
+    use_scratch_dirs()
+
+    # The backend's own logging goes to stderr so stdout is just the report
+    with contextlib.redirect_stdout(sys.stderr):
+        report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+    failures = check_gates(report, args)
+    for failure in failures:
+        print(f"GATE FAILED: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,29 @@
 # debate_agent.py
 # Compatible with livekit-agents >= 1.0.x
 
-import os, json, asyncio
+import os, sys, json, time, asyncio
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Callable, Optional, Tuple, Union
+
 from dotenv import load_dotenv
 
-from livekit import agents
-from livekit.agents import Agent, AgentSession, RoomInputOptions
-from livekit.plugins import (
-    openai,
-    deepgram,
-    cartesia,
-    silero,
-    noise_cancellation,
-)
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
+from livekit import agents, rtc
+from livekit.agents import Agent, AgentSession, ChatContext, RoomInputOptions
+
+import model_registry
+import providers
+import recording
+from model_router import ModelRouter
+from multi_voice import MultiVoiceSession
+from session_start import start_sessions
+import tracing
+from startup_profile import timed_import
+from debate_job import DebateJob
+from transcript import DebateTranscript, estimate_tokens
+from utterance_cache import UtteranceCache, cache_key, normalize_topic, synthesize_and_store
+from turn_pipeline import (TurnPrefetcher, generate_text, pipelined_turn, prefetched_turn, reply_turn,
+                           stream_sentences)
+from turn_scheduler import TurnScheduler
 
 load_dotenv()
 
@@ -26,8 +36,54 @@ TTS_MODEL = os.getenv("TTS_MODEL", "sonic-2")
 
 # OpenRouter configuration (optional)
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+OPENROUTER_MODEL = "mistralai/mistral-small-3.2-24b-instruct:free"
 USE_OPENROUTER = os.getenv("USE_OPENROUTER", "false").lower() == "true"
 
+# Model routing (optional): a faster model preferred for intros and summaries,
+# models to fail over / hedge to ("openrouter:<model>" for OpenRouter models),
+# and the default time-to-first-token target (a debate may set its own)
+LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "")
+LLM_FALLBACK_MODELS = [m.strip() for m in os.getenv("LLM_FALLBACK_MODELS", "").split(",") if m.strip()]
+LLM_TARGET_TTFT_MS = float(os.getenv("LLM_TARGET_TTFT_MS", "1500"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "true").lower() == "true"
+
+# Multilingual end-of-turn model (optional, VAD-only turn detection otherwise)
+USE_TURN_DETECTOR = os.getenv("USE_TURN_DETECTOR", "false").lower() == "true"
+
+# Transcribe the human once per room: only the first persona session listens,
+# the others learn what was said from the shared transcript
+STT_COALESCE = os.getenv("STT_COALESCE", "true").lower() == "true"
+
+# "multi" gives every persona its own AgentSession (STT, VAD, noise cancellation,
+# participant); "single" runs one session for the room and voices every persona through it
+SESSION_MODE = os.getenv("SESSION_MODE", "multi")
+
+# Persona sessions are started in parallel, at most this many at a time
+SESSION_START_CONCURRENCY = int(os.getenv("SESSION_START_CONCURRENCY", "3"))
+SESSION_START_TIMEOUT_SEC = float(os.getenv("SESSION_START_TIMEOUT_SEC", "20"))
+
+# "pipelined" streams each sentence to TTS as the LLM produces it,
+# "reply" waits on AgentSession.generate_reply() as before
+TURN_MODE = os.getenv("TURN_MODE", "pipelined")
+
+# Draft the next persona's reply while the current one is speaking
+PREFETCH_NEXT_TURN = os.getenv("PREFETCH_NEXT_TURN", "true").lower() == "true"
+
+# Pause between turns, and how long to let a human finish before the next persona speaks
+TURN_MIN_GAP_SEC = float(os.getenv("TURN_MIN_GAP_SEC", "0.5"))
+TURN_MAX_USER_WAIT_SEC = float(os.getenv("TURN_MAX_USER_WAIT_SEC", "30"))
+
+# Prompt budget per turn: persona prompt + rolling summary + as many recent turns as fit
+DEBATE_CONTEXT_TOKENS = int(os.getenv("DEBATE_CONTEXT_TOKENS", "1500"))
+DEBATE_RECENT_TURNS = int(os.getenv("DEBATE_RECENT_TURNS", "6"))
+
+# On-disk cache of introduction text and synthesized audio, shared across debates
+UTTERANCE_CACHE_DIR = os.getenv("UTTERANCE_CACHE_DIR", str(Path(__file__).parent / ".cache" / "utterances"))
+UTTERANCE_CACHE_MAX_MB = int(os.getenv("UTTERANCE_CACHE_MAX_MB", "256"))
+
+# Record every debate (audio, transcript, turn timings) under RECORDING_DIR for replay
+RECORD_DEBATES = os.getenv("RECORD_DEBATES", "true").lower() == "true"
+
 # Distinct voice IDs for each persona
 VOICES = {
     "AI Socrates": os.getenv("VOICE_SOCRATES", "a2b37e34-0712-44c4-a2c9-222222222222"),
@@ -57,22 +113,373 @@ PERSONAS = {
 # ----------------------------------------------------------------------------
 
 class PersonaAgent(Agent):
-    def __init__(self, name: str, prompt: str):
-        super().__init__(instructions=prompt)
+    def __init__(self, name: str, prompt: str, listens: bool = True, detached: bool = False):
+        # A session adds the instructions to its own agent's chat context. A
+        # detached agent (voiced through another persona's session) never runs
+        # in a session, so it carries the prompt in its chat context itself.
+        chat_ctx = None
+        if detached:
+            chat_ctx = ChatContext.empty()
+            chat_ctx.add_message(role="system", content=prompt)
+        super().__init__(instructions=prompt, chat_ctx=chat_ctx)
         self.name = name
+        self.prompt = prompt
+        self.detached = detached
+        # Whether this persona's session transcribes the human
+        self.listens = listens
+
+    async def tts_node(self, text, model_settings):
+        # Keep a copy of the synthesized speech when the debate is being recorded
+        async for frame in recording.tap(self.name, Agent.default.tts_node(self, text, model_settings)):
+            yield frame
+
+# ----------------------------------------------------------------------------
+# Shared Provider Clients
+# ----------------------------------------------------------------------------
+
+# LLM, STT and TTS clients come from providers, pooled per process and
+# reused by every debate it hosts
+
+def get_llm_plugin():
+    if USE_OPENROUTER and OPENROUTER_API_KEY:
+        return providers.llm(OPENROUTER_MODEL, base_url="https://openrouter.ai/api/v1", api_key=OPENROUTER_API_KEY)
+    return providers.llm(LLM_MODEL)
+
+
+def llm_model_name() -> str:
+    return OPENROUTER_MODEL if USE_OPENROUTER and OPENROUTER_API_KEY else LLM_MODEL
+
+
+def llm_for(spec: str):
+    if spec.startswith("openrouter:"):
+        return providers.llm(spec[len("openrouter:"):], base_url="https://openrouter.ai/api/v1", api_key=OPENROUTER_API_KEY)
+    return providers.llm(spec)
+
+
+_model_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """Router over the primary, fast and fallback models, shared by every debate in this process"""
+    global _model_router
+    if _model_router is None:
+        primary = llm_model_name()
+        models = {primary: get_llm_plugin()}
+        for spec in [LLM_FAST_MODEL] + LLM_FALLBACK_MODELS:
+            if spec and spec not in models:
+                models[spec] = llm_for(spec)
+        fast = [LLM_FAST_MODEL] if LLM_FAST_MODEL else []
+        _model_router = ModelRouter(
+            models,
+            routes={"intro": fast + [primary], "summary": fast + [primary], "turn": [primary]},
+            target_ttft_sec=LLM_TARGET_TTFT_MS / 1000,
+            hedge=LLM_HEDGE,
+        )
+        print(f"LLM routing over {list(models)}")
+    return _model_router
+
+
+async def close_shared_clients():
+    await providers.close()
+
+# ----------------------------------------------------------------------------
+# Persona Sessions
+# ----------------------------------------------------------------------------
+
+def persona_prompt(name: str, topic: str) -> str:
+    prompt = PERSONAS.get(name, f"You are {name}, an AI debater.")
+    # Add topic context to each persona's prompt
+    return f"{prompt}\n\nYou are participating in a debate about: '{topic}'. Stay in character and provide thoughtful, engaging arguments from your unique perspective."
+
+
+def get_persona_tts(name: str):
+    return providers.tts(TTS_MODEL, VOICES.get(name))
+
+
+async def start_persona_session(room: rtc.Room, name: str, topic: str, llm_plugin, listen: bool = True) -> AgentSession:
+    prompt = persona_prompt(name, topic)
+    print(f"Creating session for {name}" + ("" if listen else " (not listening)"))
+    session = AgentSession(
+        stt=providers.stt(STT_MODEL),
+        llm=llm_plugin,
+        tts=get_persona_tts(name),
+        vad=model_registry.get_vad(),
+        turn_detection=model_registry.new_turn_detector() if USE_TURN_DETECTOR else None,
+    )
+    
+    agent = PersonaAgent(name=name, prompt=prompt, listens=listen)
+    try:
+        with tracing.span("session_start", lane=name):
+            await session.start(
+                room=room,
+                agent=agent,
+                room_input_options=RoomInputOptions(
+                    audio_enabled=listen,
+                    noise_cancellation=timed_import("livekit.plugins.noise_cancellation").BVC() if listen else None,
+                ),
+            )
+    except BaseException:
+        # Don't leave a half-started session attached to the room, also when
+        # the start timed out and was cancelled
+        await session.close()
+        raise
+    return session
+
+
+async def start_persona_sessions(room: rtc.Room, personas: list[str], topic: str, llm_plugin) -> list[AgentSession]:
+    """Start every persona session concurrently, dropping the ones that fail or time out"""
+    return await start_sessions(
+        personas,
+        lambda name, listen: start_persona_session(room, name, topic, llm_plugin, listen=listen),
+        concurrency=SESSION_START_CONCURRENCY,
+        timeout_sec=SESSION_START_TIMEOUT_SEC,
+        coalesce_stt=STT_COALESCE,
+    )
+
+
+async def start_multi_voice_session(room: rtc.Room, personas: list[str], topic: str, llm_plugin) -> list:
+    """Start one session for the room and voice every persona through it
+
+    The first persona that starts owns the session (and hears the human); the
+    others only bring their prompt and voice.
+    """
+    started = time.perf_counter()
+    for i, host in enumerate(personas):
+        try:
+            session = await asyncio.wait_for(start_persona_session(room, host, topic, llm_plugin),
+                                             SESSION_START_TIMEOUT_SEC)
+            break
+        except Exception as e:
+            print(f"Session for {host} failed: {e}")
+    else:
+        return []
+    shared = MultiVoiceSession(session)
+    voices = [shared.voice(session.current_agent, session.tts, llm_plugin)]
+    for name in personas[:i] + personas[i + 1:]:
+        agent = PersonaAgent(name=name, prompt=persona_prompt(name, topic), listens=False, detached=True)
+        voices.append(shared.voice(agent, get_persona_tts(name), llm_plugin))
+    print(f"Started one session voicing {len(voices)} personas in {time.perf_counter() - started:.2f}s")
+    return voices
+
+# ----------------------------------------------------------------------------
+# Cached Utterances
+# ----------------------------------------------------------------------------
+
+_utterance_cache: Optional[UtteranceCache] = None
+
+
+def get_utterance_cache() -> UtteranceCache:
+    global _utterance_cache
+    if _utterance_cache is None:
+        _utterance_cache = UtteranceCache(UTTERANCE_CACHE_DIR, max_bytes=UTTERANCE_CACHE_MAX_MB * 1024 * 1024)
+    return _utterance_cache
+
+
+async def replay_frames(sample_rate: int, num_channels: int, pcm: bytes, frame_ms: int = 20) -> AsyncIterator[rtc.AudioFrame]:
+    samples = sample_rate * frame_ms // 1000
+    step = samples * num_channels * 2  # int16
+    for offset in range(0, len(pcm), step):
+        chunk = pcm[offset:offset + step]
+        yield rtc.AudioFrame(
+            data=chunk,
+            sample_rate=sample_rate,
+            num_channels=num_channels,
+            samples_per_channel=len(chunk) // (num_channels * 2),
+        )
+
+
+async def _drain(spoken: asyncio.Queue) -> AsyncIterator[str]:
+    while (sentence := await spoken.get()) is not None:
+        yield sentence
+
+
+async def _once(text: str) -> AsyncIterator[str]:
+    yield text
+
+
+async def cached_say(session: AgentSession, text: Union[str, AsyncIterable[str]], voice: Optional[str]):
+    """Say ``text``, replaying stored audio if this voice has said it before
+
+    ``text`` can also be streamed sentences (an LLM reply): each is synthesized
+    as it arrives and the audio is stored under the complete text.
+    """
+    cache = get_utterance_cache()
+    audio_key = lambda full_text: cache_key("audio", TTS_MODEL, voice, full_text)
+    if isinstance(text, str):
+        cached = await cache.get_audio(audio_key(text))
+        if cached:
+            audio = replay_frames(*cached)
+        else:
+            audio = synthesize_and_store(session.tts, _once(text), cache, audio_key)
+    else:
+        spoken: asyncio.Queue = asyncio.Queue()
+        audio = synthesize_and_store(session.tts, text, cache, audio_key, spoken)
+        text = _drain(spoken)
+    # Pre-rendered audio bypasses the agent's TTS node, so it is recorded here
+    await session.say(text, audio=recording.tap(session.current_agent.name, audio))
+
+
+async def introduce(session: AgentSession, llm, topic: str):
+    """Introduce a persona, reusing the intro text and audio from earlier debates on the same topic"""
+    agent = session.current_agent
+    cache = get_utterance_cache()
+    key = cache_key("intro", agent.name, VOICES.get(agent.name), llm.model, normalize_topic(topic))
+    text = await cache.get_text(key)
+    if text is None:
+        chat_ctx = agent.chat_ctx.copy()
+        chat_ctx.add_message(
+            role="user",
+            content=f"Introduce yourself as {agent.name} and briefly state your perspective on the debate topic: '{topic}'.",
+        )
+
+        async def sentences():
+            # Spoken as the LLM streams it; the text is cached once complete
+            said = []
+            async for sentence in stream_sentences(llm, chat_ctx):
+                said.append(sentence)
+                yield sentence
+            if said:
+                await cache.put_text(key, " ".join(said))
+
+        text = sentences()
+    with tracing.span("intro_say", lane=agent.name):
+        await cached_say(session, text, VOICES.get(agent.name))
+
+# ----------------------------------------------------------------------------
+# Shared Transcript
+# ----------------------------------------------------------------------------
+
+def transcript_summarizer(llm):
+    """Fold older debate turns into a short running summary with the LLM"""
+    async def summarize(text: str) -> str:
+        chat_ctx = ChatContext.empty()
+        chat_ctx.add_message(
+            role="system",
+            content="Condense these notes from a debate into under 120 words. Keep who argued what.",
+        )
+        chat_ctx.add_message(role="user", content=text)
+        return await generate_text(llm, chat_ctx)
+    return summarize
+
+
+def listener(sessions: list[AgentSession]) -> AgentSession:
+    """The session that transcribes the human for the whole room"""
+    return next((s for s in sessions if s.current_agent.listens), sessions[0])
+
+
+def record_into_transcript(sessions: list[AgentSession], transcript: DebateTranscript, state: dict,
+                           recorder: Optional[recording.DebateRecorder] = None,
+                           on_event: Optional[Callable[[dict], None]] = None):
+    """Feed every persona's speech, and the human's (heard once), into the shared transcript
+
+    Each line also goes to the recording and is reported as a ``transcript`` event.
+    """
+    human_source = listener(sessions)
+    for s in sessions:
+        def on_conversation_item(ev, persona=s.current_agent.name, hears_human=(s is human_source)):
+            text = ev.item.text_content
+            if not text:
+                return
+            if ev.item.role == "assistant":
+                speaker = persona
+                # The turn is in the transcript now, as actually spoken
+                if state.get("pending") and state["pending"][0] == persona:
+                    state["pending"] = None
+            elif ev.item.role == "user" and hears_human:
+                speaker = "Human"
+            else:
+                return
+            transcript.add(speaker, text, state["round"])
+            if recorder:
+                recorder.add_text(speaker, text, state["round"])
+            if on_event:
+                on_event({"type": "transcript", "persona": speaker, "text": text, "round": state["round"]})
+
+        s.on("conversation_item_added", on_conversation_item)
+
+
+def share_barge_in(sessions: list[AgentSession]):
+    """Stop whichever persona is talking when the human starts speaking
+
+    Sessions that don't listen can't detect the human themselves, so the
+    listening session's voice activity interrupts them.
+    """
+    if all(s.current_agent.listens for s in sessions):
+        return
+    human_source = listener(sessions)
+
+    def on_user_state(ev):
+        if ev.new_state != "speaking":
+            return
+        for s in sessions:
+            if s is not human_source and s.agent_state == "speaking":
+                s.interrupt()
+
+    human_source.on("user_state_changed", on_user_state)
+
+
+def report_stt_latency(sessions: list[AgentSession], on_event: Callable[[dict], None]):
+    """Report how long each persona's STT took to finalize the human's speech"""
+    for s in sessions:
+        def on_metrics(ev, persona=s.current_agent.name):
+            delay = getattr(ev.metrics, "transcription_delay", None)
+            if delay is not None and delay >= 0:
+                on_event({
+                    "type": "stt",
+                    "persona": persona,
+                    "transcription_delay_sec": round(delay, 3),
+                    "end_of_utterance_delay_sec": round(getattr(ev.metrics, "end_of_utterance_delay", 0.0), 3),
+                })
+
+        s.on("metrics_collected", on_metrics)
+
+
+async def apply_debate_context(session: AgentSession, transcript: DebateTranscript,
+                               pending: Optional[Tuple[str, str]] = None) -> int:
+    """Replace the persona's chat history with the budgeted shared context, returning its token count
+
+    ``pending`` is the (persona, text) of a turn still playing out, not yet in the transcript.
+    """
+    agent = session.current_agent
+    # No session re-inserts a detached agent's instructions, so they stay in its context
+    messages, tokens = transcript.context_messages(agent.name, reserved_tokens=estimate_tokens(agent.prompt),
+                                                   prompt=agent.prompt if agent.detached else None,
+                                                   pending=pending)
+    chat_ctx = ChatContext.empty()
+    for message in messages:
+        chat_ctx.add_message(role=message["role"], content=message["content"])
+    # A session's own agent gets its instructions re-inserted by the session on update
+    await agent.update_chat_ctx(chat_ctx)
+    return tokens
 
 # ----------------------------------------------------------------------------
 # Entrypoint Function
 # ----------------------------------------------------------------------------
 
-async def entrypoint(ctx: agents.JobContext):
-    # 1️⃣ Metadata injected by the FastAPI backend
-    meta = json.loads(os.getenv("ROOM_METADATA", "{}"))
-    topic = meta.get("topic", "AI Debate")
-    personas = meta.get("personas", ["AI Socrates", "AI Einstein", "AI Trump"])
-    room_name = meta.get("room", ctx.room)
-    turn_duration_min = meta.get("turn_duration_min", 3)
-    total_rounds = meta.get("total_rounds", 4)
+async def run_debate(room: rtc.Room, job: DebateJob, on_event: Optional[Callable[[dict], None]] = None):
+    """Run a full debate (or replay a recorded one) in an already connected room"""
+    if job.replay:
+        await replay_debate(room, job.replay, on_event)
+        return
+    # Started before the sessions, so the speech tasks they spawn see the recorder
+    recorder = recording.start_recording(job.room, {"topic": job.topic, "personas": job.personas}) if RECORD_DEBATES else None
+    try:
+        await run_live_debate(room, job, on_event, recorder)
+    finally:
+        if recorder:
+            await recorder.close()
+            print(f"Debate recorded as {recorder.id}")
+
+
+async def run_live_debate(room: rtc.Room, job: DebateJob, on_event: Optional[Callable[[dict], None]] = None,
+                          recorder: Optional[recording.DebateRecorder] = None):
+    """Run a full debate, reporting turn and STT events to ``on_event``"""
+    # 1️⃣ Configuration dispatched with this room by the FastAPI backend
+    topic = job.topic
+    personas = job.personas
+    room_name = job.room
+    turn_duration_min = job.turn_duration_min
+    total_rounds = job.total_rounds
     
     # Convert minutes to seconds
     turn_duration_sec = turn_duration_min * 60
@@ -80,86 +487,240 @@ async def entrypoint(ctx: agents.JobContext):
     print(f"Starting debate in room: {room_name}")
     print(f"Topic: {topic}")
     print(f"Personas: {personas}")
-    print(f"Turn duration: {turn_duration_min} minutes ({turn_duration_sec} seconds)")
+    print(f"Turn duration: up to {turn_duration_min} minutes ({turn_duration_sec} seconds)")
     print(f"Total rounds: {total_rounds}")
     
-    # 2️⃣ Configure LLM plugin
-    if USE_OPENROUTER and OPENROUTER_API_KEY:
-        llm_plugin = openai.LLM(
-            model="mistralai/mistral-small-3.2-24b-instruct:free",
-            base_url="https://openrouter.ai/api/v1",
-            api_key=OPENROUTER_API_KEY
-        )
-        print("Using OpenRouter LLM")
-    else:
-        llm_plugin = openai.LLM(model=LLM_MODEL)
-        print(f"Using OpenAI LLM: {LLM_MODEL}")
-
-    # 3️⃣ Create sessions for each persona (up to 3 agents)
-    sessions = []
-    for name in personas[:3]:  # Limit to 3 agents
-        prompt = PERSONAS.get(name, f"You are {name}, an AI debater.")
-        
-        # Add topic context to each persona's prompt
-        prompt = f"{prompt}\n\nYou are participating in a debate about: '{topic}'. Stay in character and provide thoughtful, engaging arguments from your unique perspective."
-        
-        print(f"Creating session for {name}")
-        session = AgentSession(
-            stt=deepgram.STT(model=STT_MODEL, language="multi"),
-            llm=llm_plugin,
-            tts=cartesia.TTS(model=TTS_MODEL, voice=VOICES.get(name)),
-            vad=silero.VAD.load(),
-            #turn_detection=MultilingualModel(),
-        )
-        
-        agent = PersonaAgent(name=name, prompt=prompt)
-        await session.start(
-            room=room_name,
-            agent=agent,
-            room_input_options=RoomInputOptions(
-                noise_cancellation=noise_cancellation.BVC()
-            ),
-        )
-        sessions.append(session)
-        print(f"Session created for {name}")
+    # 2️⃣ LLM plugin shared with any other debate in this process; intros, turns
+    # and summaries are routed per call under this debate's TTFT target
+    llm_plugin = get_llm_plugin()
+    router = get_model_router()
+    target_ttft_sec = job.target_ttft_ms / 1000 if job.target_ttft_ms else None
+    intro_llm = router.route("intro", target_ttft_sec)
+    turn_llm = router.route("turn", target_ttft_sec)
+
+    # 3️⃣ Create sessions for each persona (up to 3 agents), in parallel
+    with tracing.span("start_sessions", personas=len(personas), mode=SESSION_MODE):
+        if SESSION_MODE == "single":
+            sessions = await start_multi_voice_session(room, personas, topic, llm_plugin)
+        else:
+            sessions = await start_persona_sessions(room, personas, topic, llm_plugin)
+    if not sessions:
+        raise RuntimeError(f"No persona session could be started in room {room_name}")
+
+    # Everything said in the room goes into one transcript shared by the personas
+    transcript = DebateTranscript(
+        topic,
+        budget_tokens=DEBATE_CONTEXT_TOKENS,
+        keep_recent=DEBATE_RECENT_TURNS,
+        summarize=transcript_summarizer(router.route("summary")),
+    )
+    prefetcher = None
+    # Draft of the next speaker's reply being prepared: context update, then prefetch
+    drafting: Optional[asyncio.Task] = None
+    try:
+        # "pending": (persona, text) of the turn playing out, once its text is final
+        transcript_state = {"round": 0, "pending": None}
+        record_into_transcript(sessions, transcript, transcript_state, recorder, on_event)
+        share_barge_in(sessions)
+
+        # 4️⃣ Media connected – let each AI introduce themselves
+        print("Starting introductions...")
+    
+        intro_tasks = [introduce(s, intro_llm, topic) for s in sessions]
+        await asyncio.gather(*intro_tasks)
+        print(f"Introductions complete! Utterance cache: {get_utterance_cache().stats()}")
 
-    # 4️⃣ Media connected – let each AI introduce themselves
-    print("Connecting to room...")
-    await ctx.connect()
-    print("Connected! Starting introductions...")
+        # 5️⃣ Round‑robin debate
+        print(f"Starting debate with {total_rounds} rounds...")
+        turn_index = 0
+        round_counter = 0
+
+        prefetcher = TurnPrefetcher(turn_llm) if PREFETCH_NEXT_TURN and len(sessions) > 1 else None
+        if prefetcher:
+            # A human interjection makes every drafted reply stale; regenerate
+            # them once the listening session has transcribed it into the transcript
+            async def redraft():
+                for persona, session in prefetcher.pending().items():
+                    await apply_debate_context(session, transcript, transcript_state["pending"])
+                    prefetcher.invalidate(persona)
+
+            async def draft_reply(session) -> int:
+                """Draft ``session``'s reply to everything said so far, including the turn playing out"""
+                tokens = await apply_debate_context(session, transcript, transcript_state["pending"])
+                prefetcher.prefetch(session, session.current_agent.name)
+                return tokens
+
+            def on_conversation_item(ev):
+                if ev.item.role == "user":
+                    asyncio.create_task(redraft())
+
+            listener(sessions).on("conversation_item_added", on_conversation_item)
     
-    intro_tasks = [
-        s.generate_reply(instructions=f"Introduce yourself as {s.agent.name} and briefly state your perspective on the debate topic: '{topic}'.")
-        for s in sessions
-    ]
-    await asyncio.gather(*intro_tasks)
-    print("Introductions complete!")
-
-    # 5️⃣ Round‑robin debate
-    print(f"Starting debate with {total_rounds} rounds...")
-    turn_index = 0
-    round_counter = 0
+        scheduler = TurnScheduler(turn_duration_sec, TURN_MIN_GAP_SEC, TURN_MAX_USER_WAIT_SEC)
+        scheduler.listeners.append(lambda event: print(f"Turn event: {event}"))
+        if on_event:
+            scheduler.listeners.append(on_event)
+            report_stt_latency(sessions, on_event)
+        if recorder:
+            scheduler.listeners.append(recorder.add_event)
+        for s in sessions:
+            scheduler.watch(s)
     
-    while round_counter < total_rounds:
-        speaker = sessions[turn_index]
-        print(f"Round {round_counter + 1}, Turn {turn_index + 1}: {speaker.agent.name}")
-        await speaker.generate_reply()
-        await asyncio.sleep(turn_duration_sec)
-        turn_index = (turn_index + 1) % len(sessions)
-        if turn_index == 0:
-            round_counter += 1
-
-    # 6️⃣ Graceful shutdown
-    print("Debate complete! Shutting down...")
-    for s in sessions:
-        await s.close()
-    print("All sessions closed.")
+        while round_counter < total_rounds:
+            speaker = sessions[turn_index]
+            name = speaker.current_agent.name
+            transcript_state["round"] = round_counter + 1
+            if recorder:
+                recorder.round = round_counter + 1
+            print(f"Round {round_counter + 1}, Turn {turn_index + 1}: {name}")
+
+            draft = None
+            if drafting:
+                prompt_tokens = await drafting
+                drafting = None
+                draft = await prefetcher.take(name)
+            if not draft:
+                prompt_tokens = await apply_debate_context(speaker, transcript)
+            next_index = (turn_index + 1) % len(sessions)
+            last_turn = next_index == 0 and round_counter + 1 >= total_rounds
+            next_speaker = sessions[next_index]
+
+            def on_text(text: str):
+                # This turn's text is final while its audio still plays: draft the reply to it now
+                nonlocal drafting
+                transcript_state["pending"] = (name, text)
+                if prefetcher and not last_turn and drafting is None:
+                    drafting = asyncio.create_task(draft_reply(next_speaker))
+
+            if draft:
+                speak = lambda: prefetched_turn(speaker, draft, name, round_counter + 1, on_text,
+                                                say=lambda s, text: cached_say(s, text, VOICES.get(name)))
+            elif TURN_MODE == "pipelined":
+                speak = lambda: pipelined_turn(speaker, turn_llm, name, round_counter + 1, on_text)
+            else:
+                speak = lambda: reply_turn(speaker, name, round_counter + 1)
+            scheduler.emit({"type": "turn_start", "persona": name, "round": round_counter + 1,
+                            "total_rounds": total_rounds})
+            # The turn ends when its speech has played out; turn_duration is only an upper bound
+            timings = await scheduler.run_turn(speaker, speak)
+            transcript_state["pending"] = None
+            timings.prompt_tokens = prompt_tokens
+            tracing.record_turn(timings)
+            if prefetcher:
+                prefetcher.record_gap(timings)
+                if not last_turn and drafting is None:
+                    # No final text before the turn ended (generate_reply, or interrupted):
+                    # draft from the transcript, which now has the turn
+                    drafting = asyncio.create_task(draft_reply(next_speaker))
+            print(f"Turn timings: {timings.summary()}")
+            with tracing.span("gap", round=round_counter + 1):
+                await scheduler.wait_for_next_turn()
+            turn_index = (turn_index + 1) % len(sessions)
+            if turn_index == 0:
+                round_counter += 1
+        print("Debate complete! Shutting down...")
+    finally:
+        # 6️⃣ Graceful shutdown, also when the debate is cancelled or times out
+        if drafting:
+            drafting.cancel()
+        if prefetcher:
+            prefetcher.close()
+            print(f"Prefetch stats: {prefetcher.stats()}")
+        transcript.close()
+        for s in sessions:
+            await s.close()
+        print("All sessions closed.")
+
+
+async def replay_debate(room: rtc.Room, recording_id: str, on_event: Optional[Callable[[dict], None]] = None):
+    """Publish a recorded debate into the room: its audio on one track and each line's text as data"""
+    rec = recording.open_recording(recording_id)
+    if rec is None:
+        raise RuntimeError(f"No recording {recording_id}")
+    with rec:
+        if not rec.segments:
+            print(f"Recording {recording_id} has no audio")
+            return
+        first = rec.segments[0]
+        source = rtc.AudioSource(first["sample_rate"], first["channels"])
+        track = rtc.LocalAudioTrack.create_audio_track("debate-replay", source)
+        await room.local_participant.publish_track(
+            track, rtc.TrackPublishOptions(source=rtc.TrackSource.SOURCE_MICROPHONE)
+        )
+
+        async def play(pcm: bytes, sample_rate: int, channels: int):
+            await source.capture_frame(rtc.AudioFrame(
+                data=pcm, sample_rate=sample_rate, num_channels=channels,
+                samples_per_channel=len(pcm) // (channels * 2),
+            ))
+
+        async def on_segment(segment: dict, line: Optional[dict]):
+            print(f"Replaying {segment['persona']} (round {segment['round']})")
+            if on_event:
+                on_event({"type": "turn_start", "persona": segment["persona"], "round": segment["round"]})
+                if line:
+                    on_event({"type": "transcript", "persona": line["persona"], "text": line["text"], "round": line["round"]})
+            if line:
+                await room.local_participant.publish_data(
+                    json.dumps({"type": "transcript", **line}), topic="transcript"
+                )
+
+        print(f"Replaying recording {recording_id}: {rec.summary()}")
+        await rec.replay(play, on_segment)
+        await source.wait_for_playout()
+        await source.aclose()
+    print("Replay complete!")
+
+
+def prewarm(proc: agents.JobProcess = None):
+    """Import the plugins and load the shared models before the process takes its first debate"""
+    providers.import_plugins()
+    timed_import("livekit.plugins.noise_cancellation")
+    model_registry.load_models(turn_detector=USE_TURN_DETECTOR)
+
+
+async def entrypoint(ctx: agents.JobContext):
+    timeline = tracing.start_timeline(ctx.job.room.name, run_id=ctx.job.id)
+    try:
+        print("Connecting to room...")
+        with tracing.span("connect"):
+            await ctx.connect()
+        print("Connected!")
+        # Explicit dispatch metadata wins over whatever is attached to the room
+        job = DebateJob.from_metadata(ctx.job.metadata or ctx.room.metadata, room=ctx.room.name)
+        await run_debate(ctx.room, job)
+    finally:
+        timeline.close()
 
 # ----------------------------------------------------------------------------
 # Main execution
 # ----------------------------------------------------------------------------
 
+async def replay_to_room(recording_id: str, room_name: str):
+    """Join ``room_name`` directly and replay a recording into it (no provider calls)"""
+    from tokens import TokenCache
+
+    token = TokenCache(os.getenv("LIVEKIT_API_KEY", "devkey"), os.getenv("LIVEKIT_API_SECRET", "secret")).issue(
+        room_name, f"replay-{room_name}", can_publish=True, can_subscribe=False
+    )
+    room = rtc.Room()
+    await room.connect(os.getenv("LIVEKIT_URL", "ws://localhost:7880"), token)
+    try:
+        await replay_debate(room, recording_id)
+    finally:
+        await room.disconnect()
+
+
 if __name__ == "__main__":
-    agents.cli.run_app(
-        agents.WorkerOptions(entrypoint_fnc=entrypoint)
-    ) 
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "replay":
+        # python debate_agent.py replay <recording id> --room <room>
+        import argparse
+        parser = argparse.ArgumentParser(prog="debate_agent.py replay")
+        parser.add_argument("recording")
+        parser.add_argument("--room", required=True)
+        args = parser.parse_args(sys.argv[2:])
+        asyncio.run(replay_to_room(args.recording, args.room))
+    else:
+        agents.cli.run_app(
+            agents.WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm)
+        ) 
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""
+Per-room debate configuration.
+
+A DebateJob travels with the room assignment itself (pool message or LiveKit
+job metadata), so concurrent rooms never share configuration through process
+globals such as environment variables.
+"""
+
+import json
+from dataclasses import dataclass, field, asdict
+from typing import Optional, Union
+
+DEFAULT_PERSONAS = ["AI Socrates", "AI Einstein", "AI Trump"]
+# Personas a debate runs; extra ones are dropped
+MAX_PERSONAS = 3
+
+# Frontend persona IDs -> backend persona names
+PERSONA_IDS = {
+    "socrates": "AI Socrates",
+    "einstein": "AI Einstein",
+    "trump": "AI Trump",
+    "shakespeare": "AI Shakespeare",
+    "tesla": "AI Tesla",
+    "churchill": "AI Churchill",
+    "gandhi": "AI Gandhi",
+    "jobs": "AI Steve Jobs",
+}
+
+
+def map_personas(ids: list[str]) -> list[str]:
+    """Backend names for frontend persona IDs; unknown entries pass through unchanged"""
+    return [PERSONA_IDS.get(p, p) for p in ids]
+
+
+@dataclass
+class DebateJob:
+    room: str
+    topic: str = "AI Debate"
+    personas: list[str] = field(default_factory=lambda: list(DEFAULT_PERSONAS))
+    turn_duration_min: float = 3
+    total_rounds: int = 4
+    # Time-to-first-token target for this debate's LLM calls (None: the agent's default)
+    target_ttft_ms: Optional[float] = None
+    # Recording to replay into the room instead of running a live debate
+    replay: Optional[str] = None
+
+    def __post_init__(self):
+        # The personas the agent will actually run, so the registry and admission see the same ones
+        self.personas = list(self.personas or DEFAULT_PERSONAS)[:MAX_PERSONAS]
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def to_metadata(self) -> str:
+        """Serialise for LiveKit job/room metadata"""
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_dict(cls, data: dict, room: Optional[str] = None) -> "DebateJob":
+        return cls(
+            room=data.get("room") or room or "main",
+            topic=data.get("topic") or "AI Debate",
+            personas=list(data.get("personas") or DEFAULT_PERSONAS),
+            turn_duration_min=data.get("turn_duration_min", 3),
+            total_rounds=data.get("total_rounds", 4),
+            target_ttft_ms=data.get("target_ttft_ms"),
+            replay=data.get("replay"),
+        )
+
+    @classmethod
+    def from_metadata(cls, metadata: Union[str, dict, None], room: Optional[str] = None) -> "DebateJob":
+        """Parse job metadata, falling back to defaults for anything missing"""
+        if isinstance(metadata, str):
+            try:
+                metadata = json.loads(metadata) if metadata else {}
+            except json.JSONDecodeError:
+                metadata = {}
+        return cls.from_dict(metadata or {}, room=room)
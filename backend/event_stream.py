@@ -0,0 +1,138 @@
+"""
+Live debate events, fanned out to viewers.
+
+Each room has one bounded buffer of recent events shared by all of its
+subscribers. An event is serialized once, when it is published, and every
+subscriber only keeps a cursor into the buffer, so a debate with thousands of
+viewers costs one buffer, not thousands of queues. A subscriber that falls so
+far behind that the buffer wraps past its cursor is dropped (it can reconnect
+and resume from the oldest event still buffered).
+
+Events are delivered as Server-Sent Events; the sequence number is the SSE
+``id``, so a reconnecting client resumes with ``Last-Event-ID``.
+"""
+
+import json, time, asyncio
+from collections import deque
+from typing import AsyncIterator, Dict, Optional
+
+
+class SlowConsumer(Exception):
+    """The subscriber's cursor was overwritten before it was read"""
+
+
+def format_sse(seq: int, event: dict) -> str:
+    return f"id: {seq}\nevent: {event.get('type', 'message')}\ndata: {json.dumps(event)}\n\n"
+
+
+class RoomStream:
+    def __init__(self, room: str, size: int = 256):
+        self.room = room
+        # (seq, formatted SSE message) of the most recent events
+        self.events: deque = deque(maxlen=size)
+        self.next_seq = 0
+        self.closed = False
+        self.closed_at: Optional[float] = None
+        self.subscribers = 0
+        self.dropped = 0
+        self._wakeup = asyncio.Event()
+
+    @property
+    def oldest_seq(self) -> int:
+        return self.next_seq - len(self.events)
+
+    def _notify(self):
+        # Wake every waiting subscriber at once; later waits use a fresh event
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    def publish(self, event: dict) -> int:
+        seq = self.next_seq
+        self.events.append((seq, format_sse(seq, event)))
+        self.next_seq += 1
+        self._notify()
+        return seq
+
+    def close(self):
+        """No more events; subscribers end once they have read the buffer"""
+        if not self.closed:
+            self.closed = True
+            self.closed_at = time.monotonic()
+            self._notify()
+
+    async def subscribe(self, after: Optional[int] = None, heartbeat_sec: Optional[float] = None) -> AsyncIterator[Optional[str]]:
+        """Buffered events after ``after`` (all buffered ones if None), then live ones
+
+        Yields None when nothing was published for ``heartbeat_sec``, so the
+        caller can keep the connection alive. Raises SlowConsumer when the
+        subscriber fell behind the buffer.
+        """
+        cursor = self.oldest_seq if after is None else max(after + 1, self.oldest_seq)
+        self.subscribers += 1
+        try:
+            while True:
+                if cursor < self.oldest_seq:
+                    self.dropped += 1
+                    raise SlowConsumer(f"fell {self.next_seq - cursor} events behind in room {self.room}")
+                if cursor < self.next_seq:
+                    yield self.events[cursor - self.oldest_seq][1]
+                    cursor += 1
+                    continue
+                if self.closed:
+                    return
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), heartbeat_sec)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self.subscribers -= 1
+
+
+class EventHub:
+    """Event streams of every room on this API worker"""
+
+    def __init__(self, buffer_size: int = 256):
+        self.buffer_size = buffer_size
+        self.rooms: Dict[str, RoomStream] = {}
+
+    def stream(self, room: str) -> RoomStream:
+        stream = self.rooms.get(room)
+        if stream is None:
+            stream = self.rooms[room] = RoomStream(room, self.buffer_size)
+        return stream
+
+    def publish(self, room: str, event: dict, create: bool = True) -> Optional[int]:
+        """Publish to the room's stream; with create=False, drop events for rooms without one"""
+        if not create and room not in self.rooms:
+            return None
+        return self.stream(room).publish(event)
+
+    def close(self, room: str):
+        stream = self.rooms.get(room)
+        if stream:
+            stream.close()
+
+    def discard(self, room: str):
+        """Forget a room's stream; current subscribers still finish reading it"""
+        stream = self.rooms.pop(room, None)
+        if stream:
+            stream.close()
+
+    async def sse(self, room: str, last_event_id: Optional[str] = None,
+                  heartbeat_sec: Optional[float] = 15.0) -> AsyncIterator[str]:
+        """A room's events as SSE messages, resuming after ``last_event_id``"""
+        stream = self.stream(room)
+        after = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+        try:
+            async for message in stream.subscribe(after, heartbeat_sec):
+                yield message if message is not None else ": keepalive\n\n"
+        except SlowConsumer as e:
+            print(f"Dropping slow event subscriber: {e}")
+            yield f"event: dropped\ndata: {json.dumps({'reason': 'slow_consumer'})}\n\n"
+
+    def stats(self) -> dict:
+        return {
+            "rooms": len(self.rooms),
+            "subscribers": sum(s.subscribers for s in self.rooms.values()),
+            "dropped": sum(s.dropped for s in self.rooms.values()),
+        }
@@ -1,15 +1,26 @@
-import os, asyncio, uuid, json
-from datetime import datetime, timedelta
-from typing import Dict
+import os, math, time, fcntl, asyncio, uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
 
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel, ConfigDict, Field
+from livekit import api as livekit_api
 
-import jwt
-import time
+import metrics
+import recording
+import tracing
+from admission import AdmissionController, parse_budgets
+from agent_pool import AgentWorkerPool
+from debate_job import DebateJob, map_personas
+from event_stream import EventHub
+from room_registry import make_registry
+from tokens import TokenCache
 
 # ----------------------------------------------------------------------------
 # ENV ‑ set these in Replit "Secrets" or a local .env file
@@ -18,8 +29,113 @@ LIVEKIT_URL   = os.getenv("LIVEKIT_URL", "wss://your-livekit-host:443")
 API_KEY       = os.getenv("LIVEKIT_API_KEY", "devkey")
 API_SECRET    = os.getenv("LIVEKIT_API_SECRET", "secret")
 
+# Access tokens are reused for the same room/identity until this close to expiry
+TOKEN_TTL_SEC             = int(os.getenv("TOKEN_TTL_SEC", str(2 * 3600)))
+TOKEN_REFRESH_MARGIN_SEC  = int(os.getenv("TOKEN_REFRESH_MARGIN_SEC", "600"))
+MAX_BATCH_JOIN            = int(os.getenv("MAX_BATCH_JOIN", "1000"))
+
+# Warm agent worker pool
+AGENT_POOL_SIZE              = int(os.getenv("AGENT_POOL_SIZE", "2"))
+AGENT_DEBATES_PER_WORKER     = int(os.getenv("AGENT_DEBATES_PER_WORKER", "4"))
+AGENT_MAX_DEBATES_PER_WORKER = int(os.getenv("AGENT_MAX_DEBATES_PER_WORKER", "20"))
+AGENT_HEALTH_INTERVAL_SEC    = float(os.getenv("AGENT_HEALTH_INTERVAL_SEC", "10"))
+AGENT_HEALTH_TIMEOUT_SEC     = float(os.getenv("AGENT_HEALTH_TIMEOUT_SEC", "5"))
+# Wall-clock limit per debate; 0 disables it
+AGENT_MAX_DEBATE_SEC         = float(os.getenv("AGENT_MAX_DEBATE_SEC", str(2 * 3600)))
+
+# Admission control: debates this node runs at once, rooms that may wait for a
+# slot, and per-provider concurrent stream budgets (e.g. "llm=40,stt=30,tts=30")
+MAX_CONCURRENT_DEBATES       = int(os.getenv("MAX_CONCURRENT_DEBATES", str(AGENT_POOL_SIZE * AGENT_DEBATES_PER_WORKER)))
+MAX_PENDING_DEBATES          = int(os.getenv("MAX_PENDING_DEBATES", "20"))
+PROVIDER_BUDGETS             = parse_budgets(os.getenv("PROVIDER_BUDGETS", ""))
+EXPECTED_DEBATE_SEC          = float(os.getenv("EXPECTED_DEBATE_SEC", "600"))
+# Matches the agents' setting: one STT stream per room rather than per persona
+STT_COALESCE                 = os.getenv("STT_COALESCE", "true").lower() == "true"
+
+# The agent pool, admission control and live event streams live in the API
+# process, so a deployment runs exactly one; a second one fails at startup
+# because it can't take this lock
+API_LOCK_FILE                = os.getenv("API_LOCK_FILE", str(Path(__file__).parent / ".cache" / "api.lock"))
+
+# Room registry: "memory", or "sqlite:///rooms.db" to keep rooms across API restarts
+ROOM_REGISTRY                = os.getenv("ROOM_REGISTRY", "memory")
+ROOM_TTL_SEC                 = float(os.getenv("ROOM_TTL_SEC", str(4 * 3600)))
+ENDED_ROOM_RETENTION_SEC     = float(os.getenv("ENDED_ROOM_RETENTION_SEC", "300"))
+ROOM_CLEANUP_INTERVAL_SEC    = float(os.getenv("ROOM_CLEANUP_INTERVAL_SEC", "60"))
+# Debate recordings and timelines older than this are deleted by the cleanup loop (0 keeps them forever)
+RECORDING_RETENTION_DAYS     = float(os.getenv("RECORDING_RETENTION_DAYS", "7"))
+
+# Live event stream: recent events kept per room (subscribers further behind
+# are dropped) and the keep-alive interval of idle connections
+EVENT_BUFFER_SIZE            = int(os.getenv("EVENT_BUFFER_SIZE", "256"))
+EVENT_HEARTBEAT_SEC          = float(os.getenv("EVENT_HEARTBEAT_SEC", "15"))
+# Agent events forwarded to viewers
+STREAMED_EVENTS = {"turn_start", "turn_end", "transcript"}
+
 # Registry of active rooms
-rooms: Dict[str, dict] = {}
+rooms = make_registry(ROOM_REGISTRY)
+
+admission = AdmissionController(
+    max_debates=MAX_CONCURRENT_DEBATES,
+    max_pending=MAX_PENDING_DEBATES,
+    provider_budgets=PROVIDER_BUDGETS,
+    avg_debate_sec=EXPECTED_DEBATE_SEC,
+    coalesce_stt=STT_COALESCE,
+)
+
+
+events = EventHub(buffer_size=EVENT_BUFFER_SIZE)
+
+
+def finish_events(room: str, status: str, error: Optional[str] = None):
+    """Tell the room's viewers the debate is over and end their streams"""
+    if room in events.rooms and not events.rooms[room].closed:
+        events.publish(room, {"type": "debate_finished", "status": status, "error": error})
+        events.close(room)
+
+
+async def registry_call(method, *args, **kwargs):
+    """Call the room registry, off the event loop when its backend blocks (SQLite)"""
+    if rooms.blocking:
+        return await asyncio.to_thread(method, *args, **kwargs)
+    return method(*args, **kwargs)
+
+
+# Registry writes started from synchronous callbacks, kept referenced until done
+_registry_writes: set = set()
+
+
+def registry_write(method, *args, **kwargs):
+    task = asyncio.create_task(registry_call(method, *args, **kwargs))
+    _registry_writes.add(task)
+    task.add_done_callback(_registry_writes.discard)
+
+
+def on_room_ended(room: str, status: str, error: Optional[str]):
+    registry_write(rooms.mark_ended, room, status=status)
+    admission.release(room)
+    finish_events(room, status, error)
+    metrics.DEBATE_OUTCOMES.inc(status=status)
+    if status == "failed":
+        metrics.AGENT_FAILURES.inc()
+
+
+def on_agent_event(room: Optional[str], event: dict):
+    metrics.observe_agent_event(room, event)
+    if room and event.get("type") in STREAMED_EVENTS:
+        events.publish(room, event, create=False)
+
+
+agent_pool = AgentWorkerPool(
+    size=AGENT_POOL_SIZE,
+    capacity=AGENT_DEBATES_PER_WORKER,
+    max_debates_per_worker=AGENT_MAX_DEBATES_PER_WORKER,
+    health_interval=AGENT_HEALTH_INTERVAL_SEC,
+    health_timeout=AGENT_HEALTH_TIMEOUT_SEC,
+    max_debate_sec=AGENT_MAX_DEBATE_SEC,
+    on_room_ended=on_room_ended,
+    on_event=on_agent_event,
+)
 
 # ----------------------------------------------------------------------------
 # FastAPI boilerplate ‑ the front‑end fetches /join to receive URL + token
@@ -34,114 +150,328 @@ app.add_middleware(
 )
 
 
+async def cleanup_rooms_periodically():
+    while True:
+        await asyncio.sleep(ROOM_CLEANUP_INTERVAL_SEC)
+        try:
+            removed = await registry_call(rooms.cleanup, ENDED_ROOM_RETENTION_SEC)
+            if removed:
+                print(f"Cleaned up rooms: {removed}")
+            for room in removed:
+                events.discard(room)
+                metrics.ROOMS_DELETED.inc(reason="cleanup")
+                metrics.REGISTRY.remove(room=room)
+        except Exception as e:
+            print(f"Room cleanup failed: {e}")
+        if RECORDING_RETENTION_DAYS > 0:
+            try:
+                pruned = await asyncio.to_thread(recording.prune_recordings, RECORDING_RETENTION_DAYS * 86400)
+                if pruned:
+                    print(f"Pruned recordings: {pruned}")
+            except Exception as e:
+                print(f"Recording cleanup failed: {e}")
+            try:
+                pruned = await asyncio.to_thread(tracing.prune_timelines, RECORDING_RETENTION_DAYS * 86400)
+                if pruned:
+                    print(f"Pruned timelines: {pruned}")
+            except Exception as e:
+                print(f"Timeline cleanup failed: {e}")
+
+
+def acquire_api_lock(path: str):
+    """Hold an exclusive lock for the life of this process, or fail if another API process has it"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    handle = open(path, "w")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        handle.close()
+        raise RuntimeError(
+            f"Another API process holds {path}. Run a single API worker (no uvicorn --workers): "
+            "the agent pool, admission control and event streams are per process."
+        )
+    handle.write(str(os.getpid()))
+    handle.flush()
+    return handle
+
+
+@app.on_event("startup")
+async def start_agent_pool():
+    app.state.api_lock = acquire_api_lock(API_LOCK_FILE)
+    if os.getenv("USE_TURN_DETECTOR", "false").lower() == "true":
+        # Fail here rather than have every pool worker exit during warm-up
+        raise RuntimeError("USE_TURN_DETECTOR=true needs LiveKit job dispatch (python debate_agent.py start); "
+                           "the agent worker pool can't run the turn detector")
+    # Debates queued or running before a restart had their agents in the previous process
+    orphaned = await registry_call(rooms.end_unfinished, "failed", "API restarted")
+    if orphaned:
+        print(f"Marked debates interrupted by the restart as failed: {orphaned}")
+    for room in orphaned:
+        finish_events(room, "failed", "API restarted")
+    await agent_pool.start()
+    app.state.room_cleanup = asyncio.create_task(cleanup_rooms_periodically())
+
+
+@app.on_event("shutdown")
+async def stop_agent_pool():
+    app.state.room_cleanup.cancel()
+    await agent_pool.stop()
+    app.state.api_lock.close()
+
+
+token_cache = TokenCache(API_KEY, API_SECRET, ttl_sec=TOKEN_TTL_SEC, refresh_margin_sec=TOKEN_REFRESH_MARGIN_SEC)
+
+
 def dev_token(room: str, identity: str) -> str:
-    api_key = API_KEY
-    api_secret = API_SECRET
-    now = int(time.time())
-    ttl = int(timedelta(hours=2).total_seconds())
-    payload = {
-        "iss": api_key,
-        "sub": identity,
-        "nbf": now,
-        "exp": now + ttl,
-        "video": {
-            "room": room,
-            "can_publish": True,
-            "can_subscribe": True,
-        }
-    }
-    token = jwt.encode(payload, api_secret, algorithm="HS256")
-    return token
+    return token_cache.issue(room, identity, can_publish=True, can_subscribe=True)
+
+
+def agent_token(room: str) -> str:
+    """Token a pooled agent worker joins ``room`` with"""
+    grants = livekit_api.VideoGrants(room_join=True, room=room, can_publish=True, can_subscribe=True)
+    return (livekit_api.AccessToken(API_KEY, API_SECRET)
+            .with_identity(f"agent-{room}")
+            .with_grants(grants)
+            .to_jwt())
+
+
+# Rooms still queued for a free agent worker slot
+pending_assignments: Dict[str, asyncio.Task] = {}
 
 
-async def start_debate_agent_async(room: str, topic: str, personas: list[str], turn_duration: int, total_rounds: int):
-    """Start the debate agent asynchronously"""
+async def start_debate_agent_async(job: DebateJob):
+    """Hand the debate to a warm agent worker from the pool"""
+    room = job.room
     try:
-        # Set environment variables for the agent
-        os.environ["ROOM_METADATA"] = json.dumps({
-            "topic": topic,
-            "personas": personas,
-            "room": room,
-            "turn_duration_min": turn_duration,
-            "total_rounds": total_rounds
-        })
-        
-        # Launch agent in background (non-blocking)
-        import subprocess
-        import sys
-        from pathlib import Path
-        
-        script_dir = Path(__file__).parent
-        subprocess.Popen([
-            sys.executable, "debate_agent.py"
-        ], cwd=script_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        
+        await registry_call(rooms.update, room, status="running")
+        wait = await agent_pool.assign(job, LIVEKIT_URL, agent_token(room))
+        await registry_call(rooms.update, room, agent_wait_sec=round(wait, 3))
+        metrics.ROOM_WAIT.observe(wait)
         print(f"Started debate agent for room {room}")
         
     except Exception as e:
         print(f"Failed to start debate agent for room {room}: {e}")
+        await registry_call(rooms.mark_ended, room, status="failed")
+        finish_events(room, "failed", str(e))
+        admission.release(room)
+
+
+def start_agent(job: DebateJob):
+    """Start the debate agent asynchronously once the room is admitted"""
+    task = asyncio.create_task(start_debate_agent_async(job))
+    pending_assignments[job.room] = task
+    task.add_done_callback(lambda _: pending_assignments.pop(job.room, None))
+
+
+class JoinRequest(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    room: str = "main"
+    user: Optional[str] = None
+    topic: str = "AI Debate"
+    personas: List[str] = []  # ["socrates", "einstein", "trump"]
+    turn_duration: float = Field(3, alias="turnDuration")  # minutes
+    number_of_turns: int = Field(4, alias="numberOfTurns")
+    target_ttft_ms: Optional[float] = Field(None, alias="targetTtftMs")  # LLM time-to-first-token target
+
+
+class BatchJoinRequest(JoinRequest):
+    users: List[str] = Field(min_length=1, max_length=MAX_BATCH_JOIN)
+
+
+class ReplayRequest(BaseModel):
+    room: str
+    user: Optional[str] = None
+
+
+async def ensure_room(req: JoinRequest) -> dict:
+    """Register the room and admit its debate if it is new, returning the debate's status"""
+    return await ensure_debate(DebateJob(
+        room=req.room,
+        topic=req.topic,
+        personas=map_personas(req.personas),
+        turn_duration_min=req.turn_duration,
+        total_rounds=req.number_of_turns,
+        target_ttft_ms=req.target_ttft_ms,
+    ))
+
+
+async def ensure_debate(job: DebateJob) -> dict:
+    # Store room metadata; the agent receives its own copy with the assignment.
+    # Only the request whose insert wins starts the agent.
+    created = await registry_call(rooms.create_if_absent, job.room, {
+        "topic": job.topic,
+        "personas": job.personas,
+        "turn_duration_min": job.turn_duration_min,
+        "total_rounds": job.total_rounds,
+        "status": "queued",
+        "created_at": datetime.utcnow().isoformat(),
+        **({"replay": job.replay} if job.replay else {}),
+    }, ttl_sec=ROOM_TTL_SEC)
+    if not created:
+        # Joining a debate that already exists is cheap and never rejected
+        status = admission.status(job.room)
+        if status:
+            return status.as_dict()
+        return {"status": (await registry_call(rooms.get, job.room) or {}).get("status", "running")}
+
+    # A replay makes no provider calls, but still takes an agent slot
+    decision = admission.request(job.room, 0 if job.replay else len(job.personas), lambda: start_agent(job))
+    metrics.ADMISSIONS.inc(result=decision.status)
+    if decision.status == "rejected":
+        # Saturated: don't keep a room that will never start
+        await registry_call(rooms.delete, job.room)
+        raise HTTPException(
+            status_code=429,
+            detail="Too many debates in progress, try again later",
+            headers={"Retry-After": str(math.ceil(decision.retry_after_sec))},
+        )
+    # Agent events only go to streams opened here, so a late event for an ended room is dropped
+    events.stream(job.room)
+    metrics.ROOMS_CREATED.inc()
+    return decision.as_dict()
 
 
 @app.post("/join")
-async def join(request: Request):
+async def join(req: JoinRequest):
+    started = time.perf_counter()
     try:
-        data = await request.json()
-        room = data.get("room", "main")
-        user = data.get("user")
-        topic = data.get("topic", "AI Debate")
-        personas = data.get("personas", [])  # ["socrates", "einstein", "trump"]
-        turn_duration = data.get("turnDuration", 3)  # minutes
-        number_of_turns = data.get("numberOfTurns", 4)
-        
-        # Map frontend persona IDs to backend persona names
-        persona_mapping = {
-            "socrates": "AI Socrates",
-            "einstein": "AI Einstein", 
-            "trump": "AI Trump",
-            "shakespeare": "AI Shakespeare",
-            "tesla": "AI Tesla",
-            "churchill": "AI Churchill",
-            "gandhi": "AI Gandhi",
-            "jobs": "AI Steve Jobs"
+        debate = await ensure_room(req)
+        identity = req.user or f"human-{uuid.uuid4().hex[:6]}"
+        return {"url": LIVEKIT_URL, "token": dev_token(req.room, identity), "debate": debate}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to join room: {str(e)}")
+    finally:
+        metrics.JOIN_LATENCY.observe(time.perf_counter() - started)
+
+
+@app.post("/join/batch")
+async def join_batch(req: BatchJoinRequest):
+    """Issue tokens for many identities in one call, e.g. for a crowd of viewers"""
+    started = time.perf_counter()
+    try:
+        debate = await ensure_room(req)
+        return {
+            "url": LIVEKIT_URL,
+            "tokens": [{"identity": user, "token": dev_token(req.room, user)} for user in req.users],
+            "debate": debate,
         }
-        
-        mapped_personas = [persona_mapping.get(p, p) for p in personas]
-        
-        # Store room metadata for the agent to access
-        if room not in rooms:
-            rooms[room] = {
-                "topic": topic,
-                "personas": mapped_personas,
-                "turn_duration_min": turn_duration,
-                "total_rounds": number_of_turns,
-                "created_at": datetime.utcnow().isoformat()
-            }
-            
-            # Start the debate agent asynchronously
-            asyncio.create_task(start_debate_agent_async(
-                room, topic, mapped_personas, turn_duration, number_of_turns
-            ))
-        
-        identity = user or f"human-{uuid.uuid4().hex[:6]}"
-        return {"url": LIVEKIT_URL, "token": dev_token(room, identity)}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to join room: {str(e)}")
+    finally:
+        metrics.JOIN_LATENCY.observe(time.perf_counter() - started)
 
 
 @app.get("/rooms")
 async def list_rooms():
     """List all active rooms"""
+    room_details = await registry_call(rooms.list)
     return {
-        "rooms": list(rooms.keys()),
-        "room_details": rooms
+        "rooms": list(room_details.keys()),
+        "room_details": room_details
     }
 
 
+@app.get("/rooms/{room}/events")
+async def room_events(room: str, last_event_id: Optional[str] = Header(None)):
+    """Server-Sent Events of a room's debate: turn_start, turn_end, transcript and debate_finished"""
+    if room not in events.rooms and not await registry_call(rooms.get, room):
+        raise HTTPException(status_code=404, detail="Room not found")
+    return StreamingResponse(
+        events.sse(room, last_event_id, EVENT_HEARTBEAT_SEC),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/agents/pool")
+async def pool_stats():
+    """Agent worker pool status, per-host load, room wait times and admission control"""
+    return {**agent_pool.stats(), "admission": admission.stats(), "events": events.stats()}
+
+
+@app.get("/rooms/{room}/timeline")
+async def room_timeline(room: str, format: str = "jsonl"):
+    """Span timeline of a room's debate, as JSON lines or a Chrome trace (?format=chrome)"""
+    if format not in ("jsonl", "chrome"):
+        raise HTTPException(status_code=400, detail="format must be 'jsonl' or 'chrome'")
+    timeline = await asyncio.to_thread(tracing.read_timeline, room, format)
+    if timeline is None:
+        raise HTTPException(status_code=404, detail="No timeline for this room")
+    if format == "chrome":
+        return timeline
+    return PlainTextResponse(timeline, media_type="application/x-ndjson")
+
+
+@app.get("/recordings")
+async def list_recordings():
+    """Recorded debates, newest first"""
+    return {"recordings": await asyncio.to_thread(recording.list_recordings)}
+
+
+@app.get("/recordings/{recording_id}")
+async def download_recording(recording_id: str):
+    """Download a recording (.drec: compressed audio chunks, transcript and turn timings)"""
+    path = recording.recording_path(recording_id)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Recording not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
+
+
+@app.post("/recordings/{recording_id}/replay")
+async def replay_recording(recording_id: str, req: ReplayRequest):
+    """Replay a recorded debate into a new room; returns credentials like /join"""
+    def summary():
+        rec = recording.open_recording(recording_id)
+        if rec is None:
+            return None
+        with rec:
+            return rec.summary()
+
+    info = await asyncio.to_thread(summary)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Recording not found")
+    if await registry_call(rooms.get, req.room):
+        raise HTTPException(status_code=409, detail="Room already exists")
+    debate = await ensure_debate(DebateJob(
+        room=req.room,
+        topic=info["topic"] or "AI Debate",
+        personas=info["personas"] or [],
+        replay=recording_id,
+    ))
+    identity = req.user or f"human-{uuid.uuid4().hex[:6]}"
+    return {"url": LIVEKIT_URL, "token": dev_token(req.room, identity), "debate": debate, "recording": info}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """API and debate pipeline metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.delete("/rooms/{room}")
 async def delete_room(room: str):
-    """Delete a room"""
-    if room in rooms:
-        del rooms[room]
+    """Delete a room, stopping its debate agent"""
+    queued = admission.withdraw(room)
+    pending = pending_assignments.pop(room, None)
+    if pending:
+        pending.cancel()
+        admission.release(room)
+    # The pool forgets a cancelled debate at once (its late end isn't reported),
+    # so the room can be joined again right away
+    cancelled = await agent_pool.cancel(room)
+    if cancelled:
+        admission.release(room)
+        metrics.DEBATE_OUTCOMES.inc(status="cancelled")
+    finish_events(room, "deleted")
+    events.discard(room)
+    if await registry_call(rooms.delete, room) or queued or pending or cancelled:
+        metrics.ROOMS_DELETED.inc(reason="api")
+        metrics.REGISTRY.remove(room=room)
         return {"message": f"Room {room} deleted"}
     else:
         raise HTTPException(status_code=404, detail="Room not found")
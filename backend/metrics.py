@@ -0,0 +1,170 @@
+"""
+Prometheus-style metrics for the API and the debate pipeline.
+
+A small in-process registry rendered in the Prometheus text exposition format
+at ``/metrics``, so no client library is needed. Debate agents report their
+per-turn timings to the pool as events, which are folded into the same
+registry, so one scrape covers API latency and where each room's turn latency
+goes (LLM first token, first audio, STT, gaps between turns).
+"""
+
+import math, threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: Iterable[Tuple[str, str]]) -> str:
+    parts = []
+    for name, value in key:
+        value = value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        self._series: Dict[LabelKey, object] = {}
+
+    def remove(self, **labels):
+        """Drop every series whose labels include ``labels`` (e.g. a closed room)"""
+        match = set(_label_key(labels))
+        with self._lock:
+            for key in [k for k in self._series if match <= set(k)]:
+                del self._series[key]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, value in sorted(self._series.items()):
+                lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key: LabelKey, value) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._series.get(_label_key(labels), 0.0)
+
+    def _render_series(self, key, value):
+        return [f"{self.name}_total{_format_labels(key)} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: Optional[float], **labels):
+        if value is None:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(_label_key(labels))
+        return series["count"] if series else 0
+
+    def _render_series(self, key, series):
+        lines = []
+        for bound, count in zip(self.buckets, series["counts"]):
+            bucket_key = key + (("le", _format_value(bound)),)
+            lines.append(f"{self.name}_bucket{_format_labels(bucket_key)} {count}")
+        lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series['sum'])}")
+        lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+
+    def counter(self, name: str, help: str) -> Counter:
+        metric = Counter(name, help)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def remove(self, **labels):
+        for metric in self.metrics:
+            metric.remove(**labels)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ----------------------------------------------------------------------------
+# Series exposed by the backend
+# ----------------------------------------------------------------------------
+
+REGISTRY = Registry()
+
+JOIN_LATENCY = REGISTRY.histogram("debate_join_seconds", "Time to handle POST /join")
+AGENT_SPAWN = REGISTRY.histogram("debate_agent_spawn_seconds", "Agent worker spawn to ready")
+ROOM_WAIT = REGISTRY.histogram("debate_room_wait_seconds", "Time a room waited for a free agent slot")
+LLM_TTFT = REGISTRY.histogram("debate_llm_ttft_seconds", "Turn start to first LLM token, per room and persona")
+TTS_TTFA = REGISTRY.histogram("debate_tts_ttfa_seconds", "Turn start to first audio, per room and persona")
+STT_LATENCY = REGISTRY.histogram("debate_stt_latency_seconds", "End of human speech to final transcript, per room")
+TURN_GAP = REGISTRY.histogram("debate_turn_gap_seconds", "Silence between consecutive turns, per room")
+ROOMS_CREATED = REGISTRY.counter("debate_rooms_created", "Rooms created")
+ROOMS_DELETED = REGISTRY.counter("debate_rooms_deleted", "Rooms deleted, by reason")
+AGENT_FAILURES = REGISTRY.counter("debate_agent_failures", "Debates whose agent failed")
+DEBATE_OUTCOMES = REGISTRY.counter("debate_outcomes", "Debates that ended, by status (finished, failed, cancelled, timed_out, deleted)")
+ADMISSIONS = REGISTRY.counter("debate_admissions", "New debates by admission result (running, queued, rejected)")
+
+
+def observe_agent_event(room: Optional[str], event: dict):
+    """Fold an event reported by the agent pool into the metrics"""
+    kind = event.get("type")
+    if kind == "worker_ready":
+        AGENT_SPAWN.observe(event.get("spawn_sec"))
+    elif kind == "turn_end":
+        labels = {"room": room, "persona": event.get("persona")}
+        LLM_TTFT.observe(event.get("ttft_sec"), **labels)
+        TTS_TTFA.observe(event.get("ttfa_sec"), **labels)
+        TURN_GAP.observe(event.get("gap_before_sec"), room=room)
+    elif kind == "stt":
+        STT_LATENCY.observe(event.get("transcription_delay_sec"), room=room)
@@ -0,0 +1,66 @@
+"""
+Process-level model registry.
+
+The Silero VAD is loaded once per process and shared read-only by every
+AgentSession in it, instead of each persona session loading its own copy.
+The optional multilingual turn detector runs in the job's inference executor,
+so only its model files are fetched up front; each session builds its own
+detector inside the job. Plugins are only imported when first needed.
+"""
+
+from startup_profile import load_report, rss_mb, timed_import, timed_load
+
+TURN_DETECTOR_PLUGIN = "livekit.plugins.turn_detector"
+
+_vad = None
+_turn_detector_ready = False
+
+
+def get_vad():
+    """The shared Silero VAD, loaded on first use"""
+    global _vad
+    if _vad is None:
+        silero = timed_import("livekit.plugins.silero")
+        _vad = timed_load("silero_vad", silero.VAD.load)
+    return _vad
+
+
+def _download_turn_detector_files():
+    from livekit.agents import Plugin
+
+    for plugin in Plugin.registered_plugins:
+        if plugin.package.startswith(TURN_DETECTOR_PLUGIN):
+            plugin.download_files()
+
+
+def prepare_turn_detector():
+    """Fetch the end-of-turn model files once per process, outside any job"""
+    global _turn_detector_ready
+    if not _turn_detector_ready:
+        timed_import(f"{TURN_DETECTOR_PLUGIN}.multilingual")
+        timed_load("turn_detector_files", _download_turn_detector_files)
+        _turn_detector_ready = True
+
+
+def new_turn_detector():
+    """A multilingual end-of-turn detector for one session; needs the current LiveKit job context"""
+    prepare_turn_detector()
+    multilingual = timed_import(f"{TURN_DETECTOR_PLUGIN}.multilingual")
+    try:
+        return multilingual.MultilingualModel()
+    except RuntimeError as e:
+        raise RuntimeError(
+            "USE_TURN_DETECTOR needs a LiveKit job context (the model runs in the job's inference executor); "
+            "run the agent through LiveKit dispatch (python debate_agent.py start), not the agent worker pool"
+        ) from e
+
+
+def load_models(turn_detector: bool = False) -> dict:
+    """Load every model this process needs up front and print a startup report"""
+    get_vad()
+    if turn_detector:
+        prepare_turn_detector()
+    for name, stats in load_report.items():
+        print(f"Loaded {name} in {stats['load_sec']}s (+{stats['rss_delta_mb']} MB)")
+    print(f"Process RSS after model load: {rss_mb():.1f} MB")
+    return load_report
@@ -0,0 +1,243 @@
+"""
+Per-call LLM routing under a time-to-first-token target.
+
+The router knows several configured models and keeps a rolling window of
+each one's time to first token and errors. Every call names a purpose
+("intro", "turn", "summary"), and each purpose has an ordered model
+preference. The router takes the first preferred model that is healthy and
+usually meets the target TTFT. If none does, it takes the fastest healthy
+model. Models that keep failing are skipped for a cooldown and only tried as
+a last resort.
+
+A call that fails before its first token fails over to the next candidate.
+A call that hasn't produced a token by the target is hedged: a backup
+request goes to the next candidate and whichever answers first wins.
+
+Routes expose the ``chat(chat_ctx=...)`` streaming interface of an LLM plugin,
+so they can be used anywhere the debate loop takes an LLM.
+"""
+
+import time, asyncio
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class ModelStats:
+    """Rolling TTFT and error rate of one model"""
+
+    def __init__(self, window: int = 50, max_error_rate: float = 0.5, max_consecutive_errors: int = 3,
+                 cooldown_sec: float = 30.0):
+        self.samples: deque = deque(maxlen=window)  # (ok, ttft_sec or None)
+        self.max_error_rate = max_error_rate
+        self.max_consecutive_errors = max_consecutive_errors
+        self.cooldown_sec = cooldown_sec
+        self.consecutive_errors = 0
+        self.degraded_until = 0.0
+        self.calls = 0
+
+    def record(self, ttft_sec: Optional[float]):
+        self.calls += 1
+        self.samples.append((True, ttft_sec))
+        self.consecutive_errors = 0
+
+    def record_error(self):
+        self.calls += 1
+        self.samples.append((False, None))
+        self.consecutive_errors += 1
+        if self.consecutive_errors >= self.max_consecutive_errors or (
+                len(self.samples) >= 10 and self.error_rate() > self.max_error_rate):
+            self.degraded_until = time.monotonic() + self.cooldown_sec
+
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for ok, _ in self.samples if not ok) / len(self.samples)
+
+    def ttft(self, quantile: float = 0.5) -> Optional[float]:
+        values = sorted(t for ok, t in self.samples if ok and t is not None)
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(quantile * len(values)))]
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.degraded_until
+
+    def as_dict(self) -> dict:
+        p50, p95 = self.ttft(0.5), self.ttft(0.95)
+        return {
+            "calls": self.calls,
+            "ttft_p50_sec": round(p50, 3) if p50 is not None else None,
+            "ttft_p95_sec": round(p95, 3) if p95 is not None else None,
+            "error_rate": round(self.error_rate(), 3),
+            "healthy": self.healthy,
+        }
+
+
+class ModelRouter:
+    def __init__(self, models: Dict[str, object], routes: Dict[str, List[str]], target_ttft_sec: float = 1.5,
+                 hedge: bool = True):
+        """``models``: name -> LLM plugin; ``routes``: purpose -> preferred model names, best first"""
+        self.models = models
+        self.routes = {purpose: [m for m in names if m in models] for purpose, names in routes.items()}
+        self.default_order = list(models)
+        self.target_ttft_sec = target_ttft_sec
+        self.hedge = hedge
+        self.stats: Dict[str, ModelStats] = {name: ModelStats() for name in models}
+        self.counts = {"hedged": 0, "hedge_won": 0, "failovers": 0}
+
+    def candidates(self, purpose: str, target_ttft_sec: Optional[float] = None) -> List[str]:
+        """Models to try for ``purpose``, in order"""
+        target = target_ttft_sec or self.target_ttft_sec
+        preferred = self.routes.get(purpose) or self.default_order
+        # Every configured model is a fallback, after the preferred ones
+        order = preferred + [m for m in self.default_order if m not in preferred]
+        healthy = [m for m in order if self.stats[m].healthy]
+        degraded = [m for m in order if not self.stats[m].healthy]
+        meets = [m for m in healthy if (self.stats[m].ttft() or 0.0) <= target]
+        slow = sorted((m for m in healthy if m not in meets), key=lambda m: self.stats[m].ttft())
+        return meets + slow + degraded
+
+    def route(self, purpose: str, target_ttft_sec: Optional[float] = None) -> "Route":
+        return Route(self, purpose, target_ttft_sec)
+
+    def chat(self, chat_ctx, purpose: str = "turn", target_ttft_sec: Optional[float] = None) -> "RoutedStream":
+        return RoutedStream(self, chat_ctx, self.candidates(purpose, target_ttft_sec),
+                            target_ttft_sec or self.target_ttft_sec)
+
+    def stats_dict(self) -> dict:
+        return {
+            "target_ttft_sec": self.target_ttft_sec,
+            "models": {name: s.as_dict() for name, s in self.stats.items()},
+            **self.counts,
+        }
+
+
+class Route:
+    """A purpose (and optional per-debate TTFT target) bound to a router, usable as an LLM"""
+
+    def __init__(self, router: ModelRouter, purpose: str, target_ttft_sec: Optional[float] = None):
+        self.router = router
+        self.purpose = purpose
+        self.target_ttft_sec = target_ttft_sec
+
+    @property
+    def model(self) -> str:
+        """The model this route would try first right now"""
+        return self.router.candidates(self.purpose, self.target_ttft_sec)[0]
+
+    def chat(self, chat_ctx=None, **kwargs) -> "RoutedStream":
+        return self.router.chat(chat_ctx, self.purpose, self.target_ttft_sec)
+
+
+class _Attempt:
+    """One model's request, up to its first content token"""
+
+    def __init__(self, name: str, llm, chat_ctx, backup: bool = False):
+        self.name = name
+        self.backup = backup
+        self.llm = llm
+        self.chat_ctx = chat_ctx
+        self.started = time.perf_counter()
+        self.stream = None
+        self.chunks: list = []
+        self.iterator = None
+        self.ttft: Optional[float] = None
+
+    async def first_token(self):
+        self.stream = self.llm.chat(chat_ctx=self.chat_ctx)
+        await self.stream.__aenter__()
+        self.iterator = self.stream.__aiter__()
+        while True:
+            try:
+                chunk = await self.iterator.__anext__()
+            except StopAsyncIteration:
+                raise RuntimeError("empty reply") from None
+            self.chunks.append(chunk)
+            if chunk.delta and chunk.delta.content:
+                self.ttft = time.perf_counter() - self.started
+                return self
+
+    async def close(self):
+        if self.stream is None:
+            return
+        try:
+            await self.stream.__aexit__(None, None, None)
+        except Exception:
+            pass
+
+
+class RoutedStream:
+    def __init__(self, router: ModelRouter, chat_ctx, candidates: List[str], hedge_after_sec: float):
+        self.router = router
+        self.chat_ctx = chat_ctx
+        self.candidates = list(candidates)
+        self.hedge_after_sec = hedge_after_sec
+        # Model that answered, once known
+        self.model: Optional[str] = None
+        self._winner: Optional[_Attempt] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        if self._winner:
+            await self._winner.close()
+        return False
+
+    def _start(self, pending: dict, backup: bool = False) -> bool:
+        if not self.candidates:
+            return False
+        name = self.candidates.pop(0)
+        attempt = _Attempt(name, self.router.models[name], self.chat_ctx, backup)
+        pending[asyncio.ensure_future(attempt.first_token())] = attempt
+        return True
+
+    async def _first_token(self) -> _Attempt:
+        pending: Dict[asyncio.Future, _Attempt] = {}
+        self._start(pending)
+        hedged = False
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                can_hedge = self.router.hedge and not hedged and self.candidates
+                done, _ = await asyncio.wait(pending, timeout=self.hedge_after_sec if can_hedge else None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Too slow to first token: race a backup request against it
+                    hedged = True
+                    self.router.counts["hedged"] += 1
+                    self._start(pending, backup=True)
+                    continue
+                for task in done:
+                    attempt = pending.pop(task)
+                    if task.exception() is None:
+                        return self._won(attempt)
+                    error = task.exception()
+                    await attempt.close()
+                    self.router.stats[attempt.name].record_error()
+                    print(f"LLM {attempt.name} failed before its first token: {error}")
+                if not pending and self._start(pending):
+                    self.router.counts["failovers"] += 1
+        finally:
+            for task, attempt in pending.items():
+                task.cancel()
+                await attempt.close()
+                # A request that lost the race is counted as slow, not failed
+                self.router.stats[attempt.name].record(time.perf_counter() - attempt.started)
+        raise error or RuntimeError("no LLM configured")
+
+    def _won(self, attempt: _Attempt) -> _Attempt:
+        if attempt.backup:
+            self.router.counts["hedge_won"] += 1
+        self.router.stats[attempt.name].record(attempt.ttft)
+        self.model = attempt.name
+        self._winner = attempt
+        return attempt
+
+    async def __aiter__(self):
+        attempt = await self._first_token()
+        for chunk in attempt.chunks:
+            yield chunk
+        async for chunk in attempt.iterator:
+            yield chunk
@@ -0,0 +1,181 @@
+"""
+Single-session multi-voice debates.
+
+Instead of one AgentSession per persona, each with its own STT, VAD, noise
+cancellation and room participant, one session owns the room audio and every
+persona speaks through it. PersonaVoice gives each persona the subset of the
+AgentSession interface the debate loop uses, with its own agent (prompt and
+chat context) and TTS voice: its speech is synthesized with the persona's TTS
+and handed to the shared session as pre-rendered audio, one speaker at a time.
+
+Session events are routed back to the persona they concern: human speech and
+transcripts to the listening persona (the one whose agent runs the session),
+speech state and assistant items to whoever holds the floor.
+"""
+
+import asyncio
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+
+import recording
+from turn_pipeline import SentenceChunker
+
+# Events about the human, seen only by the listening persona
+HUMAN_EVENTS = ("user_state_changed", "user_input_transcribed")
+
+Text = Union[str, AsyncIterable[str]]
+
+
+async def synthesize(tts, sentences: AsyncIterable[str], spoken: asyncio.Queue) -> AsyncIterator:
+    """Audio frames for each sentence, announcing each one on ``spoken`` as it is voiced"""
+    try:
+        async for sentence in sentences:
+            spoken.put_nowait(sentence)
+            async with tts.synthesize(sentence) as stream:
+                async for audio in stream:
+                    yield audio.frame
+    finally:
+        spoken.put_nowait(None)
+
+
+async def _drain(spoken: asyncio.Queue) -> AsyncIterator[str]:
+    while True:
+        sentence = await spoken.get()
+        if sentence is None:
+            return
+        yield sentence
+
+
+async def _once(text: str) -> AsyncIterator[str]:
+    yield text
+
+
+def render(tts, text: Text) -> Tuple[Text, AsyncIterator]:
+    """(text, audio) for ``session.say()``, the audio synthesized with ``tts``"""
+    spoken: asyncio.Queue = asyncio.Queue()
+    if isinstance(text, str):
+        return text, synthesize(tts, _once(text), spoken)
+    return _drain(spoken), synthesize(tts, text, spoken)
+
+
+class MultiVoiceSession:
+    """One AgentSession shared by several persona voices"""
+
+    def __init__(self, session):
+        self.session = session
+        self.voices: List["PersonaVoice"] = []
+        # The voice holding the floor; only one persona speaks at a time
+        self.speaker: Optional["PersonaVoice"] = None
+        self._floor = asyncio.Lock()
+        self._routed: set = set()
+
+    def voice(self, agent, tts, llm=None) -> "PersonaVoice":
+        """Add a persona; the first one added is the listener"""
+        voice = PersonaVoice(self, agent, tts, llm)
+        self.voices.append(voice)
+        return voice
+
+    @property
+    def listener(self) -> "PersonaVoice":
+        return self.voices[0]
+
+    # Events -------------------------------------------------------------
+
+    def route(self, event: str):
+        if event in self._routed:
+            return
+        self._routed.add(event)
+        self.session.on(event, lambda ev: self._dispatch(event, ev))
+
+    def _dispatch(self, event: str, ev):
+        recipient = self.recipient(event, ev)
+        if recipient:
+            recipient.emit(event, ev)
+
+    def recipient(self, event: str, ev) -> Optional["PersonaVoice"]:
+        if not self.voices:
+            return None
+        if event in HUMAN_EVENTS:
+            return self.listener
+        if event == "conversation_item_added" and getattr(ev.item, "role", None) == "user":
+            return self.listener
+        if event == "metrics_collected" and hasattr(ev.metrics, "transcription_delay"):
+            return self.listener
+        # Speech outside a persona turn (e.g. a reply to the human) is the session's own agent
+        return self.speaker if self._floor.locked() and self.speaker else self.listener
+
+    # Speech -------------------------------------------------------------
+
+    async def speak(self, voice: "PersonaVoice", text: Text, audio: Optional[AsyncIterable] = None):
+        async with self._floor:
+            self.speaker = voice
+            if audio is None:
+                text, audio = render(voice.tts, text)
+            # Pre-rendered audio bypasses the agent's TTS node, so it is recorded here
+            handle = self.session.say(text, audio=recording.tap(voice.current_agent.name, audio))
+            try:
+                await handle
+            except asyncio.CancelledError:
+                self.session.interrupt()
+                raise
+
+    async def close(self, voice: "PersonaVoice"):
+        """Close the shared session once the last voice is closed"""
+        if all(v.closed for v in self.voices):
+            await self.session.close()
+
+
+class PersonaVoice:
+    """A persona rendered through a shared session, used where the debate loop expects an AgentSession"""
+
+    def __init__(self, shared: MultiVoiceSession, agent, tts, llm=None):
+        self.shared = shared
+        self.current_agent = agent
+        self.tts = tts
+        self.llm = llm
+        self.closed = False
+        self._handlers: Dict[str, list] = {}
+
+    @property
+    def agent_state(self) -> str:
+        if self.shared.speaker is self:
+            return self.shared.session.agent_state
+        return "listening"
+
+    def on(self, event: str, callback: Callable):
+        self.shared.route(event)
+        self._handlers.setdefault(event, []).append(callback)
+        return callback
+
+    def off(self, event: str, callback: Callable):
+        if callback in self._handlers.get(event, []):
+            self._handlers[event].remove(callback)
+
+    def emit(self, event: str, ev):
+        for callback in list(self._handlers.get(event, [])):
+            callback(ev)
+
+    def say(self, text: Text, audio: Optional[AsyncIterable] = None) -> asyncio.Future:
+        return asyncio.ensure_future(self.shared.speak(self, text, audio))
+
+    def generate_reply(self) -> asyncio.Future:
+        """Reply from this persona's chat context, spoken in its voice"""
+        return self.say(self._reply_text())
+
+    async def _reply_text(self) -> AsyncIterator[str]:
+        chunker = SentenceChunker()
+        async with self.llm.chat(chat_ctx=self.current_agent.chat_ctx) as stream:
+            async for chunk in stream:
+                if chunk.delta and chunk.delta.content:
+                    for sentence in chunker.feed(chunk.delta.content):
+                        yield sentence
+        tail = chunker.flush()
+        if tail:
+            yield tail
+
+    def interrupt(self):
+        if self.shared.speaker is self:
+            self.shared.session.interrupt()
+
+    async def close(self):
+        self.closed = True
+        await self.shared.close(self)
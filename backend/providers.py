@@ -0,0 +1,125 @@
+"""
+Process-wide provider clients.
+
+Every debate hosted by a process shares one pooled aiohttp session for the
+STT/TTS plugins and one pooled HTTP client for the LLM, so connections (and
+their TLS handshakes) are kept alive and reused across personas and rooms
+instead of being opened per session. Plugin instances are cached too: one
+STT per model, one TTS per (model, voice) and one LLM per endpoint.
+
+Provider plugins are imported when their first client is created (or by
+``import_plugins()`` when a worker warms up), so a process only pays for the
+providers it uses.
+"""
+
+import os
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+
+from startup_profile import timed_import
+
+# Plugin module per provider kind
+PLUGINS = {
+    "llm": "livekit.plugins.openai",
+    "stt": "livekit.plugins.deepgram",
+    "tts": "livekit.plugins.cartesia",
+}
+
+# Connection pool limits shared by all provider traffic of this process
+PROVIDER_MAX_CONNECTIONS = int(os.getenv("PROVIDER_MAX_CONNECTIONS", "100"))
+PROVIDER_KEEPALIVE_SEC = float(os.getenv("PROVIDER_KEEPALIVE_SEC", "60"))
+
+_http_session: Optional[aiohttp.ClientSession] = None
+_llm_http = None  # httpx.AsyncClient
+_llms: Dict[Tuple[str, Optional[str]], object] = {}
+_stts: Dict[Tuple[str, str], object] = {}
+_ttss: Dict[Tuple[str, Optional[str]], object] = {}
+
+
+def import_plugins(kinds=PLUGINS) -> list:
+    """Import the provider plugins up front (e.g. while a worker warms up)"""
+    return [timed_import(PLUGINS[kind]) for kind in kinds]
+
+
+def http_session() -> aiohttp.ClientSession:
+    """Keep-alive HTTP/WebSocket session for the STT and TTS plugins"""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=PROVIDER_MAX_CONNECTIONS,
+            keepalive_timeout=PROVIDER_KEEPALIVE_SEC,
+            ttl_dns_cache=300,
+        )
+        _http_session = aiohttp.ClientSession(connector=connector)
+    return _http_session
+
+
+def _llm_http_client():
+    import httpx
+
+    global _llm_http
+    if _llm_http is None or _llm_http.is_closed:
+        _llm_http = httpx.AsyncClient(
+            timeout=httpx.Timeout(connect=15.0, read=30.0, write=5.0, pool=5.0),
+            limits=httpx.Limits(
+                max_connections=PROVIDER_MAX_CONNECTIONS,
+                max_keepalive_connections=PROVIDER_MAX_CONNECTIONS,
+                keepalive_expiry=PROVIDER_KEEPALIVE_SEC,
+            ),
+        )
+    return _llm_http
+
+
+def llm(model: str, base_url: Optional[str] = None, api_key: Optional[str] = None):
+    key = (model, base_url)
+    if key not in _llms:
+        import openai as openai_sdk
+        openai = timed_import(PLUGINS["llm"])
+        client = openai_sdk.AsyncClient(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            base_url=base_url,
+            max_retries=0,
+            http_client=_llm_http_client(),
+        )
+        _llms[key] = openai.LLM(model=model, client=client)
+    return _llms[key]
+
+
+def stt(model: str, language: str = "multi"):
+    """Shared STT; each session still opens its own stream from it"""
+    key = (model, language)
+    if key not in _stts:
+        deepgram = timed_import(PLUGINS["stt"])
+        _stts[key] = deepgram.STT(model=model, language=language, http_session=http_session())
+    return _stts[key]
+
+
+def tts(model: str, voice: Optional[str]):
+    key = (model, voice)
+    if key not in _ttss:
+        cartesia = timed_import(PLUGINS["tts"])
+        _ttss[key] = cartesia.TTS(model=model, voice=voice, http_session=http_session())
+    return _ttss[key]
+
+
+def stats() -> dict:
+    return {
+        "llm_clients": len(_llms),
+        "stt_clients": len(_stts),
+        "tts_clients": len(_ttss),
+        "http_session_open": _http_session is not None and not _http_session.closed,
+    }
+
+
+async def close():
+    """Close the pooled connections (plugins are recreated on next use)"""
+    global _http_session, _llm_http
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    if _llm_http is not None and not _llm_http.is_closed:
+        await _llm_http.aclose()
+    _http_session = _llm_http = None
+    _llms.clear()
+    _stts.clear()
+    _ttss.clear()
@@ -0,0 +1,316 @@
+"""
+Debate recordings.
+
+A debate is recorded into one ``.drec`` file: the synthesized audio of every
+utterance, the transcript and the per-turn timing events. Audio is written as
+it is spoken, in chunks of about a second of zlib-compressed PCM. A
+background thread compresses and writes the chunks, so the event loop only
+copies frame bytes. The index (metadata, segments with their chunk offsets,
+transcript, turns) goes at the end, followed by a fixed-size trailer that
+points at it:
+
+    MAGIC | chunk ... chunk | index (zlib JSON) | trailer (offset, length, TRAILER_MAGIC)
+
+The file is written as ``.drec.part`` and renamed when complete, so only
+finished recordings are listed. Readers memory-map the file and decompress
+one chunk at a time, so replaying a long debate doesn't load it into memory.
+
+The active recorder lives in a context variable, like the tracing timeline,
+so audio can be tapped wherever it is produced.
+"""
+
+import os, re, json, mmap, time, uuid, zlib, queue, struct, asyncio, threading, contextvars
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Union
+
+RECORDING_DIR = os.getenv("RECORDING_DIR", str(Path(__file__).parent / ".cache" / "recordings"))
+
+MAGIC = b"DREC\x01\n"
+TRAILER = struct.Struct("<QI4s")
+TRAILER_MAGIC = b"DRIX"
+# Audio buffered per chunk before it is handed to the writer
+CHUNK_SEC = 1.0
+
+_UNSAFE = re.compile(r"[^\w.-]")
+
+current_recorder: "contextvars.ContextVar[Optional[DebateRecorder]]" = contextvars.ContextVar("current_recorder", default=None)
+
+
+def recording_path(recording_id: str, directory: Union[str, Path] = RECORDING_DIR) -> Path:
+    return Path(directory) / f"{_UNSAFE.sub('_', recording_id)}.drec"
+
+
+# ----------------------------------------------------------------------------
+# Writing
+# ----------------------------------------------------------------------------
+
+class _Writer(threading.Thread):
+    """Compresses and appends chunks off the event loop"""
+
+    def __init__(self, path: Path):
+        super().__init__(name=f"recording-{path.stem}", daemon=True)
+        self.path = path
+        self.part = path.with_suffix(".drec.part")
+        self.queue: "queue.Queue" = queue.Queue()
+        # Segment id -> [(offset, length), ...]
+        self.chunks: Dict[int, list] = {}
+        self.error: Optional[BaseException] = None
+
+    def run(self):
+        try:
+            self.part.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.part, "wb") as f:
+                f.write(MAGIC)
+                while True:
+                    item = self.queue.get()
+                    if item[0] == "chunk":
+                        _, segment, pcm = item
+                        data = zlib.compress(pcm, 6)
+                        self.chunks.setdefault(segment, []).append((f.tell(), len(data)))
+                        f.write(data)
+                    elif item[0] == "close":
+                        index = item[1]
+                        for entry in index["segments"]:
+                            entry["chunks"] = self.chunks.get(entry["id"], [])
+                        data = zlib.compress(json.dumps(index).encode(), 6)
+                        offset = f.tell()
+                        f.write(data)
+                        f.write(TRAILER.pack(offset, len(data), TRAILER_MAGIC))
+                        break
+            os.replace(self.part, self.path)
+        except Exception as e:
+            self.error = e
+            print(f"Recording {self.path.name} failed: {e}")
+
+
+class _Tap:
+    """Frames passing through to the speaker, copied into the recording"""
+
+    def __init__(self, recorder: "DebateRecorder", persona: str, frames: AsyncIterable):
+        self.recorder = recorder
+        self.persona = persona
+        self.frames = frames
+
+    def __aiter__(self):
+        return self.recorder._record(self.persona, self.frames)
+
+
+class DebateRecorder:
+    def __init__(self, recording_id: str, path: Path, meta: dict):
+        self.id = recording_id
+        self.path = path
+        self.meta = meta
+        self.origin = time.perf_counter()
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        # Current round, kept up to date by the debate loop
+        self.round = 0
+        self.segments: List[dict] = []
+        self.transcript: List[dict] = []
+        self.turns: List[dict] = []
+        self._writer = _Writer(path)
+        self._writer.start()
+
+    def _now(self) -> float:
+        return round(time.perf_counter() - self.origin, 3)
+
+    def tap(self, persona: str, frames: AsyncIterable) -> AsyncIterable:
+        if isinstance(frames, _Tap):
+            return frames
+        return _Tap(self, persona, frames)
+
+    async def _record(self, persona: str, frames: AsyncIterable) -> AsyncIterator:
+        segment = None
+        buffer = bytearray()
+        chunk_bytes = 0
+        try:
+            async for frame in frames:
+                if segment is None:
+                    segment = {
+                        "id": len(self.segments), "persona": persona, "round": self.round, "start_sec": self._now(),
+                        "sample_rate": frame.sample_rate, "channels": frame.num_channels, "samples": 0,
+                    }
+                    self.segments.append(segment)
+                    chunk_bytes = int(CHUNK_SEC * frame.sample_rate) * frame.num_channels * 2
+                buffer.extend(bytes(frame.data))
+                segment["samples"] += frame.samples_per_channel
+                if len(buffer) >= chunk_bytes:
+                    self._put_chunk(segment, buffer)
+                    buffer.clear()
+                yield frame
+        finally:
+            if segment is not None:
+                if buffer:
+                    self._put_chunk(segment, buffer)
+                segment["duration_sec"] = round(segment["samples"] / segment["sample_rate"], 3)
+
+    def _put_chunk(self, segment: dict, buffer: bytearray):
+        # A writer that died (disk full...) stops the recording, not the debate
+        if self._writer.is_alive():
+            self._writer.queue.put(("chunk", segment["id"], bytes(buffer)))
+
+    def add_text(self, persona: str, text: str, round_number: int):
+        self.transcript.append({"persona": persona, "text": text, "round": round_number, "t": self._now()})
+
+    def add_event(self, event: dict):
+        """Scheduler listener: keep the per-turn timing events"""
+        if event.get("type") == "turn_end":
+            self.turns.append({**event, "t": self._now()})
+
+    async def close(self):
+        index = {
+            "version": 1,
+            "id": self.id,
+            **self.meta,
+            "started_at": self.started_at,
+            "duration_sec": self._now(),
+            "segments": self.segments,
+            "transcript": self.transcript,
+            "turns": self.turns,
+        }
+        if self._writer.is_alive():
+            self._writer.queue.put(("close", index))
+            await asyncio.to_thread(self._writer.join)
+        if current_recorder.get() is self:
+            current_recorder.set(None)
+
+
+def start_recording(room: str, meta: dict, directory: Union[str, Path] = RECORDING_DIR) -> DebateRecorder:
+    """Record the room's debate and make the recorder current for this task and its subtasks"""
+    # The suffix keeps two debates of the same room started in the same second apart
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+    recording_id = f"{_UNSAFE.sub('_', room)}-{stamp}-{uuid.uuid4().hex[:6]}"
+    recorder = DebateRecorder(recording_id, recording_path(recording_id, directory), {"room": room, **meta})
+    current_recorder.set(recorder)
+    return recorder
+
+
+def tap(persona: str, frames: AsyncIterable) -> AsyncIterable:
+    """Record ``frames`` into the current debate's recording, if there is one"""
+    recorder = current_recorder.get()
+    return recorder.tap(persona, frames) if recorder else frames
+
+
+# ----------------------------------------------------------------------------
+# Reading
+# ----------------------------------------------------------------------------
+
+class Recording:
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._map[:len(MAGIC)] != MAGIC or len(self._map) < len(MAGIC) + TRAILER.size:
+                raise ValueError(f"{self.path.name} is not a debate recording")
+            offset, length, magic = TRAILER.unpack(self._map[-TRAILER.size:])
+            if magic != TRAILER_MAGIC:
+                raise ValueError(f"{self.path.name} is incomplete")
+            self.index = json.loads(zlib.decompress(self._map[offset:offset + length]))
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    @property
+    def segments(self) -> List[dict]:
+        return self.index["segments"]
+
+    def summary(self) -> dict:
+        return {
+            "id": self.index["id"],
+            "room": self.index.get("room"),
+            "topic": self.index.get("topic"),
+            "personas": self.index.get("personas"),
+            "started_at": self.index.get("started_at"),
+            "duration_sec": self.index.get("duration_sec"),
+            "turns": len(self.index["turns"]),
+            "audio_sec": round(sum(s.get("duration_sec", 0.0) for s in self.segments), 1),
+            "size_bytes": self.path.stat().st_size,
+        }
+
+    def pcm(self, segment: dict) -> Iterator[bytes]:
+        """A segment's PCM, one decompressed chunk at a time"""
+        for offset, length in segment["chunks"]:
+            yield zlib.decompress(self._map[offset:offset + length])
+
+    def frames(self, segment: dict, frame_ms: int = 20) -> Iterator[bytes]:
+        """A segment's PCM cut into ``frame_ms`` frames"""
+        step = segment["sample_rate"] * frame_ms // 1000 * segment["channels"] * 2
+        rest = b""
+        for chunk in self.pcm(segment):
+            data = rest + chunk
+            usable = len(data) - len(data) % step
+            view = memoryview(data)
+            for start in range(0, usable, step):
+                yield bytes(view[start:start + step])
+            rest = data[usable:]
+        if rest:
+            yield rest
+
+    async def replay(self, play: Callable[[bytes, int, int], Awaitable[None]],
+                     on_segment: Optional[Callable[[dict, Optional[dict]], Awaitable[None]]] = None,
+                     max_gap_sec: float = 3.0):
+        """Play the segments in order, keeping the original gaps (up to ``max_gap_sec``)
+
+        ``play(pcm, sample_rate, channels)`` is expected to pace itself in real
+        time, as ``rtc.AudioSource.capture_frame`` does. Utterances that
+        overlapped in the debate (intros) are played one after another.
+        """
+        texts = {}
+        for entry in self.index["transcript"]:
+            texts.setdefault(entry["persona"], []).append(entry)
+        previous_end = None
+        for segment in sorted(self.segments, key=lambda s: s["start_sec"]):
+            if previous_end is not None:
+                gap = min(max(0.0, segment["start_sec"] - previous_end), max_gap_sec)
+                await asyncio.sleep(gap)
+            if on_segment:
+                # The transcript line this utterance belongs to: the next one said by the persona
+                spoken = texts.get(segment["persona"])
+                await on_segment(segment, spoken.pop(0) if spoken else None)
+            for pcm in self.frames(segment):
+                await play(pcm, segment["sample_rate"], segment["channels"])
+            previous_end = segment["start_sec"] + segment.get("duration_sec", 0.0)
+
+
+def list_recordings(directory: Union[str, Path] = RECORDING_DIR) -> List[dict]:
+    """Summaries of every finished recording, newest first"""
+    summaries = []
+    for path in Path(directory).glob("*.drec"):
+        try:
+            with Recording(path) as recording:
+                summaries.append(recording.summary())
+        except (OSError, ValueError) as e:
+            print(f"Skipping recording {path.name}: {e}")
+    return sorted(summaries, key=lambda s: s.get("started_at") or "", reverse=True)
+
+
+def prune_recordings(max_age_sec: float, directory: Union[str, Path] = RECORDING_DIR) -> List[str]:
+    """Delete recordings (finished or abandoned) last written more than ``max_age_sec`` ago"""
+    cutoff = time.time() - max_age_sec
+    removed = []
+    for path in list(Path(directory).glob("*.drec")) + list(Path(directory).glob("*.drec.part")):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed.append(path.name)
+        except OSError as e:
+            print(f"Could not prune recording {path.name}: {e}")
+    return removed
+
+
+def open_recording(recording_id: str, directory: Union[str, Path] = RECORDING_DIR) -> Optional[Recording]:
+    path = recording_path(recording_id, directory)
+    return Recording(path) if path.exists() else None
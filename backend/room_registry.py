@@ -0,0 +1,220 @@
+"""
+Room registry of the API process.
+
+``create_if_absent`` is atomic, so when concurrent ``/join`` requests arrive
+for a new room, exactly one of them wins and starts its agent. Rooms expire
+after a TTL, and ended debates are cleaned up after a short retention period.
+
+Backends: ``memory`` and ``sqlite:///path/to/rooms.db``, which keeps the rooms
+across API restarts. The deployment runs a single API process (see
+``API_LOCK_FILE`` in main.py), since the agent pool and admission control are
+per process.
+"""
+
+import abc, json, time, sqlite3, threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class RoomRegistry(abc.ABC):
+    # Whether calls do disk I/O or wait on locks, and so belong off the event loop
+    blocking = False
+
+    @abc.abstractmethod
+    def create_if_absent(self, room: str, details: dict, ttl_sec: float) -> bool:
+        """Register ``room``; False if it already exists (and hasn't expired)"""
+
+    @abc.abstractmethod
+    def get(self, room: str) -> Optional[dict]:
+        ...
+
+    @abc.abstractmethod
+    def update(self, room: str, **fields) -> bool:
+        ...
+
+    def mark_ended(self, room: str, status: str = "finished", **fields) -> bool:
+        return self.update(room, status=status, ended_at=time.time(), **fields)
+
+    def end_unfinished(self, status: str = "failed", error: Optional[str] = None) -> List[str]:
+        """Mark every room whose debate hasn't ended as ended with ``status``
+
+        Used at API start-up: the agents of rooms still queued or running
+        belonged to the previous API process and are gone.
+        """
+        ended = [room for room, details in self.list().items() if not details.get("ended_at")]
+        for room in ended:
+            self.mark_ended(room, status=status, error=error)
+        return ended
+
+    @abc.abstractmethod
+    def delete(self, room: str) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def list(self) -> Dict[str, dict]:
+        ...
+
+    @abc.abstractmethod
+    def cleanup(self, ended_retention_sec: float = 300) -> List[str]:
+        """Drop expired rooms and rooms whose debate ended a while ago"""
+
+
+class MemoryRoomRegistry(RoomRegistry):
+    def __init__(self):
+        self._rooms: Dict[str, dict] = {}
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, room: str, now: float) -> bool:
+        return room in self._rooms and self._expires[room] > now
+
+    def create_if_absent(self, room: str, details: dict, ttl_sec: float) -> bool:
+        now = time.time()
+        with self._lock:
+            if self._live(room, now):
+                return False
+            self._rooms[room] = dict(details)
+            self._expires[room] = now + ttl_sec
+            return True
+
+    def get(self, room: str) -> Optional[dict]:
+        with self._lock:
+            return dict(self._rooms[room]) if self._live(room, time.time()) else None
+
+    def update(self, room: str, **fields) -> bool:
+        with self._lock:
+            if room not in self._rooms:
+                return False
+            self._rooms[room].update(fields)
+            return True
+
+    def delete(self, room: str) -> bool:
+        with self._lock:
+            self._expires.pop(room, None)
+            return self._rooms.pop(room, None) is not None
+
+    def list(self) -> Dict[str, dict]:
+        now = time.time()
+        with self._lock:
+            return {room: dict(d) for room, d in self._rooms.items() if self._expires[room] > now}
+
+    def cleanup(self, ended_retention_sec: float = 300) -> List[str]:
+        now = time.time()
+        with self._lock:
+            stale = [
+                room for room, details in self._rooms.items()
+                if self._expires[room] <= now
+                or (details.get("ended_at") and details["ended_at"] + ended_retention_sec <= now)
+            ]
+            for room in stale:
+                del self._rooms[room]
+                del self._expires[room]
+        return stale
+
+
+class SQLiteRoomRegistry(RoomRegistry):
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rooms (
+                    room       TEXT PRIMARY KEY,
+                    details    TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    ended_at   REAL
+                )
+            """)
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets API workers read while another writes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create_if_absent(self, room: str, details: dict, ttl_sec: float) -> bool:
+        now = time.time()
+        conn = self._conn()
+        # Most joins are for a room that already exists: answer those with a plain read
+        if conn.execute("SELECT 1 FROM rooms WHERE room = ? AND expires_at > ?", (room, now)).fetchone():
+            return False
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM rooms WHERE room = ? AND expires_at <= ?", (room, now))
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO rooms (room, details, expires_at) VALUES (?, ?, ?)",
+                (room, json.dumps(details), now + ttl_sec),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cur.rowcount == 1
+
+    def get(self, room: str) -> Optional[dict]:
+        row = self._conn().execute(
+            "SELECT details FROM rooms WHERE room = ? AND expires_at > ?", (room, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, room: str, **fields) -> bool:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT details FROM rooms WHERE room = ?", (room,)).fetchone()
+            if row:
+                details = {**json.loads(row[0]), **fields}
+                conn.execute(
+                    "UPDATE rooms SET details = ?, ended_at = ? WHERE room = ?",
+                    (json.dumps(details), details.get("ended_at"), room),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row is not None
+
+    def delete(self, room: str) -> bool:
+        cur = self._conn().execute("DELETE FROM rooms WHERE room = ?", (room,))
+        return cur.rowcount == 1
+
+    def list(self) -> Dict[str, dict]:
+        rows = self._conn().execute(
+            "SELECT room, details FROM rooms WHERE expires_at > ? ORDER BY room", (time.time(),)
+        ).fetchall()
+        return {room: json.loads(details) for room, details in rows}
+
+    def cleanup(self, ended_retention_sec: float = 300) -> List[str]:
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            stale = [row[0] for row in conn.execute(
+                "SELECT room FROM rooms WHERE expires_at <= ? OR (ended_at IS NOT NULL AND ended_at <= ?)",
+                (now, now - ended_retention_sec),
+            )]
+            conn.executemany("DELETE FROM rooms WHERE room = ?", [(room,) for room in stale])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return stale
+
+
+def make_registry(url: str) -> RoomRegistry:
+    """``memory`` or ``sqlite:///path/to/rooms.db`` (relative paths are relative to the backend dir)"""
+    if url == "memory":
+        return MemoryRoomRegistry()
+    if url.startswith("sqlite:///"):
+        path = Path(url[len("sqlite:///"):])
+        if not path.is_absolute():
+            path = Path(__file__).parent / path
+        return SQLiteRoomRegistry(path)
+    raise ValueError(f"Unsupported ROOM_REGISTRY: {url}")
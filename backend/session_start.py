@@ -0,0 +1,58 @@
+"""
+Concurrent start-up of a debate's persona sessions.
+
+Sessions start in parallel, at most ``concurrency`` at a time, each bounded by
+a timeout. A persona whose session fails or times out is dropped and the
+debate goes on with the others. When only one session transcribes the human
+(``coalesce_stt``) and that one fails, the first persona that did start is
+restarted as the listener: a session started without audio input can't turn
+it on later.
+
+Kept free of livekit imports so it runs against the benchmark fakes.
+"""
+
+import time, asyncio
+from typing import Awaitable, Callable, List
+
+
+async def start_sessions(personas: List[str], start: Callable[[str, bool], Awaitable], concurrency: int = 3,
+                         timeout_sec: float = 20.0, coalesce_stt: bool = True) -> list:
+    """Sessions of the personas that started, in persona order
+
+    ``start(name, listen)`` starts one persona's session; it should close a
+    half-started session when it fails or is cancelled.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    started = time.perf_counter()
+
+    async def start_one(name: str, listen: bool):
+        async with semaphore:
+            t0 = time.perf_counter()
+            try:
+                session = await asyncio.wait_for(start(name, listen), timeout_sec)
+            except asyncio.TimeoutError:
+                print(f"Session for {name} timed out after {timeout_sec}s")
+                raise
+            except Exception as e:
+                print(f"Session for {name} failed after {time.perf_counter() - t0:.2f}s: {e}")
+                raise
+            print(f"Session created for {name} in {time.perf_counter() - t0:.2f}s")
+            return session
+
+    results = await asyncio.gather(
+        *(start_one(name, listen=not coalesce_stt or i == 0) for i, name in enumerate(personas)),
+        return_exceptions=True,
+    )
+    sessions = [r for r in results if not isinstance(r, BaseException)]
+    if sessions and not any(s.current_agent.listens for s in sessions):
+        deaf = sessions[0]
+        name = deaf.current_agent.name
+        try:
+            sessions[0] = await asyncio.wait_for(start(name, True), timeout_sec)
+        except Exception as e:
+            print(f"Restarting {name} to transcribe the human failed: {e}")
+        else:
+            await deaf.close()
+            print(f"{name} now transcribes the human")
+    print(f"Started {len(sessions)}/{len(personas)} persona sessions in {time.perf_counter() - started:.2f}s")
+    return sessions
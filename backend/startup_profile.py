@@ -0,0 +1,73 @@
+"""
+Startup cost accounting for agent processes.
+
+Plugin imports and model loads go through ``timed_import`` / ``timed_load``,
+which record how long each took and how much it grew the process RSS. An
+agent worker started with ``--profile-startup`` prints this report and exits,
+so the cold-start cost of scaling workers up from zero can be measured and
+compared. Import times are inclusive: a module's entry also covers any
+dependency that nothing earlier had imported.
+"""
+
+import os, sys, time, resource, importlib
+
+# Module -> {"import_sec", "rss_delta_mb"} and model -> {"load_sec", "rss_delta_mb"}, in load order
+import_report: dict = {}
+load_report: dict = {}
+
+
+def rss_mb() -> float:
+    """Current resident memory of this process in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        # No procfs (macOS): fall back to the peak RSS, reported in bytes there
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def timed_import(module: str):
+    """Import ``module``, recording its cost the first time it is imported"""
+    if module in sys.modules:
+        return sys.modules[module]
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    imported = importlib.import_module(module)
+    import_report[module] = {
+        "import_sec": round(time.perf_counter() - started, 3),
+        "rss_delta_mb": round(rss_mb() - rss_before, 1),
+    }
+    return imported
+
+
+def timed_load(name: str, loader):
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    model = loader()
+    load_report[name] = {
+        "load_sec": round(time.perf_counter() - started, 3),
+        "rss_delta_mb": round(rss_mb() - rss_before, 1),
+    }
+    return model
+
+
+def report(started: float) -> dict:
+    """Everything recorded so far, with the total since ``started`` (a ``time.perf_counter()`` value)"""
+    return {
+        "total_sec": round(time.perf_counter() - started, 3),
+        "rss_mb": round(rss_mb(), 1),
+        "imports": import_report,
+        "models": load_report,
+    }
+
+
+def format_report(data: dict) -> str:
+    lines = [f"{'step':<52} {'sec':>8} {'+MB':>8}"]
+    for name, stats in data["imports"].items():
+        lines.append(f"{'import ' + name:<52} {stats['import_sec']:>8.3f} {stats['rss_delta_mb']:>8.1f}")
+    for name, stats in data["models"].items():
+        lines.append(f"{'load ' + name:<52} {stats['load_sec']:>8.3f} {stats['rss_delta_mb']:>8.1f}")
+    lines.append(f"{'total':<52} {data['total_sec']:>8.3f} {data['rss_mb']:>7.1f}M")
+    return "\n".join(lines)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for debate admission control
+"""
+
+from admission import AdmissionController, parse_budgets
+from debate_job import DEFAULT_PERSONAS, DebateJob
+
+
+def test_rooms_run_then_queue_then_get_rejected():
+    started = []
+    ctl = AdmissionController(max_debates=2, max_pending=2, avg_debate_sec=100)
+    decisions = [ctl.request(f"r{i}", 3, lambda i=i: started.append(f"r{i}")) for i in range(5)]
+
+    assert [d.status for d in decisions] == ["running", "running", "queued", "queued", "rejected"]
+    assert started == ["r0", "r1"]
+    assert decisions[2].queue_position == 1 and decisions[3].queue_position == 2
+    assert 0 < decisions[2].estimated_start_sec <= 100
+    assert decisions[4].retry_after_sec >= 1
+
+    # A finished debate lets the head of the queue start, and everyone moves up
+    ctl.release("r0")
+    assert started == ["r0", "r1", "r2"]
+    assert ctl.status("r3").queue_position == 1
+    assert ctl.stats()["totals"] == {"started": 3, "queued": 2, "rejected": 1}
+
+
+def test_provider_budgets_limit_concurrent_streams():
+    started = []
+    ctl = AdmissionController(max_debates=10, provider_budgets=parse_budgets("stt=5, tts=8"))
+    assert ctl.request("a", 3, lambda: started.append("a")).status == "running"
+    # 3 + 3 STT streams would exceed the budget of 5
+    assert ctl.request("b", 3, lambda: started.append("b")).status == "queued"
+    # Later rooms wait their turn even if they would fit
+    assert ctl.request("c", 1, lambda: started.append("c")).status == "queued"
+    assert ctl.stats()["provider_in_use"] == {"llm": 3, "stt": 3, "tts": 3}
+
+    ctl.release("a")
+    assert started == ["a", "b", "c"]
+
+
+def test_coalesced_stt_needs_one_stream_per_room():
+    ctl = AdmissionController(max_debates=10, provider_budgets=parse_budgets("stt=2"), coalesce_stt=True)
+    assert ctl.request("a", 3, lambda: None).status == "running"
+    assert ctl.request("b", 3, lambda: None).status == "running"
+    assert ctl.request("c", 3, lambda: None).status == "queued"
+    assert ctl.stats()["provider_in_use"] == {"llm": 6, "stt": 2, "tts": 6}
+
+
+def test_withdrawn_rooms_leave_the_queue_and_failed_starts_free_the_slot():
+    ctl = AdmissionController(max_debates=1, max_pending=5)
+
+    def broken():
+        raise RuntimeError("no pool")
+
+    assert ctl.request("a", 2, broken).status == "running"
+    # The failed start didn't keep the slot
+    assert ctl.request("b", 2, lambda: None).status == "running"
+    assert ctl.request("c", 2, lambda: None).status == "queued"
+    assert ctl.withdraw("c")
+    assert not ctl.withdraw("c")
+    assert ctl.status("c") is None
+
+
+def test_demand_counts_the_personas_the_agent_runs():
+    ctl = AdmissionController(max_debates=10)
+    # No personas: the agent runs the three defaults
+    default = DebateJob(room="a", personas=[])
+    assert default.personas == DEFAULT_PERSONAS
+    assert ctl.demand(len(default.personas)) == {"llm": 3, "stt": 3, "tts": 3}
+    # More than three: only the first three run
+    crowded = DebateJob(room="b", personas=[f"AI {i}" for i in range(5)])
+    assert crowded.personas == ["AI 0", "AI 1", "AI 2"]
+    assert DebateJob.from_dict(crowded.to_dict()).personas == crowded.personas
+
+
+def test_replay_takes_only_a_debate_slot():
+    started = []
+    ctl = AdmissionController(max_debates=2, provider_budgets=parse_budgets("llm=3, stt=3, tts=3"))
+    assert ctl.demand(0) == {"llm": 0, "stt": 0, "tts": 0}
+    assert ctl.request("live", 3, lambda: started.append("live")).status == "running"
+    # Every provider budget is used up, but a replay makes no provider calls
+    assert ctl.request("replay", 0, lambda: started.append("replay")).status == "running"
+    assert ctl.stats()["provider_in_use"] == {"llm": 3, "stt": 3, "tts": 3}
+    # It still counts against the debate limit
+    assert ctl.request("other", 0, lambda: started.append("other")).status == "queued"
+    assert started == ["live", "replay"]
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Tests for the warm agent worker pool, using a stub worker that speaks the
+pool protocol without importing livekit
+"""
+
+import asyncio
+import json
+import textwrap
+
+from agent_pool import AgentWorkerPool
+from debate_job import DebateJob
+
+STUB_WORKER = textwrap.dedent('''
+    import os, sys, json, time
+
+    def send(message):
+        sys.stdout.write(json.dumps(message) + "\\n")
+        sys.stdout.flush()
+
+    # Like agent_worker.py, rooms beyond --capacity are rejected until one finishes
+    capacity = int(sys.argv[sys.argv.index("--capacity") + 1])
+    running = set()
+
+    send({"type": "ready", "pid": os.getpid(), "warmup_sec": 0})
+    for line in sys.stdin:
+        message = json.loads(line)
+        if message["type"] == "ping":
+            if not os.environ.get("STUB_HANG"):
+                send({"type": "pong", "room": None})
+        elif message["type"] == "assign":
+            ids = {"assignment": message["assignment"], "room": message["room"]}
+            if os.environ.get("STUB_REJECT") or len(running) >= capacity:
+                send({"type": "rejected", **ids, "error": "worker at capacity"})
+                continue
+            if os.environ.get("STUB_JOB_LOG"):
+                with open(os.environ["STUB_JOB_LOG"], "a") as log:
+                    log.write(json.dumps(message["job"]) + "\\n")
+            send({"type": "started", **ids})
+            print(f"debating in {message['room']}", file=sys.stderr, flush=True)
+            if os.environ.get("STUB_HOLD_DEBATES"):
+                running.add(message["assignment"])
+            else:
+                send({"type": "finished", **ids, "ok": True, "status": "finished", "error": None})
+        elif message["type"] == "cancel":
+            if os.environ.get("STUB_SLOW_CANCEL"):
+                time.sleep(float(os.environ["STUB_SLOW_CANCEL"]))
+            running.discard(message["assignment"])
+            send({"type": "event", "assignment": message["assignment"], "room": message["room"],
+                  "event": {"type": "transcript", "text": "late"}})
+            send({"type": "finished", "assignment": message["assignment"], "room": message["room"], "ok": False,
+                  "status": message["reason"], "error": message["reason"]})
+        elif message["type"] == "shutdown":
+            break
+''')
+
+
+def make_pool(tmp_path, **kwargs) -> AgentWorkerPool:
+    script = tmp_path / "stub_worker.py"
+    script.write_text(STUB_WORKER)
+    return AgentWorkerPool(script=script, **kwargs)
+
+
+async def wait_for(predicate, timeout=5.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def test_assign_records_wait_time(tmp_path):
+    events = []
+
+    async def scenario():
+        pool = make_pool(tmp_path, size=2, on_event=lambda room, event: events.append(event))
+        await pool.start()
+        try:
+            for i in range(4):
+                await pool.assign(DebateJob(room=f"room-{i}"), "wss://test", "token")
+            stats = pool.stats()
+            assert stats["room_wait_sec"]["count"] == 4
+            assert stats["workers"] == 2
+        finally:
+            await pool.stop()
+
+    asyncio.run(scenario())
+    spawns = [e for e in events if e["type"] == "worker_ready"]
+    assert len(spawns) == 2 and all(e["spawn_sec"] > 0 for e in spawns)
+
+
+def test_workers_recycled_after_max_debates(tmp_path):
+    async def scenario():
+        pool = make_pool(tmp_path, size=1, max_debates_per_worker=2)
+        await pool.start()
+        try:
+            first_pid = next(iter(pool.workers))
+            await pool.assign(DebateJob(room="room-a"), "wss://test", "token")
+            await pool.assign(DebateJob(room="room-b"), "wss://test", "token")
+            await wait_for(lambda: pool.recycled == 1 and pool.workers and first_pid not in pool.workers)
+            # The replacement worker picks up the next room
+            await asyncio.wait_for(pool.assign(DebateJob(room="room-c"), "wss://test", "token"), 5)
+        finally:
+            await pool.stop()
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_room_burst_keeps_jobs_separate(tmp_path, monkeypatch):
+    job_log = tmp_path / "jobs.jsonl"
+    monkeypatch.setenv("STUB_JOB_LOG", str(job_log))
+
+    async def scenario():
+        pool = make_pool(tmp_path, size=3)
+        await pool.start()
+        try:
+            jobs = [
+                DebateJob(room=f"room-{i}", topic=f"topic-{i}", personas=[f"AI {i}"], total_rounds=i)
+                for i in range(20)
+            ]
+            await asyncio.gather(*(pool.assign(job, "wss://test", "token") for job in jobs))
+            await wait_for(lambda: job_log.exists() and len(job_log.read_text().splitlines()) == 20)
+        finally:
+            await pool.stop()
+
+    asyncio.run(scenario())
+    received = [DebateJob.from_dict(json.loads(line)) for line in job_log.read_text().splitlines()]
+    for job in received:
+        i = int(job.room.split("-")[1])
+        assert job.topic == f"topic-{i}"
+        assert job.personas == [f"AI {i}"]
+        assert job.total_rounds == i
+
+
+def test_worker_capacity_limits_concurrent_debates(tmp_path, monkeypatch):
+    monkeypatch.setenv("STUB_HOLD_DEBATES", "1")
+
+    async def scenario():
+        pool = make_pool(tmp_path, size=1, capacity=3)
+        await pool.start()
+        try:
+            for i in range(3):
+                await asyncio.wait_for(pool.assign(DebateJob(room=f"room-{i}"), "wss://test", "token"), 5)
+            assert pool.stats()["active_debates"] == 3
+            # A fourth room has to wait for a slot to free up
+            overflow = asyncio.create_task(pool.assign(DebateJob(room="room-3"), "wss://test", "token"))
+            await asyncio.sleep(0.2)
+            assert not overflow.done()
+            overflow.cancel()
+        finally:
+            await pool.stop(timeout=1.0)
+
+    asyncio.run(scenario())
+
+
+def test_queued_room_takes_the_slot_of_a_finished_debate(tmp_path, monkeypatch):
+    monkeypatch.setenv("STUB_HOLD_DEBATES", "1")
+    ended = []
+
+    async def scenario():
+        pool = make_pool(tmp_path, size=1, capacity=1,
+                         on_room_ended=lambda room, status, error: ended.append((room, status)))
+        await pool.start()
+        try:
+            await pool.assign(DebateJob(room="room-a"), "wss://test", "token")
+            queued = asyncio.create_task(pool.assign(DebateJob(room="room-b"), "wss://test", "token"))
+            await asyncio.sleep(0.1)
+            assert not queued.done()
+            assert await pool.cancel("room-a")
+            await asyncio.wait_for(queued, 5)
+            await asyncio.sleep(0.2)
+            # The worker had already freed room-a's capacity, so it accepted room-b
+            assert ended == [] and pool.stats()["debates"]["cancelled"] == 1
+            assert pool.stats()["debates"]["running"] == 1
+        finally:
+            await pool.stop(timeout=1.0)
+
+    asyncio.run(scenario())
+
+
+def test_cancel_and_wall_clock_limit_end_debates(tmp_path, monkeypatch):
+    monkeypatch.setenv("STUB_HOLD_DEBATES", "1")
+    ended = []
+
+    async def scenario():
+        pool = make_pool(tmp_path, size=1, capacity=2, max_debate_sec=0.3,
+                         on_room_ended=lambda room, status, error: ended.append((room, status)))
+        await pool.start()
+        try:
+            await pool.assign(DebateJob(room="deleted"), "wss://test", "token")
+            await pool.assign(DebateJob(room="endless"), "wss://test", "token")
+            assert await pool.cancel("deleted")
+            assert not await pool.cancel("deleted")
+            assert not await pool.cancel("unknown")
+            await wait_for(lambda: pool.stats()["debates"]["running"] == 0)
+            stats = pool.stats()["debates"]
+            assert stats["cancelled"] == 1 and stats["timed_out"] == 1
+        finally:
+            await pool.stop(timeout=1.0)
+
+    asyncio.run(scenario())
+    # The caller of cancel() ended the deleted room itself
+    assert ended == [("endless", "timed_out")]
+
+
+def test_worker_logs_forwarded_and_crashes_counted(tmp_path, monkeypatch):
+    monkeypatch.setenv("STUB_HOLD_DEBATES", "1")
+    ended = []
+
+    async def scenario():
+        pool = make_pool(tmp_path, size=1, on_room_ended=lambda room, status, error: ended.append((room, status)))
+        await pool.start()
+        try:
+            await pool.assign(DebateJob(room="room-a"), "wss://test", "token")
+            worker = next(iter(pool.workers.values()))
+            await wait_for(lambda: "debating in room-a" in worker.log_tail)
+            worker.proc.kill()
+            await wait_for(lambda: ended == [("room-a", "failed")])
+            assert pool.stats()["debates"]["failed"] == 1
+        finally:
+            await pool.stop(timeout=1.0)
+
+    asyncio.run(scenario())
+
+
+def test_unhealthy_worker_ends_its_rooms(tmp_path, monkeypatch):
+    monkeypatch.setenv("STUB_HOLD_DEBATES", "1")
+    monkeypatch.setenv("STUB_HANG", "1")
+    ended = []
+
+    async def scenario():
+        pool = make_pool(tmp_path, size=1, capacity=2, health_interval=0.05, health_timeout=0.05,
+                         on_room_ended=lambda room, status, error: ended.append((room, status, error)))
+        await pool.start()
+        try:
+            await pool.assign(DebateJob(room="room-a"), "wss://test", "token")
+            await pool.assign(DebateJob(room="room-b"), "wss://test", "token")
+            await wait_for(lambda: len(ended) == 2)
+            assert pool.stats()["debates"]["failed"] == 2 and pool.replaced_unhealthy >= 1
+        finally:
+            await pool.stop(timeout=1.0)
+
+    asyncio.run(scenario())
+    assert sorted(ended) == [("room-a", "failed", "agent worker unhealthy"),
+                             ("room-b", "failed", "agent worker unhealthy")]
+
+
+def test_rejected_assignment_ends_the_room(tmp_path, monkeypatch):
+    monkeypatch.setenv("STUB_REJECT", "1")
+    ended = []
+
+    async def scenario():
+        pool = make_pool(tmp_path, size=1, on_room_ended=lambda room, status, error: ended.append((room, status)))
+        await pool.start()
+        try:
+            await pool.assign(DebateJob(room="room-a"), "wss://test", "token")
+            await wait_for(lambda: ended)
+            assert pool.stats()["debates"]["running"] == 0
+            # The slot was given back
+            await asyncio.wait_for(pool.assign(DebateJob(room="room-b"), "wss://test", "token"), 5)
+        finally:
+            await pool.stop(timeout=1.0)
+
+    asyncio.run(scenario())
+    assert ended[0] == ("room-a", "failed")
+
+
+def test_room_joined_again_after_delete_survives_the_late_end(tmp_path, monkeypatch):
+    monkeypatch.setenv("STUB_HOLD_DEBATES", "1")
+    monkeypatch.setenv("STUB_SLOW_CANCEL", "0.3")
+    ended = []
+
+    async def scenario():
+        pool = make_pool(tmp_path, size=1, capacity=1,
+                         on_room_ended=lambda room, status, error: ended.append((room, status)))
+        await pool.start()
+        try:
+            await pool.assign(DebateJob(room="room-a"), "wss://test", "token")
+            assert await pool.cancel("room-a")
+            # Joined again at once: the new assignment waits for the old debate's slot
+            await asyncio.wait_for(pool.assign(DebateJob(room="room-a"), "wss://test", "token"), 5)
+            await asyncio.sleep(0.1)
+            assert ended == [] and pool.stats()["debates"]["running"] == 1
+            assert pool.stats()["debates"]["cancelled"] == 1
+            # The new debate is still the room's current one
+            assert await pool.cancel("room-a")
+        finally:
+            await pool.stop(timeout=1.0)
+
+    asyncio.run(scenario())
+
+
+def test_reused_room_ignores_the_earlier_debate(tmp_path, monkeypatch):
+    monkeypatch.setenv("STUB_HOLD_DEBATES", "1")
+    monkeypatch.setenv("STUB_SLOW_CANCEL", "0.4")
+    ended, events = [], []
+
+    async def scenario():
+        pool = make_pool(tmp_path, size=1, capacity=2, max_debate_sec=0.5,
+                         on_room_ended=lambda room, status, error: ended.append((room, status)),
+                         on_event=lambda room, event: events.append(event))
+        await pool.start()
+        try:
+            await pool.assign(DebateJob(room="room-a"), "wss://test", "token")
+            # Deleted and joined again before the worker reports the first debate cancelled
+            assert await pool.cancel("room-a")
+            await asyncio.sleep(0.2)
+            await pool.assign(DebateJob(room="room-a"), "wss://test", "token")
+            await asyncio.sleep(0.4)
+            # The first debate's cancellation (at 0.4s) and its wall-clock timer (0.5s)
+            # didn't touch the new one (due at 0.7s)
+            assert ended == [] and pool.stats()["debates"]["running"] == 1
+            assert pool.stats()["debates"]["cancelled"] == 1
+            assert not [e for e in events if e.get("type") == "transcript"]
+            await wait_for(lambda: ended == [("room-a", "timed_out")])
+        finally:
+            await pool.stop(timeout=1.0)
+
+    asyncio.run(scenario())
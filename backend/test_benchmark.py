@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline benchmark harness and its fake providers
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from bench_fakes import FakeAgent, FakeChatContext, FakeLLM, FakeSession, FakeTTS, gaps_between
+from benchmark import check_gates, percentiles
+from transcript import DebateTranscript
+from turn_pipeline import TurnPrefetcher, pipelined_turn
+from turn_scheduler import TurnScheduler
+
+
+def make_session(llm=None, chars_per_sec=400.0) -> FakeSession:
+    return FakeSession(
+        FakeAgent("AI Tesla", "You are Tesla."),
+        llm or FakeLLM(ttft_sec=0.05, inter_token_sec=0.0, sentences=2, seed=1),
+        FakeTTS(ttfb_sec=0.02, chars_per_sec=chars_per_sec, frame_ms=20),
+    )
+
+
+def test_pipelined_turn_against_fakes_reports_latencies():
+    items = []
+
+    async def scenario():
+        session = make_session()
+        session.on("conversation_item_added", lambda ev: items.append((ev.item.role, ev.item.text_content)))
+        timings = await pipelined_turn(session, session.llm, "AI Tesla", 1)
+        return session, timings
+
+    session, timings = asyncio.run(scenario())
+    d = timings.as_dict()
+    assert 0.04 <= d["ttft_sec"] < d["ttfa_sec"] <= d["total_sec"]
+    assert len(session.playouts) == 1
+    assert items and items[0][0] == "assistant" and items[0][1].endswith(".")
+
+
+def test_next_draft_answers_the_turn_still_playing_out():
+    transcript = DebateTranscript("AI")
+    transcript.add("AI Gandhi", "Tea, in moderation.", 1)
+    finals = []
+
+    async def scenario():
+        tesla = make_session()
+        gandhi_llm = FakeLLM(ttft_sec=0.0, inter_token_sec=0.0, sentences=1, seed=2)
+        gandhi = FakeSession(FakeAgent("AI Gandhi", "You are Gandhi."), gandhi_llm, FakeTTS(frame_ms=20))
+        prefetcher = TurnPrefetcher(gandhi_llm)
+
+        def on_text(text):
+            # As the debate loop does: context with the pending turn, then the draft
+            finals.append((text, len(tesla.playouts)))
+            messages, _ = transcript.context_messages("AI Gandhi", pending=("AI Tesla", text))
+            gandhi.current_agent.chat_ctx = FakeChatContext(messages)
+            prefetcher.prefetch(gandhi, "AI Gandhi")
+
+        await pipelined_turn(tesla, tesla.llm, "AI Tesla", 2, on_text)
+        assert await prefetcher.take("AI Gandhi")
+        return gandhi_llm.contexts
+
+    contexts = asyncio.run(scenario())
+    (text, finished_playouts), = finals
+    # The text was final before the turn's audio had played out
+    assert finished_playouts == 0
+    assert contexts[-1].items[-2:] == [
+        {"role": "assistant", "content": "Tea, in moderation."},
+        {"role": "user", "content": f"AI Tesla: {text}"},
+    ]
+
+
+def test_scheduler_interrupts_long_fake_speech():
+    events = []
+
+    async def scenario():
+        # ~2s of speech per reply, but turns are capped at 0.3s
+        session = make_session(chars_per_sec=100.0)
+        scheduler = TurnScheduler(max_turn_sec=0.3, min_gap_sec=0.0)
+        scheduler.listeners.append(events.append)
+        await asyncio.wait_for(scheduler.run_turn(session, lambda: pipelined_turn(session, session.llm, "AI Tesla", 1)), 2)
+
+    asyncio.run(scenario())
+    assert events[0]["reason"] == "max_duration"
+
+
+def test_human_interjection_emits_user_events_and_stt_delay():
+    seen = []
+
+    async def scenario():
+        session = make_session()
+        for event in ("user_state_changed", "metrics_collected", "conversation_item_added"):
+            session.on(event, lambda ev, event=event: seen.append(event))
+        await session.hear_user("Objection!", 0.01)
+
+    asyncio.run(scenario())
+    assert seen == ["user_state_changed", "user_state_changed", "metrics_collected", "conversation_item_added"]
+
+
+def test_session_without_audio_input_does_not_transcribe():
+    seen = []
+
+    async def scenario():
+        deaf = FakeSession(FakeAgent("AI Gandhi", "You are Gandhi.", listens=False), FakeLLM(), FakeTTS())
+        deaf.on("conversation_item_added", seen.append)
+        await deaf.hear_user("Objection!", 0.01)
+        # Started without audio input: enabling it later does nothing
+        deaf.input.set_audio_enabled(True)
+        await deaf.hear_user("Objection!", 0.01)
+
+        listening = FakeSession(FakeAgent("AI Tesla", "You are Tesla."), FakeLLM(), FakeTTS())
+        listening.on("conversation_item_added", seen.append)
+        listening.input.set_audio_enabled(False)
+        await listening.hear_user("Objection!", 0.01)
+        listening.input.set_audio_enabled(True)
+        await listening.hear_user("Objection!", 0.01)
+        return deaf, listening
+
+    deaf, listening = asyncio.run(scenario())
+    assert deaf.stt.transcriptions == 0
+    assert listening.stt.transcriptions == 1 and len(seen) == 1
+
+
+def test_gaps_ignore_overlapping_speech():
+    # Two intros overlap, then two turns with 0.5s and 0.25s of silence before them
+    playouts = [(0.0, 2.0), (0.5, 1.5), (2.5, 4.0), (4.25, 5.0)]
+    assert gaps_between(playouts) == [0.5, 0.25]
+
+
+def test_percentiles_and_gates():
+    stats = percentiles([i / 100 for i in range(1, 101)])
+    assert stats["p50"] == 0.51 and stats["p95"] == 0.96 and stats["p99"] == 1.0
+    assert percentiles([])["p95"] is None
+
+    report = {"join": {"join_sec": {"p95": 0.08}, "errors": 0},
+              "debates": {"turn_gap_sec": {"p95": 0.4}, "spawn_to_first_audio_sec": {"p95": None}, "failed": 1}}
+    args = SimpleNamespace(max_join_p95_ms=50, max_first_audio_p95_ms=1000, max_gap_p95_ms=500)
+    failures = check_gates(report, args)
+    assert len(failures) == 2
+    assert "join_sec" in failures[0] and "failed" in failures[1]
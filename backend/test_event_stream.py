@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-room live event fan-out
+"""
+
+import json
+import asyncio
+
+import pytest
+
+from event_stream import EventHub, RoomStream, SlowConsumer
+
+
+def parse(message: str) -> dict:
+    fields = dict(line.split(": ", 1) for line in message.strip().splitlines())
+    return {"id": int(fields["id"]), "event": fields["event"], "data": json.loads(fields["data"])}
+
+
+async def collect(stream: RoomStream, after=None) -> list:
+    return [parse(m) async for m in stream.subscribe(after)]
+
+
+def test_every_subscriber_gets_buffered_and_live_events():
+    async def scenario():
+        stream = RoomStream("room-1", size=8)
+        stream.publish({"type": "turn_start", "persona": "AI Tesla", "round": 1})
+        subscribers = [asyncio.create_task(collect(stream)) for _ in range(3)]
+        await asyncio.sleep(0)
+        stream.publish({"type": "transcript", "persona": "AI Tesla", "text": "Coffee.", "round": 1})
+        stream.publish({"type": "debate_finished", "status": "finished"})
+        stream.close()
+        return await asyncio.gather(*subscribers), stream
+
+    results, stream = asyncio.run(scenario())
+    for events in results:
+        assert [e["event"] for e in events] == ["turn_start", "transcript", "debate_finished"]
+        assert [e["id"] for e in events] == [0, 1, 2]
+    assert events[1]["data"]["text"] == "Coffee."
+    assert stream.subscribers == 0
+
+
+def test_resume_after_last_event_id():
+    async def scenario():
+        stream = RoomStream("room-1", size=8)
+        for n in range(5):
+            stream.publish({"type": "transcript", "text": str(n)})
+        stream.close()
+        return await collect(stream, after=2)
+
+    assert [e["data"]["text"] for e in asyncio.run(scenario())] == ["3", "4"]
+
+
+def test_slow_consumer_is_dropped_when_the_buffer_wraps():
+    async def scenario():
+        stream = RoomStream("room-1", size=4)
+        stream.publish({"type": "turn_start"})
+        subscription = stream.subscribe()
+        await subscription.__anext__()
+        # Six more events while the subscriber doesn't read: its cursor is overwritten
+        for _ in range(6):
+            stream.publish({"type": "transcript"})
+        with pytest.raises(SlowConsumer):
+            await subscription.__anext__()
+        return stream
+
+    stream = asyncio.run(scenario())
+    assert stream.dropped == 1 and stream.subscribers == 0
+
+
+def test_hub_sse_heartbeats_and_drop_notice():
+    async def scenario():
+        hub = EventHub(buffer_size=2)
+        sse = hub.sse("room-1", heartbeat_sec=0.01)
+        heartbeat = await sse.__anext__()
+        for _ in range(4):
+            hub.publish("room-1", {"type": "transcript"})
+        dropped = await sse.__anext__()
+        hub.discard("room-1")
+        return heartbeat, dropped, hub
+
+    heartbeat, dropped, hub = asyncio.run(scenario())
+    assert heartbeat.startswith(":")
+    assert dropped.startswith("event: dropped")
+    assert hub.rooms == {}
+
+
+def test_late_events_do_not_reopen_a_discarded_room():
+    hub = EventHub()
+    assert hub.publish("room-1", {"type": "turn_start"}, create=False) is None
+    assert hub.rooms == {}
+    hub.stream("room-1")
+    assert hub.publish("room-1", {"type": "turn_start"}, create=False) == 0
+    hub.discard("room-1")
+    assert hub.publish("room-1", {"type": "transcript"}, create=False) is None
+    assert hub.rooms == {}
@@ -118,6 +118,16 @@ def test_environment_variables():
     
     return True
 
+def test_persona_table_maps_frontend_ids():
+    """Frontend IDs map to backend personas; unknown names pass through"""
+    from debate_job import map_personas
+
+    print("\nTesting persona table...")
+    assert map_personas(["socrates", "jobs", "AI Custom"]) == ["AI Socrates", "AI Steve Jobs", "AI Custom"]
+    print("✅ Persona table maps frontend IDs")
+    return True
+
+
 def main():
     """Run all tests"""
     print("🧪 Testing Multi-AI Debate Backend Integration")
@@ -126,7 +136,8 @@ def main():
     tests = [
         test_persona_mapping,
         test_configuration_passing,
-        test_environment_variables
+        test_environment_variables,
+        test_persona_table_maps_frontend_ids,
     ]
     
     passed = 0
@@ -151,4 +162,4 @@ def main():
 
 if __name__ == "__main__":
     success = main()
-    sys.exit(0 if success else 1) 
\ No newline at end of file
+    sys.exit(0 if success else 1) 
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for the Prometheus-style metrics registry
+"""
+
+import metrics
+from metrics import Registry
+
+
+def test_histogram_and_counter_render_in_exposition_format():
+    registry = Registry()
+    latency = registry.histogram("join_seconds", "Join latency", buckets=(0.1, 1.0))
+    created = registry.counter("rooms_created", "Rooms created")
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(None)  # missing timings are skipped
+    created.inc()
+    created.inc(2)
+
+    text = registry.render()
+    assert "# TYPE join_seconds histogram" in text
+    assert 'join_seconds_bucket{le="0.1"} 1' in text
+    assert 'join_seconds_bucket{le="1"} 2' in text
+    assert 'join_seconds_bucket{le="+Inf"} 2' in text
+    assert "join_seconds_sum 0.55" in text
+    assert "join_seconds_count 2" in text
+    assert "rooms_created_total 3" in text
+
+
+def test_labels_escaped_and_room_series_removed():
+    registry = Registry()
+    ttft = registry.histogram("ttft_seconds", "TTFT")
+    ttft.observe(0.3, room='a"b', persona="AI Tesla")
+    ttft.observe(0.3, room="other", persona="AI Tesla")
+    assert 'room="a\\"b"' in registry.render()
+
+    registry.remove(room='a"b')
+    assert ttft.count(room='a"b', persona="AI Tesla") == 0
+    assert ttft.count(room="other", persona="AI Tesla") == 1
+
+
+def test_agent_events_feed_pipeline_histograms():
+    turn = {"type": "turn_end", "persona": "AI Socrates", "ttft_sec": 0.4, "ttfa_sec": 0.9, "gap_before_sec": 0.6}
+    metrics.observe_agent_event("metrics-room", turn)
+    metrics.observe_agent_event("metrics-room", {"type": "stt", "transcription_delay_sec": 0.2})
+    metrics.observe_agent_event(None, {"type": "worker_ready", "spawn_sec": 3.5})
+
+    assert metrics.LLM_TTFT.count(room="metrics-room", persona="AI Socrates") == 1
+    assert metrics.TTS_TTFA.count(room="metrics-room", persona="AI Socrates") == 1
+    assert metrics.TURN_GAP.count(room="metrics-room") == 1
+    assert metrics.STT_LATENCY.count(room="metrics-room") == 1
+    assert metrics.AGENT_SPAWN.count() >= 1
+    metrics.REGISTRY.remove(room="metrics-room")
+    assert 'room="metrics-room"' not in metrics.REGISTRY.render()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for latency-aware LLM routing, failover and hedging
+"""
+
+import asyncio
+
+from bench_fakes import FakeLLM
+from model_router import ModelRouter, ModelStats
+from turn_pipeline import generate_text
+
+
+class BrokenLLM(FakeLLM):
+    def chat(self, chat_ctx=None, **kwargs):
+        self.calls += 1
+        raise ConnectionError("provider down")
+
+
+def test_routes_prefer_the_purpose_model_and_skip_slow_ones():
+    router = ModelRouter({"big": FakeLLM(), "small": FakeLLM()},
+                         {"intro": ["small", "big"], "turn": ["big"]}, target_ttft_sec=1.0)
+    assert router.candidates("intro") == ["small", "big"]
+    assert router.candidates("turn") == ["big", "small"]
+
+    for _ in range(5):
+        router.stats["big"].record(2.5)
+        router.stats["small"].record(0.4)
+    # "big" usually misses the target now, so turns go to "small" first
+    assert router.candidates("turn") == ["small", "big"]
+    # ...unless this debate's target is looser
+    assert router.candidates("turn", target_ttft_sec=3.0) == ["big", "small"]
+
+
+def test_failing_model_fails_over_and_is_degraded():
+    broken, backup = BrokenLLM(), FakeLLM(ttft_sec=0.01, inter_token_sec=0.0, seed=1)
+    router = ModelRouter({"broken": broken, "backup": backup}, {"turn": ["broken", "backup"]})
+
+    async def scenario():
+        return [await generate_text(router.route("turn"), None) for _ in range(4)]
+
+    replies = asyncio.run(scenario())
+    assert all(replies)
+    # Three failures in a row put "broken" in cooldown; the fourth call went straight to the backup
+    assert broken.calls == 3 and backup.calls == 4
+    assert router.counts["failovers"] == 3
+    assert not router.stats["broken"].healthy
+    assert router.candidates("turn") == ["backup", "broken"]
+
+
+def test_slow_first_token_is_hedged():
+    slow, fast = FakeLLM(ttft_sec=1.0, inter_token_sec=0.0, seed=1), FakeLLM(ttft_sec=0.01, inter_token_sec=0.0, seed=2)
+    router = ModelRouter({"slow": slow, "fast": fast}, {"turn": ["slow", "fast"]}, target_ttft_sec=0.05)
+
+    async def scenario():
+        route = router.route("turn")
+        async with route.chat(chat_ctx=None) as stream:
+            text = "".join([chunk.delta.content async for chunk in stream])
+        return stream.model, text
+
+    model, text = asyncio.run(asyncio.wait_for(scenario(), 0.5))
+    assert model == "fast" and text
+    assert router.counts["hedged"] == 1 and router.counts["hedge_won"] == 1
+    # The slow request was cancelled, and counts as slow rather than failed
+    assert router.stats["slow"].error_rate() == 0.0 and router.stats["slow"].ttft() >= 0.05
+
+
+def test_model_stats_window():
+    stats = ModelStats(window=4)
+    for ttft in (0.1, 0.2, 0.3, 0.4, 0.5):
+        stats.record(ttft)
+    assert stats.ttft(0.5) == 0.4 and len(stats.samples) == 4
+    stats.record_error()
+    assert stats.error_rate() == 0.25 and stats.healthy
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for voicing several personas through one shared session
+"""
+
+import asyncio
+
+from bench_fakes import FakeAgent, FakeChatContext, FakeLLM, FakeSession, FakeTTS, gaps_between
+from multi_voice import MultiVoiceSession
+from transcript import DebateTranscript
+from turn_pipeline import pipelined_turn
+from turn_scheduler import TurnScheduler
+
+
+def make_voices(chars_per_sec=400.0):
+    llm = FakeLLM(ttft_sec=0.02, inter_token_sec=0.0, sentences=2, seed=1)
+    session = FakeSession(FakeAgent("AI Tesla", "You are Tesla."), llm, FakeTTS(ttfb_sec=0.01, chars_per_sec=chars_per_sec))
+    shared = MultiVoiceSession(session)
+    tesla = shared.voice(session.current_agent, session.tts, llm)
+    gandhi = shared.voice(FakeAgent("AI Gandhi", "You are Gandhi.", listens=False, detached=True),
+                          FakeTTS(ttfb_sec=0.01, chars_per_sec=chars_per_sec), llm)
+    return session, tesla, gandhi
+
+
+def test_turns_are_attributed_to_the_speaking_persona():
+    items = []
+
+    async def scenario():
+        session, tesla, gandhi = make_voices()
+        for voice in (tesla, gandhi):
+            voice.on("conversation_item_added",
+                     lambda ev, name=voice.current_agent.name: items.append((name, ev.item.role, ev.item.text_content)))
+        timings = await pipelined_turn(gandhi, gandhi.llm, "AI Gandhi", 1)
+        await session.hear_user("What about the evidence?", 0.01)
+        return session, gandhi, timings
+
+    session, gandhi, timings = asyncio.run(scenario())
+    assert timings.first_audio is not None
+    # Gandhi's words were rendered with Gandhi's TTS, through the one session
+    assert gandhi.tts.characters > 0 and session.tts.characters == 0
+    assert [(name, role) for name, role, _ in items] == [("AI Gandhi", "assistant"), ("AI Tesla", "user")]
+    assert items[0][2].endswith(".")
+
+
+def test_personas_take_the_floor_one_at_a_time():
+    async def scenario():
+        session, tesla, gandhi = make_voices()
+        await asyncio.gather(tesla.say("I am Tesla. Electricity is the future."),
+                             gandhi.say("I am Gandhi. Truth is my God."))
+        return session
+
+    session = asyncio.run(scenario())
+    assert len(session.playouts) == 2
+    (_, first_end), (second_start, _) = sorted(session.playouts)
+    assert second_start >= first_end
+    assert len(gaps_between(session.playouts)) == 1
+
+
+def test_interrupting_a_voice_stops_the_shared_session():
+    events = []
+
+    async def scenario():
+        session, tesla, gandhi = make_voices(chars_per_sec=50.0)
+        scheduler = TurnScheduler(max_turn_sec=0.2, min_gap_sec=0.0)
+        scheduler.listeners.append(events.append)
+        # Tesla isn't speaking, so interrupting him leaves Gandhi alone
+        tesla.interrupt()
+        await asyncio.wait_for(scheduler.run_turn(gandhi, lambda: pipelined_turn(gandhi, gandhi.llm, "AI Gandhi", 1)), 2)
+        return gandhi
+
+    gandhi = asyncio.run(scenario())
+    assert events[0]["reason"] == "max_duration"
+    assert gandhi.agent_state == "listening"
+
+
+def test_every_persona_replies_with_its_own_prompt():
+    async def scenario():
+        session, tesla, gandhi = make_voices()
+        transcript = DebateTranscript("Tea or coffee?")
+        transcript.add("Human", "Tea or coffee?", 1)
+        for voice in (tesla, gandhi):
+            # As apply_debate_context does: only a session re-inserts its own agent's instructions
+            agent = voice.current_agent
+            messages, _ = transcript.context_messages(agent.name, prompt=agent.prompt if agent.detached else None)
+            history = FakeChatContext()
+            for message in messages:
+                history.add_message(**message)
+            await agent.update_chat_ctx(history)
+            await pipelined_turn(voice, voice.llm, voice.current_agent.name, 1)
+        return tesla.llm.contexts
+
+    contexts = asyncio.run(scenario())
+    systems = [[i["content"] for i in ctx.items if i["role"] == "system"] for ctx in contexts]
+    assert systems == [["You are Tesla."], ["You are Gandhi."]]
+
+
+def test_detached_agent_has_no_instructions_without_a_prompt_in_its_context():
+    # The fake mirrors Agent: instructions alone never reach the LLM unless a session runs the agent
+    assert FakeAgent("AI Gandhi", "You are Gandhi.").chat_ctx.items == []
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the debate recording format, its streaming writer and replay
+"""
+
+import os
+import time
+import asyncio
+
+import recording
+from bench_fakes import FakeAudioFrame, tone
+from recording import Recording, list_recordings, open_recording, prune_recordings, start_recording
+
+
+async def frames_of(pcm: bytes, sample_rate: int = 8000, frame_ms: int = 100):
+    step = sample_rate * frame_ms // 1000 * 2
+    for offset in range(0, len(pcm), step):
+        yield FakeAudioFrame(pcm[offset:offset + step], sample_rate, 1)
+
+
+async def record_debate(directory) -> tuple:
+    recorder = start_recording("room-1", {"topic": "Tea or coffee?", "personas": ["AI Tesla", "AI Gandhi"]}, directory)
+    tesla, gandhi = tone(2.5, 8000), tone(0.5, 8000, frequency=440.0)
+    recorder.round = 1
+    async for _ in recording.tap("AI Tesla", frames_of(tesla)):
+        pass
+    recorder.add_text("AI Tesla", "Coffee powers invention.", 1)
+    recorder.add_event({"type": "turn_end", "persona": "AI Tesla", "ttft_sec": 0.3})
+    recorder.add_event({"type": "turn_gap", "waited_sec": 0.5})
+    # Already tapped audio isn't recorded twice
+    async for _ in recording.tap("AI Gandhi", recorder.tap("AI Gandhi", frames_of(gandhi))):
+        pass
+    recorder.add_text("AI Gandhi", "Tea, in moderation.", 1)
+    await recorder.close()
+    return recorder, tesla, gandhi
+
+
+def test_recording_round_trip(tmp_path):
+    recorder, tesla, gandhi = asyncio.run(record_debate(tmp_path))
+    assert recording.current_recorder.get() is None
+    assert not list(tmp_path.glob("*.part"))
+
+    with open_recording(recorder.id, tmp_path) as rec:
+        assert rec.index["topic"] == "Tea or coffee?"
+        assert [s["persona"] for s in rec.segments] == ["AI Tesla", "AI Gandhi"]
+        # 2.5s of audio in 1s chunks
+        assert len(rec.segments[0]["chunks"]) == 3 and rec.segments[0]["duration_sec"] == 2.5
+        assert b"".join(rec.pcm(rec.segments[0])) == tesla
+        assert b"".join(rec.frames(rec.segments[1])) == gandhi
+        assert [t["persona"] for t in rec.index["turns"]] == ["AI Tesla"]
+        assert rec.summary()["audio_sec"] == 3.0
+
+    listed = list_recordings(tmp_path)
+    assert [r["id"] for r in listed] == [recorder.id]
+    assert open_recording("missing", tmp_path) is None
+
+
+def test_replay_plays_segments_in_order_with_their_text(tmp_path):
+    recorder, tesla, gandhi = asyncio.run(record_debate(tmp_path))
+    played, lines = [], []
+
+    async def play(pcm, sample_rate, channels):
+        played.append((pcm, sample_rate, channels))
+
+    async def on_segment(segment, line):
+        lines.append((segment["persona"], line["text"] if line else None))
+
+    with Recording(recording.recording_path(recorder.id, tmp_path)) as rec:
+        asyncio.run(rec.replay(play, on_segment, max_gap_sec=0.0))
+
+    assert lines == [("AI Tesla", "Coffee powers invention."), ("AI Gandhi", "Tea, in moderation.")]
+    assert b"".join(pcm for pcm, _, _ in played) == tesla + gandhi
+    # 20 ms frames at 8 kHz mono
+    assert {len(pcm) for pcm, _, _ in played} == {320}
+
+
+def test_incomplete_recordings_are_not_listed(tmp_path):
+    (tmp_path / "broken.drec").write_bytes(recording.MAGIC + b"no index here")
+    assert list_recordings(tmp_path) == []
+
+
+def test_recordings_of_the_same_room_get_distinct_ids(tmp_path):
+    async def record_twice():
+        first = start_recording("room-1", {}, tmp_path)
+        second = start_recording("room-1", {}, tmp_path)
+        await first.close()
+        await second.close()
+        return first, second
+
+    first, second = asyncio.run(record_twice())
+    assert first.id != second.id
+    assert len(list_recordings(tmp_path)) == 2
+
+
+def test_old_recordings_are_pruned(tmp_path):
+    old, new = tmp_path / "old.drec", tmp_path / "new.drec"
+    abandoned = tmp_path / "crashed.drec.part"
+    for path in (old, new, abandoned):
+        path.write_bytes(recording.MAGIC)
+    week_ago = time.time() - 7 * 86400
+    os.utime(old, (week_ago, week_ago))
+    os.utime(abandoned, (week_ago, week_ago))
+    assert sorted(prune_recordings(86400, tmp_path)) == ["crashed.drec.part", "old.drec"]
+    assert [p.name for p in tmp_path.iterdir()] == ["new.drec"]
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared room registry
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from room_registry import MemoryRoomRegistry, SQLiteRoomRegistry, make_registry
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def registry(request, tmp_path):
+    if request.param == "memory":
+        return MemoryRoomRegistry()
+    return SQLiteRoomRegistry(tmp_path / "rooms.db")
+
+
+def test_create_if_absent_has_exactly_one_winner(registry):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: registry.create_if_absent("r1", {"worker": i}, ttl_sec=60), range(16)))
+    assert results.count(True) == 1
+    assert list(registry.list()) == ["r1"]
+
+
+def test_winner_is_shared_between_sqlite_connections(tmp_path):
+    # Two API workers opening the same database file
+    a = SQLiteRoomRegistry(tmp_path / "rooms.db")
+    b = SQLiteRoomRegistry(tmp_path / "rooms.db")
+    assert a.create_if_absent("r1", {"topic": "AI"}, ttl_sec=60)
+    assert not b.create_if_absent("r1", {"topic": "AI"}, ttl_sec=60)
+    b.update("r1", agent_wait_sec=0.2)
+    assert a.get("r1") == {"topic": "AI", "agent_wait_sec": 0.2}
+
+
+def test_unfinished_rooms_end_after_a_restart(tmp_path):
+    before = SQLiteRoomRegistry(tmp_path / "rooms.db")
+    before.create_if_absent("running", {"status": "running"}, ttl_sec=60)
+    before.create_if_absent("queued", {"status": "queued"}, ttl_sec=60)
+    before.create_if_absent("done", {"status": "running"}, ttl_sec=60)
+    before.mark_ended("done")
+
+    # A new API process opening the same database
+    after = SQLiteRoomRegistry(tmp_path / "rooms.db")
+    assert sorted(after.end_unfinished(error="API restarted")) == ["queued", "running"]
+    assert after.get("running")["status"] == "failed" and after.get("running")["error"] == "API restarted"
+    assert after.get("done")["status"] == "finished"
+    assert after.end_unfinished() == []
+
+
+def test_joining_an_existing_room_takes_no_write_lock(tmp_path):
+    a = SQLiteRoomRegistry(tmp_path / "rooms.db")
+    b = SQLiteRoomRegistry(tmp_path / "rooms.db")
+    assert a.create_if_absent("r1", {}, ttl_sec=60)
+    writer = b._conn()
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.perf_counter()
+        assert not a.create_if_absent("r1", {}, ttl_sec=60)
+        # Answered while another connection holds the write lock, instead of waiting on it
+        assert time.perf_counter() - started < 1.0
+    finally:
+        writer.execute("ROLLBACK")
+
+
+def test_expired_rooms_can_be_recreated_and_are_cleaned_up(registry):
+    assert registry.create_if_absent("old", {}, ttl_sec=0.01)
+    assert registry.create_if_absent("live", {}, ttl_sec=60)
+    time.sleep(0.02)
+    assert registry.get("old") is None
+    assert list(registry.list()) == ["live"]
+    assert registry.cleanup() == ["old"]
+    assert registry.create_if_absent("old", {}, ttl_sec=60)
+
+
+def test_ended_rooms_kept_for_retention_period(registry):
+    registry.create_if_absent("r1", {}, ttl_sec=60)
+    registry.create_if_absent("r2", {}, ttl_sec=60)
+    assert registry.mark_ended("r1", status="failed")
+    assert registry.get("r1")["status"] == "failed"
+    assert registry.cleanup(ended_retention_sec=60) == []
+    assert registry.cleanup(ended_retention_sec=0) == ["r1"]
+    assert not registry.delete("r1")
+    assert registry.delete("r2")
+    assert registry.list() == {}
+
+
+def test_make_registry_urls(tmp_path):
+    assert isinstance(make_registry("memory"), MemoryRoomRegistry)
+    assert isinstance(make_registry(f"sqlite:///{tmp_path}/rooms.db"), SQLiteRoomRegistry)
+    with pytest.raises(ValueError):
+        make_registry("redis://localhost")
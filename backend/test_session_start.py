@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for concurrent persona session start-up, with fake sessions
+"""
+
+import asyncio
+
+from bench_fakes import FakeAgent, FakeLLM, FakeSession, FakeTTS
+from session_start import start_sessions
+
+
+class Starter:
+    """start(name, listen) with per-persona delays and failures, tracking concurrency"""
+
+    def __init__(self, delays=None, failures=()):
+        self.delays = delays or {}
+        self.failures = set(failures)
+        self.running = 0
+        self.max_running = 0
+        self.calls = []
+        self.cancelled = []
+
+    async def __call__(self, name: str, listen: bool) -> FakeSession:
+        self.calls.append((name, listen))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delays.get(name, 0.05))
+            if (name, listen) in self.failures or name in self.failures:
+                raise RuntimeError(f"{name} could not connect")
+            return FakeSession(FakeAgent(name, f"You are {name}.", listens=listen), FakeLLM(), FakeTTS())
+        except asyncio.CancelledError:
+            self.cancelled.append(name)
+            raise
+        finally:
+            self.running -= 1
+
+
+def names(sessions) -> list:
+    return [s.current_agent.name for s in sessions]
+
+
+def test_concurrency_is_limited():
+    starter = Starter()
+    personas = [f"AI {i}" for i in range(5)]
+    sessions = asyncio.run(start_sessions(personas, starter, concurrency=2, coalesce_stt=False))
+    assert names(sessions) == personas
+    assert starter.max_running == 2
+
+
+def test_slow_session_is_dropped_at_the_timeout():
+    starter = Starter(delays={"AI Tesla": 5.0})
+    sessions = asyncio.run(start_sessions(["AI Socrates", "AI Tesla", "AI Gandhi"], starter, timeout_sec=0.2))
+    assert names(sessions) == ["AI Socrates", "AI Gandhi"]
+    # The timed-out start was cancelled, so it can close its half-started session
+    assert starter.cancelled == ["AI Tesla"]
+
+
+def test_debate_goes_on_without_a_failed_persona():
+    starter = Starter(failures={"AI Gandhi"})
+    sessions = asyncio.run(start_sessions(["AI Socrates", "AI Gandhi", "AI Tesla"], starter))
+    assert names(sessions) == ["AI Socrates", "AI Tesla"]
+    # Only the first persona transcribes the human
+    assert [s.current_agent.listens for s in sessions] == [True, False]
+
+
+def test_first_started_persona_becomes_the_listener_when_the_listener_fails():
+    starter = Starter(failures={("AI Socrates", True)})
+    sessions = asyncio.run(start_sessions(["AI Socrates", "AI Gandhi", "AI Tesla"], starter))
+    assert names(sessions) == ["AI Gandhi", "AI Tesla"]
+    assert [s.current_agent.listens for s in sessions] == [True, False]
+    assert starter.calls[-1] == ("AI Gandhi", True)
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Tests for the startup import / model load accounting
+"""
+
+import sys
+
+import startup_profile
+from startup_profile import format_report, report, timed_import, timed_load
+
+
+def test_timed_import_records_first_import_only():
+    sys.modules.pop("colorsys", None)
+    startup_profile.import_report.pop("colorsys", None)
+    module = timed_import("colorsys")
+    assert module.__name__ == "colorsys"
+    assert startup_profile.import_report["colorsys"]["import_sec"] >= 0.0
+    # Already imported modules cost nothing more and aren't reported
+    assert timed_import("json") is sys.modules["json"]
+    assert "json" not in startup_profile.import_report
+
+
+def test_report_covers_imports_and_model_loads():
+    started = startup_profile.time.perf_counter()
+    assert timed_load("fake_model", lambda: "weights") == "weights"
+    data = report(started)
+    assert "fake_model" in data["models"] and data["rss_mb"] > 0
+    text = format_report(data)
+    assert "load fake_model" in text and text.splitlines()[-1].startswith("total")
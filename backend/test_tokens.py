@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for access token signing and caching
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+
+from tokens import HS256Signer, TokenCache
+
+
+def decode(token: str):
+    def part(segment):
+        return json.loads(base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4)))
+
+    header, payload, signature = token.split(".")
+    return part(header), part(payload), signature
+
+
+def test_signer_produces_a_valid_hs256_jwt():
+    token = HS256Signer("secret").sign({"sub": "alice", "video": {"room": "r1"}})
+    header, payload, signature = decode(token)
+    assert header == {"alg": "HS256", "typ": "JWT"}
+    assert payload == {"sub": "alice", "video": {"room": "r1"}}
+    signing_input = token.rsplit(".", 1)[0].encode()
+    expected = base64.urlsafe_b64encode(hmac.new(b"secret", signing_input, hashlib.sha256).digest()).rstrip(b"=")
+    assert signature == expected.decode()
+
+
+def test_cache_reuses_tokens_per_room_identity_and_grants():
+    cache = TokenCache("devkey", "secret", ttl_sec=3600)
+    token = cache.issue("r1", "alice")
+    assert cache.issue("r1", "alice") == token
+    assert cache.issue("r2", "alice") != token
+    assert cache.issue("r1", "alice", can_publish=False) != token
+    _, payload, _ = decode(token)
+    assert payload["iss"] == "devkey" and payload["sub"] == "alice"
+    assert payload["exp"] - payload["nbf"] == 3600
+    assert payload["video"] == {"room": "r1", "roomJoin": True, "canPublish": True, "canSubscribe": True}
+    assert cache.stats()["hits"] == 1
+
+
+def test_tokens_close_to_expiry_are_reissued_and_cache_is_bounded():
+    # Every token is already inside the refresh margin when issued
+    cache = TokenCache("devkey", "secret", ttl_sec=60, refresh_margin_sec=120, max_entries=2)
+    cache.issue("r1", "alice")
+    cache.issue("r1", "alice")
+    assert cache.stats()["hits"] == 0
+
+    for user in ("bob", "carol", "dave"):
+        cache.issue("r1", user)
+    assert cache.stats()["entries"] == 2
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for per-debate span timelines
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import tracing
+from turn_pipeline import TurnTimings
+
+
+def test_spans_recorded_across_subtasks_and_readable_as_chrome_trace(tmp_path):
+    async def intro(persona):
+        with tracing.span("intro_say", lane=persona):
+            await asyncio.sleep(0.01)
+
+    async def debate():
+        timeline = tracing.start_timeline("room/1", tmp_path)
+        try:
+            with tracing.span("connect"):
+                await asyncio.sleep(0.01)
+            await asyncio.gather(intro("AI Tesla"), intro("AI Gandhi"))
+        finally:
+            timeline.close()
+
+    asyncio.run(debate())
+    # Unsafe characters in the room name don't escape the timeline directory
+    assert tracing.latest_timeline_path("room/1", tmp_path).parent == tmp_path / "room_1"
+
+    trace = tracing.read_timeline("room/1", "chrome", tmp_path)
+    spans = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    lanes = {e["args"]["name"]: e["tid"] for e in trace["traceEvents"] if e["name"] == "thread_name"}
+    assert [s["name"] for s in spans] == ["connect", "intro_say", "intro_say"]
+    assert {s["tid"] for s in spans[1:]} == {lanes["AI Tesla"], lanes["AI Gandhi"]}
+    assert all(s["dur"] >= 10_000 for s in spans)  # microseconds
+
+
+def test_turn_split_into_llm_tts_and_playout(tmp_path):
+    timeline = tracing.Timeline("r", tmp_path / "r.jsonl")
+    tracing.current_timeline.set(timeline)
+    try:
+        timings = TurnTimings(persona="AI Socrates", round=2, mode="pipelined", started=10.0)
+        timings.first_token, timings.first_audio, timings.ended = 10.5, 11.0, 14.0
+        tracing.record_turn(timings)
+    finally:
+        tracing.current_timeline.set(None)
+        timeline.close()
+
+    events = [json.loads(line) for line in (tmp_path / "r.jsonl").read_text().splitlines()]
+    durations = {e["name"]: e["dur"] for e in events if e["ph"] == "X"}
+    assert durations == {"turn": 4_000_000, "llm": 500_000, "tts": 500_000, "playout": 3_000_000}
+
+
+def test_spans_without_a_timeline_are_no_ops(tmp_path):
+    with tracing.span("connect"):
+        pass
+    assert tracing.read_timeline("missing", directory=tmp_path) is None
+
+
+def test_reused_room_keeps_earlier_timelines_until_pruned(tmp_path):
+    for assignment in ("a1", "a2"):
+        timeline = tracing.start_timeline("room", tmp_path, run_id=assignment)
+        with tracing.span(f"connect-{assignment}"):
+            pass
+        timeline.close()
+    tracing.current_timeline.set(None)
+
+    paths = sorted((tmp_path / "room").glob("*.jsonl"))
+    assert [p.name.split("-")[-1] for p in paths] == ["a1.jsonl", "a2.jsonl"]
+    # The endpoint serves the latest debate's timeline
+    assert "connect-a2" in tracing.read_timeline("room", directory=tmp_path)
+
+    old = time.time() - 3600
+    os.utime(paths[0], (old, old))
+    assert tracing.prune_timelines(60, tmp_path) == [f"room/{paths[0].name}"]
+    assert [p.name for p in (tmp_path / "room").glob("*.jsonl")] == [paths[1].name]
+    os.utime(paths[1], (old, old))
+    tracing.prune_timelines(60, tmp_path)
+    assert not (tmp_path / "room").exists()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared, token-budgeted debate transcript
+"""
+
+import asyncio
+
+from transcript import DebateTranscript, estimate_tokens
+
+ARGUMENT = "This is my considered argument on the matter at hand. " * 4
+
+
+def test_recent_turns_verbatim_with_roles_per_persona():
+    transcript = DebateTranscript("AI", budget_tokens=1000, keep_recent=4)
+    transcript.add("AI Socrates", "What is knowledge?", 1)
+    transcript.add("AI Einstein", "Imagination matters more.", 1)
+    messages, _ = transcript.context_messages("AI Socrates")
+    assert messages == [
+        {"role": "assistant", "content": "What is knowledge?"},
+        {"role": "user", "content": "AI Einstein: Imagination matters more."},
+    ]
+    # A detached persona's prompt leads its context, counted as reserved tokens only
+    with_prompt, tokens = transcript.context_messages("AI Socrates", reserved_tokens=10, prompt="You are Socrates.")
+    assert with_prompt == [{"role": "system", "content": "You are Socrates."}] + messages
+    assert tokens == transcript.context_messages("AI Socrates", reserved_tokens=10)[1]
+    # A turn still playing out comes after the recorded ones
+    pending, _ = transcript.context_messages("AI Socrates", pending=("AI Trump", "Tremendous question. "))
+    assert pending == messages + [{"role": "user", "content": "AI Trump: Tremendous question."}]
+
+
+def test_prompt_size_stays_flat_as_rounds_grow():
+    transcript = DebateTranscript("AI", budget_tokens=400, keep_recent=4)
+    sizes = []
+    for round_number in range(1, 21):
+        for persona in ("AI Socrates", "AI Einstein", "AI Trump"):
+            transcript.add(persona, f"Round {round_number}. {ARGUMENT}", round_number)
+        _, tokens = transcript.context_messages("AI Socrates", reserved_tokens=50)
+        sizes.append(tokens)
+    assert max(sizes) <= 400
+    assert sizes[-1] <= sizes[4] + 20
+    # Older rounds survive only as one-line gists in the summary
+    assert "AI Trump: Round" in transcript.summary
+    assert estimate_tokens(transcript.summary) <= 400 // 3
+
+
+def test_llm_summary_replaces_compacted_gists():
+    async def summarize(text):
+        await asyncio.sleep(0)
+        return f"summary of {len(text.splitlines())} lines"
+
+    async def scenario():
+        transcript = DebateTranscript("AI", budget_tokens=2000, keep_recent=2, summarize=summarize)
+        for i in range(4):
+            transcript.add("AI Gandhi", f"Point {i}.", 1)
+        await transcript._compaction
+        return transcript
+
+    transcript = asyncio.run(scenario())
+    assert transcript.summary.startswith("summary of")
+    assert len(transcript.entries) == 2
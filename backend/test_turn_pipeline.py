@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for sentence chunking of streamed LLM output and next-turn prefetching
+"""
+
+import asyncio
+
+from turn_pipeline import SentenceChunker, TurnPrefetcher, TurnTimings
+
+
+def feed_all(chunker: SentenceChunker, pieces: list[str]) -> list[str]:
+    chunks = []
+    for piece in pieces:
+        chunks.extend(chunker.feed(piece))
+    tail = chunker.flush()
+    if tail:
+        chunks.append(tail)
+    return chunks
+
+
+def test_sentences_emitted_as_soon_as_they_end():
+    chunker = SentenceChunker(min_chars=5)
+    assert chunker.feed("Know thyself, my friend") == []
+    assert chunker.feed(". And then") == ["Know thyself, my friend."]
+    assert chunker.flush() == "And then"
+
+
+def test_token_stream_reassembles_text():
+    text = "Imagination is more important than knowledge. Knowledge is limited! Is it not? Indeed."
+    tokens = [text[i:i + 3] for i in range(0, len(text), 3)]
+    chunks = feed_all(SentenceChunker(min_chars=12), tokens)
+    assert chunks == [
+        "Imagination is more important than knowledge.",
+        "Knowledge is limited!",
+        "Is it not? Indeed.",
+    ]
+
+
+def test_decimal_points_do_not_split():
+    chunks = feed_all(SentenceChunker(min_chars=5), ["The value is 3.14 exactly. ", "Next."])
+    assert chunks == ["The value is 3.14 exactly.", "Next."]
+
+
+def test_long_run_on_text_breaks_on_clauses():
+    text = "we shall fight on the beaches, we shall fight on the landing grounds, we shall fight in the fields and in the streets"
+    chunks = feed_all(SentenceChunker(min_chars=10, max_chars=60), [text])
+    assert all(len(c) <= 60 for c in chunks)
+    assert " ".join(chunks) == text
+
+
+def test_turn_timings_relative_to_start():
+    timings = TurnTimings(persona="AI Tesla", round=1, mode="pipelined", started=100.0)
+    timings.first_token = 100.25
+    timings.first_audio = 100.5
+    timings.ended = 104.0
+    assert timings.as_dict() == {
+        "persona": "AI Tesla",
+        "round": 1,
+        "mode": "pipelined",
+        "ttft_sec": 0.25,
+        "ttfa_sec": 0.5,
+        "total_sec": 4.0,
+        "prompt_tokens": None,
+    }
+
+
+class FakeDelta:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeChunk:
+    def __init__(self, content):
+        self.delta = FakeDelta(content)
+
+
+class FakeStream:
+    def __init__(self, text):
+        self.text = text
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for word in self.text.split(" "):
+            await asyncio.sleep(0)
+            yield FakeChunk(word + " ")
+
+
+class FakeLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def chat(self, chat_ctx):
+        self.calls += 1
+        return FakeStream(f"{chat_ctx} reply {self.calls}.")
+
+
+class FakeAgent:
+    def __init__(self, name):
+        self.name = name
+        self.chat_ctx = f"context of {name}"
+
+
+class FakeSession:
+    def __init__(self, name):
+        self.current_agent = FakeAgent(name)
+
+
+def test_prefetcher_hits_and_misses():
+    async def scenario():
+        llm = FakeLLM()
+        prefetcher = TurnPrefetcher(llm)
+        prefetcher.prefetch(FakeSession("AI Gandhi"), "AI Gandhi")
+        assert await prefetcher.take("AI Gandhi") == "context of AI Gandhi reply 1."
+        assert await prefetcher.take("AI Tesla") is None
+        return prefetcher.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_prefetcher_regenerates_after_interjection():
+    async def scenario():
+        llm = FakeLLM()
+        prefetcher = TurnPrefetcher(llm)
+        prefetcher.prefetch(FakeSession("AI Gandhi"), "AI Gandhi")
+        prefetcher.invalidate("AI Gandhi")
+        text = await prefetcher.take("AI Gandhi")
+        return prefetcher, text
+
+    prefetcher, text = asyncio.run(scenario())
+    assert text == "context of AI Gandhi reply 1."
+    assert prefetcher.discarded == 1
+    assert prefetcher.hits == 1
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the event-driven turn scheduler
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from turn_pipeline import TurnTimings
+from turn_scheduler import TurnScheduler
+
+
+class FakeSession:
+    def __init__(self):
+        self.handlers = {}
+        self.interrupted = False
+
+    def on(self, event, callback):
+        self.handlers.setdefault(event, []).append(callback)
+
+    def fire(self, event, **fields):
+        for callback in self.handlers.get(event, []):
+            callback(SimpleNamespace(**fields))
+
+    def interrupt(self):
+        self.interrupted = True
+
+
+def make_speak(session, speech_sec):
+    async def speak():
+        timings = TurnTimings(persona="AI Socrates", round=1, mode="test")
+        timings.mark_first_audio()
+        try:
+            # An interrupted speech handle returns early
+            for _ in range(int(speech_sec * 100)):
+                if session.interrupted:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            timings.finish()
+        return timings
+    return speak
+
+
+def test_turn_ends_when_playout_finishes():
+    events = []
+
+    async def scenario():
+        session = FakeSession()
+        scheduler = TurnScheduler(max_turn_sec=5, min_gap_sec=0)
+        scheduler.listeners.append(events.append)
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        await scheduler.run_turn(session, make_speak(session, 0.05))
+        return loop.time() - t0, session.interrupted
+
+    elapsed, interrupted = asyncio.run(scenario())
+    assert elapsed < 1
+    assert not interrupted
+    assert events[0]["type"] == "turn_end"
+    assert events[0]["reason"] == "playout_finished"
+
+
+def test_turn_interrupted_at_max_duration():
+    events = []
+
+    async def scenario():
+        session = FakeSession()
+        scheduler = TurnScheduler(max_turn_sec=0.05, min_gap_sec=0)
+        scheduler.listeners.append(events.append)
+        await scheduler.run_turn(session, make_speak(session, 5))
+        return session.interrupted
+
+    assert asyncio.run(scenario())
+    assert events[0]["reason"] == "max_duration"
+
+
+def test_next_turn_waits_for_human_to_finish():
+    events = []
+
+    async def scenario():
+        session = FakeSession()
+        scheduler = TurnScheduler(max_turn_sec=5, min_gap_sec=0.01)
+        scheduler.listeners.append(events.append)
+        scheduler.watch(session)
+        session.fire("user_state_changed", new_state="speaking")
+        asyncio.get_running_loop().call_later(0.1, lambda: session.fire("user_state_changed", new_state="listening"))
+        await scheduler.wait_for_next_turn()
+
+    asyncio.run(scenario())
+    assert events[0]["type"] == "turn_gap"
+    assert events[0]["user_spoke"]
+    assert events[0]["waited_sec"] >= 0.1
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for the on-disk utterance cache
+"""
+
+import asyncio
+
+from bench_fakes import FakeTTS
+from utterance_cache import UtteranceCache, cache_key, normalize_topic, synthesize_and_store
+
+
+def test_topic_normalization_shares_keys():
+    assert normalize_topic("  The Future of AI? ") == normalize_topic("the future of   AI")
+    assert cache_key("intro", "AI Tesla", normalize_topic("AI!")) == cache_key("intro", "AI Tesla", "ai")
+
+
+def test_text_and_audio_round_trip_and_counters(tmp_path):
+    async def scenario():
+        cache = UtteranceCache(tmp_path)
+        assert await cache.get_text("k") is None
+        await cache.put_text("k", "I am Tesla.")
+        await cache.put_audio("k", 24000, 1, b"\x01\x00" * 480)
+        assert await cache.get_text("k") == "I am Tesla."
+        assert await cache.get_audio("k") == (24000, 1, b"\x01\x00" * 480)
+        return cache.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["hits"] == {"text": 1, "audio": 1}
+    assert stats["misses"] == {"text": 1, "audio": 0}
+
+
+def test_least_recently_used_evicted_and_index_survives_restart(tmp_path):
+    async def scenario():
+        cache = UtteranceCache(tmp_path, max_bytes=250)
+        await cache.put_text("a", "a" * 100)
+        await cache.put_text("b", "b" * 100)
+        await cache.get_text("a")  # b is now least recently used
+        await cache.put_text("c", "c" * 100)
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert not (tmp_path / "b.txt").exists()
+    assert (tmp_path / "a.txt").exists() and (tmp_path / "c.txt").exists()
+    assert UtteranceCache(tmp_path, max_bytes=250).stats()["bytes"] == 200
+
+
+def test_streamed_sentences_are_voiced_as_they_arrive_and_stored_whole(tmp_path):
+    async def sentences():
+        yield "I am Tesla."
+        yield "Current flows both ways."
+
+    async def scenario():
+        cache = UtteranceCache(tmp_path)
+        tts = FakeTTS(ttfb_sec=0.0, chars_per_sec=1000.0, sample_rate=8000)
+        spoken = asyncio.Queue()
+        frames = [f async for f in synthesize_and_store(tts, sentences(), cache, lambda text: cache_key(text), spoken)]
+        announced = [spoken.get_nowait() for _ in range(spoken.qsize())]
+        stored = await cache.get_audio(cache_key("I am Tesla. Current flows both ways."))
+
+        # Interrupted after the first frame: nothing is stored
+        partial = synthesize_and_store(tts, sentences(), cache, lambda text: cache_key("partial", text))
+        await partial.__anext__()
+        await partial.aclose()
+        return frames, announced, stored, cache.stats()["entries"]
+
+    frames, announced, stored, entries = asyncio.run(scenario())
+    assert announced == ["I am Tesla.", "Current flows both ways.", None]
+    assert stored == (8000, 1, b"".join(bytes(f.data) for f in frames))
+    assert entries == 2  # the complete utterance's .pcm and .json
@@ -0,0 +1,87 @@
+"""
+LiveKit access tokens for /join.
+
+Tokens are HS256 JWTs with LiveKit's claims (``video`` grants in camelCase,
+as ``livekit.api.AccessToken`` writes them). The signer precomputes everything that doesn't change
+between tokens (the encoded header and the keyed HMAC state), so issuing a
+token is one payload encode and one HMAC update. TokenCache hands out the same
+token again for the same (room, identity, grants) until it gets close to
+expiry, so a viewer rejoining, or thousands of viewers behind the same
+identity, don't cost a signature each.
+"""
+
+import hmac, json, time, base64, hashlib, threading
+from collections import OrderedDict
+from typing import Tuple
+
+
+def _b64(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+class HS256Signer:
+    def __init__(self, secret: str):
+        self._header = _b64(json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode())
+        self._mac = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+
+    def sign(self, payload: dict) -> str:
+        signing_input = self._header + b"." + _b64(json.dumps(payload, separators=(",", ":")).encode())
+        mac = self._mac.copy()
+        mac.update(signing_input)
+        return (signing_input + b"." + _b64(mac.digest())).decode()
+
+
+Grants = Tuple[Tuple[str, object], ...]
+
+
+class TokenCache:
+    def __init__(self, api_key: str, api_secret: str, ttl_sec: int = 2 * 3600,
+                 refresh_margin_sec: int = 600, max_entries: int = 50000):
+        self.api_key = api_key
+        self.signer = HS256Signer(api_secret)
+        self.ttl_sec = ttl_sec
+        # Reissue once a cached token has less than this left
+        self.refresh_margin_sec = refresh_margin_sec
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._tokens: "OrderedDict[tuple, Tuple[str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def issue(self, room: str, identity: str, can_publish: bool = True, can_subscribe: bool = True) -> str:
+        grants: Grants = (("room", room), ("roomJoin", True), ("canPublish", can_publish),
+                          ("canSubscribe", can_subscribe))
+        key = (room, identity, grants)
+        now = int(time.time())
+        with self._lock:
+            cached = self._tokens.get(key)
+            if cached and cached[1] - now > self.refresh_margin_sec:
+                self._tokens.move_to_end(key)
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+
+        expires = now + self.ttl_sec
+        token = self.signer.sign({
+            "iss": self.api_key,
+            "sub": identity,
+            "nbf": now,
+            "exp": expires,
+            "video": dict(grants),
+        })
+        with self._lock:
+            self._tokens[key] = (token, expires)
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > self.max_entries:
+                self._tokens.popitem(last=False)
+        return token
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": len(self._tokens),
+        }
+
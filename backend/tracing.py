@@ -0,0 +1,160 @@
+"""
+Per-debate latency timeline.
+
+Each debate records spans (connect, session starts, intros, every turn split
+into LLM, TTS and playout, and the gaps between turns) into a timeline file of
+JSON lines, one Chrome trace event per line, so a slow debate can be inspected
+afterwards without re-running it. ``chrome://tracing`` / Perfetto open the
+``{"traceEvents": [...]}`` form returned by ``read_timeline(..., "chrome")``.
+Each debate gets its own file under the room's directory, named by start time
+(and assignment id), so a reused room keeps its earlier timelines until they
+are pruned.
+
+The active timeline is held in a context variable, so code deep inside a
+debate (and the tasks it spawns) records spans without passing it around.
+"""
+
+import os, re, json, time, contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+TIMELINE_DIR = os.getenv("DEBATE_TIMELINE_DIR", str(Path(__file__).parent / ".cache" / "timelines"))
+
+_UNSAFE = re.compile(r"[^\w.-]")
+
+current_timeline: "contextvars.ContextVar[Optional[Timeline]]" = contextvars.ContextVar("current_timeline", default=None)
+
+
+def timeline_path(room: str, run_id: str, directory: Union[str, Path] = TIMELINE_DIR) -> Path:
+    return Path(directory) / _UNSAFE.sub("_", room) / f"{_UNSAFE.sub('_', run_id)}.jsonl"
+
+
+def latest_timeline_path(room: str, directory: Union[str, Path] = TIMELINE_DIR) -> Optional[Path]:
+    """The room's most recently started timeline, if it has one"""
+    paths = sorted(timeline_path(room, "_", directory).parent.glob("*.jsonl"))
+    return paths[-1] if paths else None
+
+
+class Timeline:
+    def __init__(self, room: str, path: Optional[Path] = None):
+        self.room = room
+        self.path = path
+        self.origin = time.perf_counter()
+        # Lane name -> Chrome trace thread id; each persona gets its own row
+        self._lanes: Dict[str, int] = {}
+        self._file = None
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(path, "w")
+        self._write({
+            "name": "process_name", "ph": "M", "pid": 1, "tid": 0,
+            "args": {"name": room, "started_at": datetime.now(timezone.utc).isoformat()},
+        })
+
+    def _write(self, event: dict):
+        if self._file is not None:
+            # Flushed per span so the timeline can be read while the debate runs
+            self._file.write(json.dumps(event) + "\n")
+            self._file.flush()
+
+    def _lane(self, lane: str) -> int:
+        if lane not in self._lanes:
+            self._lanes[lane] = len(self._lanes) + 1
+            self._write({"name": "thread_name", "ph": "M", "pid": 1, "tid": self._lanes[lane], "args": {"name": lane}})
+        return self._lanes[lane]
+
+    def add(self, name: str, start: float, end: float, lane: str = "debate", **args):
+        """Record a span from ``time.perf_counter()`` timestamps"""
+        self._write({
+            "name": name,
+            "ph": "X",
+            "pid": 1,
+            "tid": self._lane(lane),
+            "ts": round((start - self.origin) * 1e6),
+            "dur": round(max(0.0, end - start) * 1e6),
+            "args": args,
+        })
+
+    @contextmanager
+    def span(self, name: str, lane: str = "debate", **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter(), lane=lane, **args)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def start_timeline(room: str, directory: Union[str, Path, None] = TIMELINE_DIR,
+                   run_id: Optional[str] = None) -> Timeline:
+    """Create a timeline for the room's new debate and make it current for this task and its subtasks"""
+    # Start time first, so file names sort in the order the debates started
+    name = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f") + (f"-{run_id}" if run_id else "")
+    timeline = Timeline(room, timeline_path(room, name, directory) if directory else None)
+    current_timeline.set(timeline)
+    return timeline
+
+
+@contextmanager
+def span(name: str, lane: str = "debate", **args):
+    """Record a span in the current debate's timeline, if there is one"""
+    timeline = current_timeline.get()
+    if timeline is None:
+        yield
+        return
+    with timeline.span(name, lane=lane, **args):
+        yield
+
+
+def record_turn(timings, lane: Optional[str] = None):
+    """Split a finished turn into LLM, TTS and playout spans"""
+    timeline = current_timeline.get()
+    if timeline is None or timings.ended is None:
+        return
+    lane = lane or timings.persona
+    args = {"round": timings.round, "mode": timings.mode, "prompt_tokens": timings.prompt_tokens}
+    timeline.add("turn", timings.started, timings.ended, lane=lane, **args)
+    first_token = timings.first_token or timings.started
+    first_audio = timings.first_audio
+    if timings.first_token is not None:
+        timeline.add("llm", timings.started, first_token, lane=lane)
+    if first_audio is not None:
+        timeline.add("tts", first_token, first_audio, lane=lane)
+        timeline.add("playout", first_audio, timings.ended, lane=lane)
+
+
+def read_timeline(room: str, fmt: str = "jsonl", directory: Union[str, Path] = TIMELINE_DIR):
+    """The room's latest timeline as JSON lines text or a Chrome trace dict; None if there is none"""
+    path = latest_timeline_path(room, directory)
+    if path is None:
+        return None
+    text = path.read_text()
+    if fmt == "chrome":
+        return {"traceEvents": [json.loads(line) for line in text.splitlines() if line.strip()],
+                "displayTimeUnit": "ms"}
+    return text
+
+
+def prune_timelines(max_age_sec: float, directory: Union[str, Path] = TIMELINE_DIR) -> List[str]:
+    """Delete timelines last written more than ``max_age_sec`` ago, and room directories left empty"""
+    cutoff = time.time() - max_age_sec
+    removed = []
+    for path in Path(directory).glob("*/*.jsonl"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed.append(f"{path.parent.name}/{path.name}")
+        except OSError as e:
+            print(f"Could not prune timeline {path.name}: {e}")
+    for room_dir in Path(directory).glob("*/"):
+        try:
+            room_dir.rmdir()
+        except OSError:
+            pass  # Not empty
+    return removed
@@ -0,0 +1,128 @@
+"""
+Shared debate transcript.
+
+Every session in a room records into one transcript. Before each turn the
+speaker gets a context bounded to a token budget: its persona prompt, a rolling
+summary of older turns and as many recent turns verbatim as still fit. Turns
+that fall out of the verbatim window are folded into the summary incrementally
+(first sentence per turn, compacted by the LLM in the background when a
+summarizer is given), so prompt size stays flat as the debate goes on.
+"""
+
+import re, asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+# Rough token estimate; close enough for budgeting without a tokenizer dependency
+CHARS_PER_TOKEN = 4
+
+_FIRST_SENTENCE = re.compile(r"^(.+?[.!?])(\s|$)", re.S)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if text else 0
+
+
+@dataclass
+class TranscriptEntry:
+    speaker: str
+    text: str
+    round: int
+
+    def gist(self) -> str:
+        match = _FIRST_SENTENCE.match(self.text.strip())
+        sentence = match.group(1) if match else self.text.strip()
+        return f"{self.speaker}: {sentence}"
+
+
+class DebateTranscript:
+    def __init__(
+        self,
+        topic: str,
+        budget_tokens: int = 1500,
+        keep_recent: int = 6,
+        summarize: Optional[Callable[[str], Awaitable[str]]] = None,
+    ):
+        self.topic = topic
+        self.budget_tokens = budget_tokens
+        self.keep_recent = keep_recent
+        self.summarize = summarize
+        self.entries: List[TranscriptEntry] = []
+
+        # Summary = LLM-compacted head + gist lines not compacted yet
+        self._summary_head = ""
+        self._summary_tail: List[str] = []
+        self._compaction: Optional[asyncio.Task] = None
+
+    @property
+    def summary(self) -> str:
+        return "\n".join(filter(None, [self._summary_head, *self._summary_tail]))
+
+    def add(self, speaker: str, text: str, round_number: int):
+        text = text.strip()
+        if not text:
+            return
+        self.entries.append(TranscriptEntry(speaker, text, round_number))
+        if len(self.entries) > self.keep_recent:
+            evicted, self.entries = self.entries[:-self.keep_recent], self.entries[-self.keep_recent:]
+            self._fold(evicted)
+
+    def _fold(self, evicted: List[TranscriptEntry]):
+        self._summary_tail.extend(entry.gist() for entry in evicted)
+        if self.summarize is not None and (self._compaction is None or self._compaction.done()):
+            self._compaction = asyncio.create_task(self._compact())
+        # Until (or without) compaction, keep only the newest gist lines that fit
+        summary_budget = self.budget_tokens // 3
+        while self._summary_tail and estimate_tokens(self.summary) > summary_budget:
+            self._summary_tail.pop(0)
+
+    async def _compact(self):
+        lines = list(self._summary_tail)
+        snapshot = self.summary
+        try:
+            compacted = (await self.summarize(snapshot)).strip()
+        except Exception as e:
+            print(f"Transcript summary failed, keeping gist lines: {e}")
+            return
+        if compacted:
+            self._summary_head = compacted
+            compacted_lines = set(lines)
+            self._summary_tail = [line for line in self._summary_tail if line not in compacted_lines]
+
+    def context_messages(self, persona: str, reserved_tokens: int = 0, prompt: Optional[str] = None,
+                         pending: Optional[Tuple[str, str]] = None) -> Tuple[List[dict], int]:
+        """
+        Summary and recent-turn messages for ``persona``'s next turn, plus the
+        estimated prompt tokens including ``reserved_tokens`` (the persona prompt)
+
+        ``prompt`` is put first as a system message, for agents whose session
+        doesn't insert their instructions (it is counted in ``reserved_tokens``).
+        ``pending`` is a (speaker, text) turn whose text is final but which is
+        still playing out, so it isn't in the transcript yet; it goes last.
+        """
+        system = []
+        summary = self.summary
+        if summary:
+            system.append({"role": "system", "content": f"Summary of the debate so far:\n{summary}"})
+        used = reserved_tokens + sum(estimate_tokens(m["content"]) for m in system)
+        if prompt:
+            system.insert(0, {"role": "system", "content": prompt})
+
+        entries = self.entries + ([TranscriptEntry(pending[0], pending[1].strip(), 0)] if pending else [])
+        recent: List[dict] = []
+        for entry in reversed(entries):
+            if entry.speaker == persona:
+                message = {"role": "assistant", "content": entry.text}
+            else:
+                message = {"role": "user", "content": f"{entry.speaker}: {entry.text}"}
+            cost = estimate_tokens(message["content"])
+            if used + cost > self.budget_tokens:
+                break
+            recent.append(message)
+            used += cost
+
+        return system + list(reversed(recent)), used
+
+    def close(self):
+        if self._compaction and not self._compaction.done():
+            self._compaction.cancel()
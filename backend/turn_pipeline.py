@@ -0,0 +1,289 @@
+"""
+Pipelined debate turns.
+
+Instead of waiting for a full LLM reply before speaking, the reply is streamed,
+cut into sentences (or clauses, for long run-on text) as it arrives and each
+chunk is handed to TTS straight away, so audio starts on the first sentence.
+Every turn records time-to-first-token, time-to-first-audio and total time.
+
+TurnPrefetcher drafts the next persona's reply while the current one is still
+speaking, so at the turn switch only TTS latency remains. The turns call
+``on_text`` with their full text as soon as it is final (the LLM stream ended
+or the draft was ready), while the audio is still playing, so that draft can
+answer the turn it follows.
+"""
+
+import re, time, asyncio
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+# Sentence ends: terminal punctuation (optionally followed by quotes/brackets) and whitespace
+_SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+")
+# Clause breaks used only once a chunk gets long without a sentence end
+_CLAUSE_END = re.compile(r"[,;:—–]\s+")
+
+
+class SentenceChunker:
+    """Split streamed text into speakable chunks"""
+
+    def __init__(self, min_chars: int = 20, max_chars: int = 160):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> list[str]:
+        """Add streamed text, returning any chunks that are now complete"""
+        self._buffer += text
+        chunks = []
+        while True:
+            chunk = self._next_chunk()
+            if chunk is None:
+                return chunks
+            chunks.append(chunk)
+
+    def flush(self) -> Optional[str]:
+        """Return whatever is left once the stream ends"""
+        tail, self._buffer = self._buffer.strip(), ""
+        return tail or None
+
+    def _next_chunk(self) -> Optional[str]:
+        cut = None
+        for match in _SENTENCE_END.finditer(self._buffer):
+            if match.end() >= self.min_chars:
+                cut = match.end()
+                break
+        if cut is None and len(self._buffer) >= self.max_chars:
+            clauses = [m.end() for m in _CLAUSE_END.finditer(self._buffer, 0, self.max_chars) if m.end() >= self.min_chars]
+            cut = clauses[-1] if clauses else None
+            if cut is None:
+                # No punctuation at all: break on the last space before the limit
+                space = self._buffer.rfind(" ", self.min_chars, self.max_chars)
+                cut = space + 1 if space > 0 else self.max_chars
+        if cut is None:
+            return None
+        chunk, self._buffer = self._buffer[:cut].strip(), self._buffer[cut:]
+        return chunk or None
+
+
+@dataclass
+class TurnTimings:
+    persona: str
+    round: int
+    mode: str
+    started: float = field(default_factory=time.perf_counter)
+    first_token: Optional[float] = None
+    first_audio: Optional[float] = None
+    ended: Optional[float] = None
+    prompt_tokens: Optional[int] = None
+
+    def mark_first_token(self):
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+
+    def mark_first_audio(self):
+        if self.first_audio is None:
+            self.first_audio = time.perf_counter()
+
+    def finish(self):
+        self.ended = time.perf_counter()
+
+    def _since_start(self, t: Optional[float]) -> Optional[float]:
+        return round(t - self.started, 3) if t is not None else None
+
+    def as_dict(self) -> dict:
+        return {
+            "persona": self.persona,
+            "round": self.round,
+            "mode": self.mode,
+            "ttft_sec": self._since_start(self.first_token),
+            "ttfa_sec": self._since_start(self.first_audio),
+            "total_sec": self._since_start(self.ended),
+            "prompt_tokens": self.prompt_tokens,
+        }
+
+    def summary(self) -> str:
+        d = self.as_dict()
+        return (f"{self.persona} round {self.round} [{self.mode}]: "
+                f"ttft={d['ttft_sec']}s ttfa={d['ttfa_sec']}s total={d['total_sec']}s "
+                f"prompt_tokens={d['prompt_tokens']}")
+
+
+def _watch_turn(session, timings: TurnTimings):
+    """Hook session events that mark first token/audio; returns an unsubscribe callback"""
+
+    def on_state(ev):
+        if ev.new_state == "speaking":
+            timings.mark_first_audio()
+
+    def on_metrics(ev):
+        # Only needed for generate_reply(), where we don't see the LLM stream ourselves
+        ttft = getattr(ev.metrics, "ttft", None)
+        if ttft is not None and ttft >= 0 and timings.first_token is None:
+            timings.first_token = timings.started + ttft
+
+    session.on("agent_state_changed", on_state)
+    session.on("metrics_collected", on_metrics)
+
+    def unsubscribe():
+        session.off("agent_state_changed", on_state)
+        session.off("metrics_collected", on_metrics)
+
+    return unsubscribe
+
+
+async def stream_sentences(llm, chat_ctx, timings: Optional[TurnTimings] = None,
+                           chunker: Optional[SentenceChunker] = None):
+    """Stream an LLM reply as sentence-sized chunks"""
+    chunker = chunker or SentenceChunker()
+    async with llm.chat(chat_ctx=chat_ctx) as stream:
+        async for chunk in stream:
+            delta = chunk.delta.content if chunk.delta else None
+            if not delta:
+                continue
+            if timings:
+                timings.mark_first_token()
+            for sentence in chunker.feed(delta):
+                yield sentence
+    tail = chunker.flush()
+    if tail:
+        yield tail
+
+
+async def generate_text(llm, chat_ctx) -> str:
+    """Collect a complete LLM reply without speaking it"""
+    parts = []
+    async with llm.chat(chat_ctx=chat_ctx) as stream:
+        async for chunk in stream:
+            if chunk.delta and chunk.delta.content:
+                parts.append(chunk.delta.content)
+    return "".join(parts).strip()
+
+
+async def pipelined_turn(session, llm, persona: str, round_number: int,
+                         on_text: Optional[Callable[[str], None]] = None) -> TurnTimings:
+    """Speak one turn, sending each sentence to TTS as soon as the LLM produces it"""
+    timings = TurnTimings(persona=persona, round=round_number, mode="pipelined")
+    unsubscribe = _watch_turn(session, timings)
+
+    async def sentences():
+        spoken = []
+        async for sentence in stream_sentences(llm, chat_ctx, timings):
+            spoken.append(sentence)
+            yield sentence
+        # The reply is complete; its last sentences are still being synthesized and played
+        if on_text and spoken:
+            on_text(" ".join(spoken))
+
+    try:
+        chat_ctx = session.current_agent.chat_ctx
+        handle = session.say(sentences())
+        await handle
+    finally:
+        unsubscribe()
+        timings.finish()
+    return timings
+
+
+async def reply_turn(session, persona: str, round_number: int) -> TurnTimings:
+    """Speak one turn through AgentSession.generate_reply(), timed the same way"""
+    timings = TurnTimings(persona=persona, round=round_number, mode="reply")
+    unsubscribe = _watch_turn(session, timings)
+    try:
+        await session.generate_reply()
+    finally:
+        unsubscribe()
+        timings.finish()
+    return timings
+
+
+async def prefetched_turn(session, text: str, persona: str, round_number: int,
+                          on_text: Optional[Callable[[str], None]] = None, say=None) -> TurnTimings:
+    """Speak a reply drafted ahead of time; only TTS sits between the turn switch and audio
+
+    ``say(session, text)``, when given, speaks it instead of ``session.say`` (e.g. through the utterance cache).
+    """
+    timings = TurnTimings(persona=persona, round=round_number, mode="prefetched")
+    timings.mark_first_token()
+    unsubscribe = _watch_turn(session, timings)
+    if on_text:
+        on_text(text)
+    try:
+        await (say(session, text) if say else session.say(text))
+    finally:
+        unsubscribe()
+        timings.finish()
+    return timings
+
+
+class TurnPrefetcher:
+    """Draft the next speaker's reply while the current speaker talks"""
+
+    def __init__(self, llm):
+        self.llm = llm
+        self._drafts: Dict[str, asyncio.Task] = {}
+        # Sessions whose drafts are outstanding, so they can be regenerated
+        self._sessions: Dict[str, object] = {}
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+        # Seconds from each turn switch to the first audio of the new turn
+        self.gaps: list[float] = []
+
+    def prefetch(self, session, persona: str):
+        if persona in self._drafts:
+            return
+        chat_ctx = session.current_agent.chat_ctx
+        self._sessions[persona] = session
+        self._drafts[persona] = asyncio.create_task(generate_text(self.llm, chat_ctx))
+
+    def pending(self) -> Dict[str, object]:
+        """Persona -> session for every draft still outstanding"""
+        return dict(self._sessions)
+
+    def invalidate(self, persona: str):
+        """A human spoke: discard ``persona``'s draft and regenerate it with the interjection in context"""
+        task = self._drafts.pop(persona, None)
+        if task is None:
+            return
+        task.cancel()
+        self.discarded += 1
+        self.prefetch(self._sessions[persona], persona)
+
+    async def take(self, persona: str) -> Optional[str]:
+        """The drafted reply for ``persona``, waiting for it if still in flight"""
+        task = self._drafts.pop(persona, None)
+        self._sessions.pop(persona, None)
+        if task is None:
+            self.misses += 1
+            return None
+        try:
+            text = await task
+        except (asyncio.CancelledError, Exception) as e:
+            print(f"Prefetch for {persona} unusable: {e!r}")
+            text = ""
+        if not text:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return text
+
+    def record_gap(self, timings: TurnTimings):
+        if timings.first_audio is not None:
+            self.gaps.append(timings.first_audio - timings.started)
+
+    def close(self):
+        for task in self._drafts.values():
+            task.cancel()
+        self._drafts.clear()
+        self._sessions.clear()
+
+    def stats(self) -> dict:
+        taken = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "discarded": self.discarded,
+            "hit_rate": round(self.hits / taken, 3) if taken else 0.0,
+            "avg_gap_sec": round(sum(self.gaps) / len(self.gaps), 3) if self.gaps else None,
+            "max_gap_sec": round(max(self.gaps), 3) if self.gaps else None,
+        }
@@ -0,0 +1,87 @@
+"""
+Event-driven turn scheduling.
+
+A turn ends when its speech has finished playing out (or when it hits the
+turn duration, which is only an upper bound now), and the next persona starts
+after a short minimum gap, once no human is speaking. Each turn emits a timing
+event to the registered listeners.
+"""
+
+import time, asyncio
+from typing import Awaitable, Callable, List, Optional
+
+from turn_pipeline import TurnTimings
+
+
+class TurnScheduler:
+    def __init__(self, max_turn_sec: float, min_gap_sec: float = 0.5, max_user_wait_sec: float = 30.0):
+        self.max_turn_sec = max_turn_sec
+        self.min_gap_sec = min_gap_sec
+        self.max_user_wait_sec = max_user_wait_sec
+        self.listeners: List[Callable[[dict], None]] = []
+
+        # Sessions currently reporting that the human is speaking
+        self._user_speaking: set = set()
+        self._user_quiet = asyncio.Event()
+        self._user_quiet.set()
+        self._last_turn_end: Optional[float] = None
+
+    def watch(self, session):
+        """Track human speech as seen by ``session``"""
+
+        def on_user_state(ev):
+            if ev.new_state == "speaking":
+                self._user_speaking.add(id(session))
+                self._user_quiet.clear()
+            else:
+                self._user_speaking.discard(id(session))
+                if not self._user_speaking:
+                    self._user_quiet.set()
+
+        session.on("user_state_changed", on_user_state)
+
+    def emit(self, event: dict):
+        for listener in self.listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"Turn event listener failed: {e}")
+
+    async def run_turn(self, session, speak: Callable[[], Awaitable[TurnTimings]]) -> TurnTimings:
+        """Run one turn until playout finishes, interrupting it at ``max_turn_sec``"""
+        started = time.perf_counter()
+        task = asyncio.create_task(speak())
+        done, _ = await asyncio.wait({task}, timeout=self.max_turn_sec)
+        reason = "playout_finished"
+        if not done:
+            reason = "max_duration"
+            session.interrupt()
+        timings = await task
+        ended = time.perf_counter()
+
+        gap = None
+        if self._last_turn_end is not None and timings.first_audio is not None:
+            gap = round(timings.first_audio - self._last_turn_end, 3)
+        self._last_turn_end = ended
+
+        self.emit({
+            "type": "turn_end",
+            **timings.as_dict(),
+            "reason": reason,
+            "spoken_sec": round(ended - (timings.first_audio or started), 3),
+            "gap_before_sec": gap,
+        })
+        return timings
+
+    async def wait_for_next_turn(self):
+        """Hold the floor for the minimum gap, then until the human stops talking"""
+        t0 = time.perf_counter()
+        await asyncio.sleep(self.min_gap_sec)
+        user_spoke = not self._user_quiet.is_set()
+        if user_spoke:
+            try:
+                await asyncio.wait_for(self._user_quiet.wait(), self.max_user_wait_sec)
+            except asyncio.TimeoutError:
+                pass
+        self.emit({"type": "turn_gap", "waited_sec": round(time.perf_counter() - t0, 3),
+                   "user_spoke": user_spoke})
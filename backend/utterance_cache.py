@@ -0,0 +1,166 @@
+"""
+Content-addressed cache for generated utterances.
+
+Introductions are near-identical across debates (eight fixed personas and
+voices), so their LLM text and synthesized audio are cached on disk, keyed by
+a hash of everything that shaped them (persona, voice, models, normalized
+topic, text). A hit replays stored PCM instead of calling the LLM and TTS.
+On a miss the text can be streamed (an LLM reply, sentence by sentence): it is
+synthesized as it arrives and its audio stored once complete.
+Entries are evicted least-recently-used once the store exceeds its size limit.
+"""
+
+import os, re, json, hashlib, asyncio, threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Callable, Optional, Tuple
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_topic(topic: str) -> str:
+    """Case, punctuation and spacing differences shouldn't defeat the cache"""
+    return _SPACES.sub(" ", _NON_WORD.sub("", topic.lower())).strip()
+
+
+def cache_key(*parts) -> str:
+    return hashlib.sha256("\x1f".join(str(p) for p in parts).encode()).hexdigest()
+
+
+class UtteranceCache:
+    def __init__(self, directory: Path, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.hits = {"text": 0, "audio": 0}
+        self.misses = {"text": 0, "audio": 0}
+        self._lock = threading.Lock()
+
+        # file name -> size, least recently used first (mtime is bumped on every hit)
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        files = sorted(self.directory.iterdir(), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            if path.suffix in (".txt", ".pcm", ".json"):
+                self._index[path.name] = path.stat().st_size
+        self._bytes = sum(self._index.values())
+
+    # ------------------------------------------------------------------
+    # Blocking file operations, run off the event loop
+    # ------------------------------------------------------------------
+
+    def _read(self, name: str) -> Optional[bytes]:
+        path = self.directory / name
+        with self._lock:
+            try:
+                data = path.read_bytes()
+                os.utime(path)
+            except FileNotFoundError:
+                self._forget(name)
+                return None
+            if name in self._index:
+                self._index.move_to_end(name, last=True)
+            return data
+
+    def _write(self, name: str, data: bytes):
+        path = self.directory / name
+        tmp = path.with_suffix(path.suffix + f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        with self._lock:
+            os.replace(tmp, path)
+            self._forget(name)
+            self._index[name] = len(data)
+            self._bytes += len(data)
+            self._evict()
+
+    def _forget(self, name: str):
+        size = self._index.pop(name, None)
+        if size is not None:
+            self._bytes -= size
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._index) > 1:
+            name, _ = next(iter(self._index.items()))
+            self._forget(name)
+            (self.directory / name).unlink(missing_ok=True)
+            if name.endswith(".pcm"):
+                # Audio is useless without its format header
+                self._forget(name[:-4] + ".json")
+                (self.directory / (name[:-4] + ".json")).unlink(missing_ok=True)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def get_text(self, key: str) -> Optional[str]:
+        data = await asyncio.to_thread(self._read, f"{key}.txt")
+        self._count("text", data is not None)
+        return data.decode() if data is not None else None
+
+    async def put_text(self, key: str, text: str):
+        await asyncio.to_thread(self._write, f"{key}.txt", text.encode())
+
+    async def get_audio(self, key: str) -> Optional[Tuple[int, int, bytes]]:
+        """(sample_rate, num_channels, int16 PCM) for a cached utterance"""
+        def read():
+            header = self._read(f"{key}.json")
+            pcm = self._read(f"{key}.pcm") if header is not None else None
+            return header, pcm
+
+        header, pcm = await asyncio.to_thread(read)
+        self._count("audio", pcm is not None)
+        if pcm is None:
+            return None
+        meta = json.loads(header)
+        return meta["sample_rate"], meta["num_channels"], pcm
+
+    async def put_audio(self, key: str, sample_rate: int, num_channels: int, pcm: bytes):
+        def write():
+            self._write(f"{key}.pcm", pcm)
+            self._write(f"{key}.json", json.dumps({"sample_rate": sample_rate, "num_channels": num_channels}).encode())
+
+        await asyncio.to_thread(write)
+
+    def _count(self, kind: str, hit: bool):
+        if hit:
+            self.hits[kind] += 1
+        else:
+            self.misses[kind] += 1
+
+    def stats(self) -> dict:
+        return {
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "entries": len(self._index),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+async def synthesize_and_store(tts, sentences: AsyncIterable[str], cache: UtteranceCache,
+                               audio_key: Callable[[str], str],
+                               spoken: Optional[asyncio.Queue] = None) -> AsyncIterator:
+    """Frames for each sentence from TTS, keeping a copy for the cache
+
+    Once every sentence has been voiced the audio is stored under
+    ``audio_key(full text)``; an interrupted utterance isn't stored. Each
+    sentence is put on ``spoken`` as it is voiced, then None at the end.
+    """
+    said, pcm = [], bytearray()
+    sample_rate = num_channels = None
+    try:
+        async for sentence in sentences:
+            said.append(sentence)
+            if spoken is not None:
+                spoken.put_nowait(sentence)
+            async with tts.synthesize(sentence) as stream:
+                async for audio in stream:
+                    frame = audio.frame
+                    sample_rate, num_channels = frame.sample_rate, frame.num_channels
+                    pcm.extend(bytes(frame.data))
+                    yield frame
+    finally:
+        if spoken is not None:
+            spoken.put_nowait(None)
+    if pcm:
+        await cache.put_audio(audio_key(" ".join(said)), sample_rate, num_channels, bytes(pcm))